@@ -0,0 +1,174 @@
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Iterator
+
+# Pillow 为可选依赖，仅在需要转码、压缩或分页时使用
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+@dataclass(frozen=True)
+class ImageFormat:
+    """
+    图片输出格式
+    """
+    name: str
+    suffix: str
+    media_type: str
+    pillow_format: str
+    lossy: bool
+
+IMAGE_FORMATS: dict[str, ImageFormat] = {
+    "png": ImageFormat("png", ".png", "image/png", "PNG", False),
+    "jpeg": ImageFormat("jpeg", ".jpg", "image/jpeg", "JPEG", True),
+    "webp": ImageFormat("webp", ".webp", "image/webp", "WEBP", True),
+}
+
+# 格式别名
+FORMAT_ALIASES: dict[str, str] = {
+    "jpg": "jpeg",
+}
+
+# 自动选择格式时的尝试顺序 (体积从小到大)
+AUTO_FORMAT_ORDER: tuple[str, ...] = ("webp", "jpeg", "png")
+
+# 压缩到目标体积时依次尝试的质量与缩放比例
+_QUALITY_LADDER: tuple[int, ...] = (90, 80, 70, 60, 50, 40)
+_SCALE_LADDER: tuple[float, ...] = (1.0, 0.85, 0.7, 0.55)
+
+class PillowNotInstalledError(RuntimeError):
+    """需要 Pillow 的功能在未安装 Pillow 时被调用"""
+    pass
+
+def pillow_available() -> bool:
+    """Pillow 是否可用"""
+    return Image is not None
+
+def _require_pillow() -> None:
+    if Image is None:
+        raise PillowNotInstalledError("Pillow is required for image transcoding, compression and pagination")
+
+def normalize_format(output_format: str) -> str:
+    """
+    规范化格式名称
+
+    :param output_format: 格式名称 (png/jpeg/jpg/webp/auto)
+    :return: 规范化后的格式名称
+    :raise ValueError: 不支持的格式
+    """
+    output_format = output_format.lower()
+    output_format = FORMAT_ALIASES.get(output_format, output_format)
+    if output_format != "auto" and output_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {output_format}")
+    return output_format
+
+def media_type_of(suffix: str) -> str | None:
+    """
+    根据扩展名获取媒体类型
+
+    :param suffix: 扩展名 (含点)
+    :return: 媒体类型，未知时返回None
+    """
+    for image_format in IMAGE_FORMATS.values():
+        if image_format.suffix == suffix:
+            return image_format.media_type
+    return None
+
+def open_image(path) -> "Image.Image":
+    """
+    打开图片并载入内存
+
+    :param path: 图片路径
+    :return: Pillow 图片对象
+    """
+    _require_pillow()
+    with Image.open(path) as image:
+        image.load()
+        return image
+
+def encode_image(image: "Image.Image", output_format: str, quality: int | None = None) -> bytes:
+    """
+    将图片编码为指定格式
+
+    :param image: Pillow 图片对象
+    :param output_format: 输出格式 (png/jpeg/webp)
+    :param quality: 有损格式的质量 (1-100)
+    :return: 编码后的数据
+    """
+    _require_pillow()
+    image_format = IMAGE_FORMATS[output_format]
+    options = {}
+    if image_format.lossy:
+        options["quality"] = quality if quality is not None else _QUALITY_LADDER[0]
+    else:
+        options["optimize"] = True
+
+    # JPEG 不支持透明通道
+    if image_format.name == "jpeg" and image.mode not in {"RGB", "L"}:
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        if "A" in image.getbands():
+            background.paste(image, mask=image.getchannel("A"))
+        else:
+            background.paste(image.convert("RGB"))
+        image = background
+
+    buffer = BytesIO()
+    image.save(buffer, format=image_format.pillow_format, **options)
+    return buffer.getvalue()
+
+def fit_to_budget(
+        image: "Image.Image",
+        max_bytes: int,
+        formats: tuple[str, ...] = AUTO_FORMAT_ORDER,
+        quality: int | None = None
+    ) -> tuple[bytes, str]:
+    """
+    选择格式、质量与缩放比例，使编码结果不超过目标体积
+
+    优先降低质量，其次缩小尺寸；都无法满足时返回尝试过的最小结果
+
+    :param image: Pillow 图片对象
+    :param max_bytes: 目标体积上限 (字节)
+    :param formats: 允许使用的格式 (按优先级排列)
+    :param quality: 有损格式的最高质量，为None时从默认质量开始
+    :return: (编码后的数据, 使用的格式)
+    """
+    _require_pillow()
+    qualities = _QUALITY_LADDER if quality is None else tuple(q for q in _QUALITY_LADDER if q < quality)
+    if quality is not None:
+        qualities = (quality,) + qualities
+
+    best: tuple[bytes, str] | None = None
+    for scale in _SCALE_LADDER:
+        if scale == 1.0:
+            scaled = image
+        else:
+            scaled = image.resize(
+                (max(int(image.width * scale), 1), max(int(image.height * scale), 1)),
+                Image.LANCZOS
+            )
+        for output_format in formats:
+            ladder = qualities if IMAGE_FORMATS[output_format].lossy else (None,)
+            for q in ladder:
+                data = encode_image(scaled, output_format, q)
+                if len(data) <= max_bytes:
+                    return data, output_format
+                if best is None or len(data) < len(best[0]):
+                    best = (data, output_format)
+    return best
+
+def split_pages(image: "Image.Image", page_height: int) -> Iterator["Image.Image"]:
+    """
+    将过长的图片按高度切分为多页
+
+    :param image: Pillow 图片对象
+    :param page_height: 单页高度 (像素)
+    :return: 分页图片迭代器
+    """
+    _require_pillow()
+    if page_height <= 0:
+        yield image
+        return
+    for top in range(0, image.height, page_height):
+        yield image.crop((0, top, image.width, min(top + page_height, image.height)))
@@ -1,37 +1,58 @@
+import os
 import markdown
 import imgkit
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterator
 from .styles import STYLES
+from .ImageEncoder import (
+    IMAGE_FORMATS,
+    AUTO_FORMAT_ORDER,
+    normalize_format,
+    pillow_available,
+    open_image,
+    encode_image,
+    fit_to_budget,
+    split_pages
+)
 from ConfigManager import ConfigLoader
 
 configs = ConfigLoader()
 
-# 修改 markdown_to_image 函数
-def markdown_to_image(
-    markdown_text: str,
-    output_path: str,
+# 渲染器版本号，修改渲染流程时需要同步更新以使渲染缓存失效
+__renderer_version__ = "1.2.0"
+
+@lru_cache(maxsize=configs.get_config("markdown_html_cache_size", 256).get_value(int))
+def markdown_to_html(markdown_text: str) -> str:
+    """
+    将 Markdown 渲染为 HTML 片段 (结果会被缓存)
+
+    样式变化时只需要重新栅格化，不需要重新解析 Markdown
+
+    参数:
+    - markdown_text: Markdown 文本
+
+    返回: HTML 片段
+    """
+    return markdown.markdown(markdown_text)
+
+def build_html(
+    html_content: str,
     width: int = 800,
     css: str = None,
-    style: str = "light",
-    options: dict = None
+    style: str = "light"
 ) -> str:
     """
-    使用 wkhtmltoimage 将 Markdown 转为自适应图片
-    
+    为 HTML 片段添加样式并构建完整 HTML 文档
+
     参数:
-    - markdown_text: Markdown 文本
-    - output_path: 输出图片路径 (.png/.jpg)
+    - html_content: HTML 片段
     - width: 目标宽度 (像素)
     - css: 自定义 CSS 样式 (优先级高于style参数)
     - style: 预设样式名称 (light/dark/pink/blue/green)
-    - options: wkhtmltoimage 高级选项
-    
-    返回: 输出文件路径
+
+    返回: 完整 HTML 文档
     """
-    # 1. 渲染 Markdown 为 HTML
-    html_content = markdown.markdown(markdown_text)
-    
-    # 2. 构建完整 HTML
     if css is None:
         # 使用预设样式
         css = STYLES.get(style, STYLES["light"])
@@ -39,7 +60,7 @@ def markdown_to_image(
     # 添加自适应宽度
     css += f"\nbody {{ width: {width - 60}px; }}"
     
-    full_html = f"""
+    return f"""
     <!DOCTYPE html>
     <html>
     <head>
@@ -50,6 +71,39 @@ def markdown_to_image(
     <body>{html_content}</body>
     </html>
     """
+
+# 修改 markdown_to_image 函数
+def markdown_to_image(
+    markdown_text: str,
+    output_path: str,
+    width: int = 800,
+    css: str = None,
+    style: str = "light",
+    options: dict = None
+) -> str:
+    """
+    使用 wkhtmltoimage 将 Markdown 转为自适应图片
+    
+    参数:
+    - markdown_text: Markdown 文本
+    - output_path: 输出图片路径 (.png/.jpg)
+    - width: 目标宽度 (像素)
+    - css: 自定义 CSS 样式 (优先级高于style参数)
+    - style: 预设样式名称 (light/dark/pink/blue/green)
+    - options: wkhtmltoimage 高级选项
+    
+    返回: 输出文件路径
+    """
+    # 1. 渲染 Markdown 为 HTML (带缓存)
+    html_content = markdown_to_html(markdown_text)
+    
+    # 2. 构建完整 HTML
+    full_html = build_html(
+        html_content,
+        width = width,
+        css = css,
+        style = style
+    )
     
     # 3. 配置转换选项
     default_options = {
@@ -71,6 +125,120 @@ def markdown_to_image(
     
     return str(Path(output_path).resolve())
 
+def _encode_to_file(image, output_base: Path, output_format: str, quality: int | None, max_bytes: int | None) -> Path:
+    """
+    编码图片并写入 output_base + 对应扩展名
+
+    :return: 实际写入的文件路径
+    """
+    if max_bytes:
+        formats = AUTO_FORMAT_ORDER if output_format == "auto" else (output_format,)
+        data, output_format = fit_to_budget(image, max_bytes, formats = formats, quality = quality)
+    else:
+        if output_format == "auto":
+            output_format = AUTO_FORMAT_ORDER[0]
+        data = encode_image(image, output_format, quality)
+    output_path = Path(f"{output_base}{IMAGE_FORMATS[output_format].suffix}")
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return output_path
+
+def render_markdown_image(
+    markdown_text: str,
+    output_base: str | Path,
+    width: int = 800,
+    style: str = "light",
+    output_format: str = "png",
+    quality: int | None = None,
+    max_bytes: int | None = None
+) -> Path:
+    """
+    将 Markdown 渲染为指定格式的图片
+
+    不需要转码时直接由 wkhtmltoimage 输出，否则先渲染 PNG 再由 Pillow 转码，
+    指定 max_bytes 时会自动选择格式 (output_format 为 auto 时)、质量与尺寸以满足体积上限
+
+    参数:
+    - markdown_text: Markdown 文本
+    - output_base: 不含扩展名的输出路径
+    - width: 目标宽度 (像素)
+    - style: 预设样式名称
+    - output_format: 输出格式 (png/jpeg/webp/auto)
+    - quality: 有损格式的质量 (1-100)
+    - max_bytes: 输出体积上限 (字节)
+
+    返回: 实际写入的文件路径
+    """
+    output_format = normalize_format(output_format)
+    if output_format == "auto" and not max_bytes and not pillow_available():
+        output_format = "png"
+
+    # 1. 不需要转码时直接输出
+    if not max_bytes and output_format == "png":
+        output_path = Path(f"{output_base}.png")
+        markdown_to_image(markdown_text, output_path, width = width, style = style)
+        return output_path
+    if not max_bytes and output_format == "jpeg":
+        output_path = Path(f"{output_base}.jpg")
+        markdown_to_image(
+            markdown_text,
+            output_path,
+            width = width,
+            style = style,
+            options = {"format": "jpg", "quality": quality if quality is not None else 90}
+        )
+        return output_path
+
+    # 2. 渲染 PNG 后转码
+    source_path = Path(f"{output_base}.source.png")
+    try:
+        markdown_to_image(markdown_text, source_path, width = width, style = style)
+        image = open_image(source_path)
+    finally:
+        if source_path.exists():
+            os.remove(source_path)
+    return _encode_to_file(image, Path(output_base), output_format, quality, max_bytes)
+
+def render_markdown_pages(
+    markdown_text: str,
+    output_dir: str | Path,
+    name_prefix: str,
+    page_height: int,
+    width: int = 800,
+    style: str = "light",
+    output_format: str = "png",
+    quality: int | None = None,
+    max_bytes: int | None = None
+) -> Iterator[Path]:
+    """
+    将 Markdown 渲染为图片并按高度分页，每完成一页就产出一页
+
+    参数:
+    - markdown_text: Markdown 文本
+    - output_dir: 输出目录
+    - name_prefix: 输出文件名前缀，第 i 页的文件名为 {name_prefix}_{i} 加扩展名
+    - page_height: 单页高度 (像素)
+    - width: 目标宽度 (像素)
+    - style: 预设样式名称
+    - output_format: 输出格式 (png/jpeg/webp/auto)
+    - quality: 有损格式的质量 (1-100)
+    - max_bytes: 单页输出体积上限 (字节)
+
+    返回: 逐页产出实际写入的文件路径
+    """
+    output_format = normalize_format(output_format)
+    output_dir = Path(output_dir)
+    source_path = output_dir / f"{name_prefix}.source.png"
+    try:
+        markdown_to_image(markdown_text, source_path, width = width, style = style)
+        image = open_image(source_path)
+    finally:
+        if source_path.exists():
+            os.remove(source_path)
+
+    for index, page in enumerate(split_pages(image, page_height)):
+        yield _encode_to_file(page, output_dir / f"{name_prefix}_{index}", output_format, quality, max_bytes)
+
 # 修改使用示例
 if __name__ == "__main__":
     example_markdown = """
@@ -0,0 +1,207 @@
+import os
+import time
+import heapq
+import asyncio
+from pathlib import Path
+
+import orjson
+from loguru import logger
+
+class RenderArtifactManager:
+    """
+    渲染产物过期管理器
+
+    所有图片的过期时间保存在一个最小堆中，并持久化到目录下的索引文件，
+    由单个清理协程批量删除过期文件，启动时会清理索引之外的孤立文件
+    """
+    def __init__(
+            self,
+            directory: str | Path,
+            index_filename: str = ".render_index.json",
+            batch_size: int = 64,
+            flush_interval: float = 5.0
+        ):
+        """
+        :param directory: 渲染产物目录
+        :param index_filename: 索引文件名
+        :param batch_size: 单批次最多删除的文件数量
+        :param flush_interval: 索引变化后最长的写回间隔 (秒)
+        """
+        self.directory = Path(directory)
+        self.index_filename = index_filename
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # 文件名 -> 过期时间戳 (以此为准，堆中可能存在过时条目)
+        self._expiries: dict[str, float] = {}
+        # (过期时间戳, 文件名) 最小堆
+        self._heap: list[tuple[float, str]] = []
+
+        self._dirty: bool = False
+        self._last_flush: float = 0.0
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._sweeper_task: asyncio.Task | None = None
+
+    @property
+    def index_file_path(self) -> Path:
+        """索引文件路径"""
+        return self.directory / self.index_filename
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def __repr__(self) -> str:
+        return f"<RenderArtifactManager Length={len(self._expiries)}>"
+
+    def register(self, filename: str, timeout: float) -> None:
+        """
+        登记一个渲染产物，到期后由清理协程删除
+
+        :param filename: 文件名 (相对于产物目录)
+        :param timeout: 存活时间 (秒)
+        """
+        expire_at = time.time() + timeout
+        self._expiries[filename] = expire_at
+        heapq.heappush(self._heap, (expire_at, filename))
+        was_dirty = self._dirty
+        self._dirty = True
+        # 新条目最早过期或索引刚变脏时，唤醒清理协程重新计算等待时间
+        if not was_dirty or self._heap[0] == (expire_at, filename):
+            self._wakeup.set()
+
+    # region > 启动与停止
+    async def start(self) -> None:
+        """
+        恢复索引、清理孤立文件并启动清理协程
+        """
+        if self._sweeper_task is not None and not self._sweeper_task.done():
+            return
+        await asyncio.to_thread(self._recover)
+        self._sweeper_task = asyncio.create_task(self._sweep_loop())
+        logger.info(f"Render artifact sweeper started ({len(self._expiries)} pending)", user_id = "[System]")
+
+    async def stop(self) -> None:
+        """
+        停止清理协程并写回索引
+        """
+        if self._sweeper_task is not None and not self._sweeper_task.done():
+            self._sweeper_task.cancel()
+            try:
+                await self._sweeper_task
+            except asyncio.CancelledError:
+                pass
+        self._sweeper_task = None
+        if self._dirty:
+            await asyncio.to_thread(self._write_index, dict(self._expiries))
+            self._dirty = False
+        logger.info("Render artifact sweeper stopped", user_id = "[System]")
+    # endregion
+
+    # region > 索引
+    def _read_index(self) -> dict[str, float]:
+        """读取索引文件"""
+        try:
+            with open(self.index_file_path, "rb") as f:
+                index = orjson.loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except orjson.JSONDecodeError:
+            logger.warning("Render artifact index is corrupted, all artifacts will be treated as orphans", user_id = "[System]")
+            return {}
+        if not isinstance(index, dict):
+            return {}
+        return index
+
+    def _write_index(self, index: dict[str, float]) -> None:
+        """原子地写回索引文件"""
+        temp_path = self.index_file_path.with_name(f"{self.index_filename}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(orjson.dumps(index))
+        os.replace(temp_path, self.index_file_path)
+
+    def _recover(self) -> None:
+        """
+        从索引恢复过期信息，并删除孤立文件与已过期文件
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index = self._read_index()
+        now = time.time()
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or entry.name.startswith(self.index_filename):
+                continue
+            expire_at = index.get(entry.name)
+            if expire_at is None or expire_at <= now:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                continue
+            self._expiries[entry.name] = expire_at
+        self._heap = [(expire_at, name) for name, expire_at in self._expiries.items()]
+        heapq.heapify(self._heap)
+        self._write_index(dict(self._expiries))
+        self._dirty = False
+        if removed:
+            logger.info(f"Removed {removed} orphaned or expired render artifacts", user_id = "[System]")
+    # endregion
+
+    # region > 清理
+    def _pop_expired(self, now: float) -> list[str]:
+        """
+        从堆中取出最多一个批次的已过期文件名
+        """
+        expired = []
+        while self._heap and self._heap[0][0] <= now and len(expired) < self.batch_size:
+            expire_at, filename = heapq.heappop(self._heap)
+            # 跳过被重新登记过的过时条目
+            if self._expiries.get(filename) != expire_at:
+                continue
+            del self._expiries[filename]
+            expired.append(filename)
+        return expired
+
+    def _delete_batch(self, filenames: list[str]) -> None:
+        """删除一批文件"""
+        for filename in filenames:
+            try:
+                os.remove(self.directory / filename)
+            except FileNotFoundError:
+                pass
+
+    async def _sweep_loop(self) -> None:
+        """清理协程主循环"""
+        while True:
+            self._wakeup.clear()
+            expired = self._pop_expired(time.time())
+            if expired:
+                await asyncio.to_thread(self._delete_batch, expired)
+                self._dirty = True
+                logger.info(f"Deleted {len(expired)} expired render artifacts", user_id = "[System]")
+                # 可能还有同时过期的文件，立即进入下一批次
+                continue
+
+            # 索引写回间隔不小于 flush_interval，以合并多次登记
+            flush_wait = self.flush_interval - (time.monotonic() - self._last_flush)
+            if self._dirty and flush_wait <= 0:
+                self._dirty = False
+                self._last_flush = time.monotonic()
+                try:
+                    await asyncio.to_thread(self._write_index, dict(self._expiries))
+                except OSError as e:
+                    self._dirty = True
+                    logger.error(f"Failed to write render artifact index: {e}", user_id = "[System]")
+                flush_wait = self.flush_interval
+
+            # 等待到下一个过期时间，或在有新登记时被唤醒
+            wait_time = None
+            if self._heap:
+                wait_time = max(self._heap[0][0] - time.time(), 0)
+            if self._dirty:
+                wait_time = flush_wait if wait_time is None else min(wait_time, flush_wait)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout = wait_time)
+            except asyncio.TimeoutError:
+                pass
+    # endregion
@@ -0,0 +1,192 @@
+import os
+import asyncio
+import hashlib
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+import orjson
+from loguru import logger
+
+class RenderCache:
+    """
+    基于内容寻址的渲染结果缓存
+
+    缓存文件以渲染参数的哈希值命名，缓存目录有容量上限，超出时按LRU淘汰
+    """
+    _TEMP_MARK = ".tmp"
+
+    def __init__(self, cache_dir: str | Path, max_size: int):
+        """
+        :param cache_dir: 缓存目录
+        :param max_size: 缓存容量上限 (字节)，为0时表示禁用缓存
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+
+        # 缓存键 -> (文件名, 文件大小) (按访问顺序排列，末尾为最近访问)
+        self._entries: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self._total_size: int = 0
+
+        self._global_lock = asyncio.Lock()
+        self._key_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._scan()
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用缓存"""
+        return self.max_size > 0
+
+    @property
+    def total_size(self) -> int:
+        """当前缓存占用 (字节)"""
+        return self._total_size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"<RenderCache Length={len(self._entries)} Size={self._total_size}/{self.max_size}>"
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """
+        根据渲染参数生成缓存键
+
+        :param parts: 所有会影响渲染结果的参数
+        :return: 缓存键 (sha256十六进制)
+        """
+        data = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(data).hexdigest()
+
+    def _scan(self) -> None:
+        """
+        扫描缓存目录，以文件修改时间作为访问顺序恢复索引
+        """
+        files: list[tuple[float, str, int]] = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file():
+                continue
+            if self._TEMP_MARK in entry.name:
+                # 清理上次中断的临时文件
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+                continue
+            stat = entry.stat()
+            files.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(files):
+            key = name.split(".", 1)[0]
+            if key in self._entries:
+                self._total_size -= self._entries.pop(key)[1]
+            self._entries[key] = (name, size)
+            self._total_size += size
+        self._evict()
+
+    def _evict(self, keep: str | None = None) -> None:
+        """
+        按LRU顺序淘汰缓存，直到容量低于上限
+
+        :param keep: 不允许被淘汰的缓存键
+        """
+        while self._total_size > self.max_size and self._entries:
+            key, (name, size) = next(iter(self._entries.items()))
+            if key == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(key)
+                continue
+            del self._entries[key]
+            self._total_size -= size
+            try:
+                os.remove(self.cache_dir / name)
+            except FileNotFoundError:
+                pass
+            logger.info(f"Evicted cached image {name}", user_id = "[System]")
+
+    def path_for(self, filename: str) -> Path:
+        """
+        获取缓存文件路径
+
+        :param filename: 缓存文件名
+        :return: 缓存文件路径
+        """
+        return self.cache_dir / filename
+
+    def get(self, key: str) -> Path | None:
+        """
+        查询缓存，命中时刷新其访问顺序
+
+        :param key: 缓存键
+        :return: 命中时返回文件路径，否则返回None
+        """
+        if key not in self._entries:
+            return None
+        path = self.path_for(self._entries[key][0])
+        try:
+            # 更新修改时间，使访问顺序在重启后仍然有效
+            os.utime(path)
+        except FileNotFoundError:
+            self._total_size -= self._entries.pop(key)[1]
+            return None
+        self._entries.move_to_end(key)
+        return path
+
+    def add(self, key: str, filename: str) -> None:
+        """
+        登记新写入的缓存文件，并按需淘汰旧缓存
+
+        :param key: 缓存键
+        :param filename: 缓存文件名
+        """
+        size = self.path_for(filename).stat().st_size
+        if key in self._entries:
+            self._total_size -= self._entries.pop(key)[1]
+        self._entries[key] = (filename, size)
+        self._total_size += size
+        self._evict(keep = key)
+
+    async def _get_key_lock(self, key: str) -> asyncio.Lock:
+        """获取 key 对应的锁，如果没有则创建"""
+        async with self._global_lock:
+            lock: asyncio.Lock | None = self._key_locks.get(key)
+            if lock is None:
+                lock = asyncio.Lock()
+                self._key_locks[key] = lock
+        return lock
+
+    async def get_or_create(self, key: str, create: Callable[[Path], Path]) -> tuple[Path, bool]:
+        """
+        获取缓存，未命中时在线程中调用 create 生成文件
+
+        create 接收一个不含扩展名的临时输出路径，返回实际写入的文件路径，
+        缓存文件名为缓存键加上该文件的扩展名。同一缓存键的并发请求只会生成一次
+
+        :param key: 缓存键
+        :param create: 生成文件的同步函数
+        :return: (文件路径, 是否命中缓存)
+        """
+        lock = await self._get_key_lock(key)
+        async with lock:
+            path = self.get(key)
+            if path is not None:
+                return path, True
+
+            temp_base = self.cache_dir / f"{key}{self._TEMP_MARK}"
+            temp_path: Path | None = None
+            try:
+                temp_path = Path(await asyncio.to_thread(create, temp_base))
+                filename = f"{key}{temp_path.suffix}"
+                path = self.path_for(filename)
+                await asyncio.to_thread(os.replace, temp_path, path)
+            finally:
+                if temp_path is not None and temp_path.exists():
+                    await asyncio.to_thread(os.remove, temp_path)
+            self.add(key, filename)
+            return path, False
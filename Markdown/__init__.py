@@ -1,2 +1,17 @@
-from .MDRenderer import markdown_to_image
-from .styles import STYLES
\ No newline at end of file
+from .MDRenderer import (
+    markdown_to_image,
+    markdown_to_html,
+    render_markdown_image,
+    render_markdown_pages,
+    __renderer_version__
+)
+from .ImageEncoder import (
+    IMAGE_FORMATS,
+    PillowNotInstalledError,
+    normalize_format,
+    media_type_of,
+    pillow_available
+)
+from .styles import STYLES
+from .RenderCache import RenderCache
+from .RenderArtifactManager import RenderArtifactManager
\ No newline at end of file
@@ -1,7 +1,8 @@
-from ._sanitizeFilename import sanitize_filename, sanitize_filename_async
+from ._sanitizeFilename import sanitize_filename, sanitize_filename_async, sanitize_filename_cached
 from . import _charset as charset
 
 __all__ = [
-    'sanitize_filename'
-    'sanitize_filename_async'
+    'sanitize_filename',
+    'sanitize_filename_async',
+    'sanitize_filename_cached'
 ]
\ No newline at end of file
@@ -1,6 +1,7 @@
 import asyncio
 import hashlib
 import os
+from functools import lru_cache
 from ._charset import DEFAULT_INVALID_CHARS
 
 def sanitize_filename(
@@ -67,6 +68,16 @@ async def sanitize_filename_async(
     """
     return await asyncio.to_thread(sanitize_filename, filename, prefix, max_length)
 
+@lru_cache(maxsize = 65536)
+def sanitize_filename_cached(filename: str) -> str:
+    """
+    带缓存的sanitize_filename (使用默认参数)。
+
+    用户ID等会反复出现的短字符串直接在调用处同步转义，
+    避免为微秒级的工作切换到线程池。
+    """
+    return sanitize_filename(filename)
+
 # 示例用法
 if __name__ == "__main__":
     # 测试文件名转义和缩短
@@ -1,2 +1,2 @@
 from ._is_validate_path import validate_path
-from ._SanitizeFilename import sanitize_filename, sanitize_filename_async, charset as Invalid_chars
\ No newline at end of file
+from ._SanitizeFilename import sanitize_filename, sanitize_filename_async, sanitize_filename_cached, charset as Invalid_chars
\ No newline at end of file
@@ -0,0 +1,9 @@
+from ._runner import LoadTestConfig, run_load_test, summarize
+from ._cpu import process_cpu_seconds
+
+__all__ = [
+    "LoadTestConfig",
+    "run_load_test",
+    "summarize",
+    "process_cpu_seconds",
+]
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+对运行中的服务执行端到端负载测试，并将结果保存为JSON
+
+    python -m benchmarks.loadtest --target http://127.0.0.1:8080 --users 100 --server-pid 12345 \
+        --mock-url http://127.0.0.1:9000
+
+结果文件以版本标签与时间命名，便于跨版本比较
+"""
+# ==== 标准库 ==== #
+import time
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+from dataclasses import fields
+
+# ==== 第三方库 ==== #
+import httpx
+import orjson
+
+# ==== 自定义库 ==== #
+from ._runner import LoadTestConfig, run_load_test
+
+def _git_label() -> str:
+    """以当前提交作为默认版本标签"""
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output = True, text = True, check = True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def _fetch_mock_settings(mock_url: str) -> dict | None:
+    """记录模拟供应商的设置，使结果可复现"""
+    try:
+        return httpx.get(f"{mock_url.rstrip('/')}/mock/settings", timeout = 5).json()
+    except httpx.HTTPError:
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = "端到端负载测试")
+    defaults = LoadTestConfig()
+    for field in fields(LoadTestConfig):
+        option = "--" + field.name.replace("_", "-")
+        default = getattr(defaults, field.name)
+        if isinstance(default, bool):
+            parser.add_argument(option, action = argparse.BooleanOptionalAction, default = default)
+        elif default is None:
+            parser.add_argument(option, type = str if field.name == "model_type" else int, default = None)
+        else:
+            parser.add_argument(option, type = type(default), default = default)
+    parser.add_argument("--label", default = None, help = "版本标签，默认为 git describe 的结果")
+    parser.add_argument("--mock-url", default = None, help = "模拟供应商地址，用于记录其设置")
+    parser.add_argument("--output-dir", default = "./benchmarks/results", help = "结果保存目录")
+    args = parser.parse_args()
+
+    config = LoadTestConfig(**{field.name: getattr(args, field.name) for field in fields(LoadTestConfig)})
+    label = args.label or _git_label()
+
+    result = asyncio.run(run_load_test(config))
+    result["label"] = label
+    result["timestamp"] = time.time()
+    if args.mock_url:
+        result["mock_settings"] = _fetch_mock_settings(args.mock_url)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents = True, exist_ok = True)
+    output_path = output_dir / f"loadtest-{label}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output_path.write_bytes(orjson.dumps(result, option = orjson.OPT_INDENT_2))
+
+    summary = result["summary"]
+    latency = summary["latency_ms"]
+    print(f"requests: {summary['requests']} ({summary['failed']} failed)  {summary['requests_per_sec']:.2f} req/s")
+    print(f"latency ms: p50 {latency['p50']:.1f}  p95 {latency['p95']:.1f}  p99 {latency['p99']:.1f}  max {latency['max']:.1f}")
+    if summary["server_cpu_ms_per_request"] is not None:
+        print(f"server cpu: {summary['server_cpu_ms_per_request']:.2f} ms/request")
+    for error, count in result["errors"].items():
+        print(f"  {count} x {error}")
+    print(f"saved to {output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import os
+
+# psutil 为可选依赖，未安装时在Linux上读取 /proc
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def process_cpu_seconds(pid: int) -> float | None:
+    """
+    获取进程累计占用的CPU时间 (用户态+内核态)
+
+    :param pid: 进程ID
+    :return: CPU秒数，无法获取时返回None
+    """
+    if psutil is not None:
+        try:
+            times = psutil.Process(pid).cpu_times()
+        except psutil.Error:
+            return None
+        return times.user + times.system
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # 进程名可能包含空格，从最后一个右括号之后开始解析
+    parts = stat[stat.rindex(b")") + 2:].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    return (int(parts[11]) + int(parts[12])) / ticks
@@ -0,0 +1,171 @@
+"""
+端到端负载生成器
+
+模拟大量私聊用户与群聊 (多名成员共用同一个会话ID) 并发调用 /chat/completion，
+统计延迟分布、吞吐量以及服务进程的单请求CPU开销
+"""
+# ==== 标准库 ==== #
+import time
+import random
+import asyncio
+from dataclasses import dataclass, asdict, field
+from typing import Any
+
+# ==== 第三方库 ==== #
+import httpx
+
+# ==== 自定义库 ==== #
+from ._cpu import process_cpu_seconds
+
+@dataclass
+class LoadTestConfig:
+    # 服务地址
+    target: str = "http://127.0.0.1:8080"
+    # 私聊用户数
+    users: int = 50
+    # 群聊数
+    groups: int = 5
+    # 每个群聊的发言成员数
+    group_members: int = 5
+    # 每个成员发送的消息数
+    requests_per_user: int = 5
+    # 最大同时进行的请求数
+    concurrency: int = 64
+    # 同一成员两次发送之间的等待时间 (秒)
+    think_time: float = 0.0
+    # 消息长度 (字符)
+    message_length: int = 80
+    # 使用的模型类型，为None时使用服务默认值
+    model_type: str | None = None
+    # 是否保存上下文
+    save_context: bool = True
+    # 单个请求超时 (秒)
+    timeout: float = 120.0
+    # 服务进程ID，用于统计CPU开销
+    server_pid: int | None = None
+    # 会话ID前缀，避免与真实用户数据混淆
+    user_prefix: str = "loadtest"
+    seed: int | None = None
+
+@dataclass
+class _Sample:
+    latency: float
+    status: int
+    session: str
+    error: str | None = None
+
+@dataclass
+class _State:
+    samples: list[_Sample] = field(default_factory = list)
+
+def _percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    index = min(int(round(p * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+def summarize(samples: list[_Sample], elapsed: float, cpu_seconds: float | None) -> dict[str, Any]:
+    """
+    汇总负载测试结果
+
+    :param samples: 所有请求的采样
+    :param elapsed: 总耗时 (秒)
+    :param cpu_seconds: 服务进程在测试期间占用的CPU时间
+    :return: 统计结果
+    """
+    ok = sorted(s.latency for s in samples if s.error is None)
+    status_codes: dict[str, int] = {}
+    for sample in samples:
+        key = str(sample.status)
+        status_codes[key] = status_codes.get(key, 0) + 1
+    completed = len(samples)
+    return {
+        "requests": completed,
+        "succeeded": len(ok),
+        "failed": completed - len(ok),
+        "error_rate": (completed - len(ok)) / completed if completed else 0.0,
+        "elapsed_sec": elapsed,
+        "requests_per_sec": len(ok) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": sum(ok) / len(ok) * 1000 if ok else 0.0,
+            "p50": _percentile(ok, 0.50) * 1000,
+            "p95": _percentile(ok, 0.95) * 1000,
+            "p99": _percentile(ok, 0.99) * 1000,
+            "max": ok[-1] * 1000 if ok else 0.0,
+        },
+        "server_cpu_sec": cpu_seconds,
+        "server_cpu_ms_per_request": cpu_seconds / completed * 1000 if cpu_seconds is not None and completed else None,
+        "status_codes": status_codes,
+    }
+
+async def _member(
+        client: httpx.AsyncClient,
+        config: LoadTestConfig,
+        semaphore: asyncio.Semaphore,
+        state: _State,
+        rng: random.Random,
+        session: str,
+        user_name: str,
+    ) -> None:
+    """单个发言者按顺序发送消息"""
+    for turn in range(config.requests_per_user):
+        message = f"[{user_name} #{turn}] " + "".join(rng.choice("复读机负载测试abcdefgh ") for _ in range(config.message_length))
+        data = {
+            "message": message,
+            "user_name": user_name,
+            "save_context": str(config.save_context).lower(),
+        }
+        if config.model_type:
+            data["model_type"] = config.model_type
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"/chat/completion/{session}", data = data)
+                error = None if response.status_code == 200 else response.text[:200]
+                status = response.status_code
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+                status = 0
+            state.samples.append(_Sample(time.perf_counter() - start, status, session, error))
+        if config.think_time > 0:
+            await asyncio.sleep(config.think_time)
+
+async def run_load_test(config: LoadTestConfig) -> dict[str, Any]:
+    """
+    执行负载测试
+
+    :param config: 测试配置
+    :return: 包含配置与统计结果的字典
+    """
+    rng = random.Random(config.seed)
+    state = _State()
+    semaphore = asyncio.Semaphore(config.concurrency)
+    limits = httpx.Limits(max_connections = config.concurrency, max_keepalive_connections = config.concurrency)
+
+    async with httpx.AsyncClient(base_url = config.target, timeout = config.timeout, limits = limits) as client:
+        members = []
+        for i in range(config.users):
+            members.append((f"{config.user_prefix}_user_{i}", f"user_{i}"))
+        for g in range(config.groups):
+            for m in range(config.group_members):
+                members.append((f"{config.user_prefix}_group_{g}", f"group_{g}_member_{m}"))
+
+        cpu_start = process_cpu_seconds(config.server_pid) if config.server_pid else None
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _member(client, config, semaphore, state, random.Random(rng.random()), session, user_name)
+            for session, user_name in members
+        ))
+        elapsed = time.perf_counter() - start
+        cpu_end = process_cpu_seconds(config.server_pid) if config.server_pid else None
+
+    cpu_seconds = cpu_end - cpu_start if cpu_start is not None and cpu_end is not None else None
+    errors: dict[str, int] = {}
+    for sample in state.samples:
+        if sample.error is not None:
+            errors[sample.error] = errors.get(sample.error, 0) + 1
+    return {
+        "config": asdict(config),
+        "summary": summarize(state.samples, elapsed, cpu_seconds),
+        "errors": dict(sorted(errors.items(), key = lambda item: -item[1])[:20]),
+    }
@@ -0,0 +1,8 @@
+from ._measure import MEASUREMENTS, Measurement, measurement, measure
+
+__all__ = [
+    "MEASUREMENTS",
+    "Measurement",
+    "measurement",
+    "measure",
+]
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+测量常驻对象的内存占用
+
+    python -m benchmarks.memory --save before.json
+    python -m benchmarks.memory --baseline before.json
+"""
+# ==== 标准库 ==== #
+import re
+import sys
+import time
+import argparse
+import platform
+from pathlib import Path
+
+# ==== 第三方库 ==== #
+import orjson
+
+# ==== 自定义库 ==== #
+from ._measure import MEASUREMENTS, measure
+
+def _format_bytes(size: float) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.2f} MiB"
+    if size >= 1024:
+        return f"{size / 1024:.2f} KiB"
+    return f"{size:.0f} B"
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = "常驻对象内存占用测量")
+    parser.add_argument("--filter", default = None, help = "只运行名称匹配该正则的测量项")
+    parser.add_argument("--save", default = None, help = "将结果保存为JSON (可作为基线)")
+    parser.add_argument("--baseline", default = None, help = "与指定的基线结果比较")
+    args = parser.parse_args()
+
+    pattern = re.compile(args.filter) if args.filter else None
+    results = {}
+    for name, item in MEASUREMENTS.items():
+        if pattern is not None and not pattern.search(name):
+            continue
+        stats = measure(item)
+        results[name] = stats
+        print(f"{name:<36} {_format_bytes(stats['bytes_per_item']):>12} / {item.unit}  (x{stats['count']})")
+
+    if args.save:
+        Path(args.save).write_bytes(orjson.dumps({
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }, option = orjson.OPT_INDENT_2))
+
+    if args.baseline:
+        baseline = orjson.loads(Path(args.baseline).read_bytes())["results"]
+        print()
+        for name, stats in results.items():
+            base = baseline.get(name)
+            if base is None:
+                print(f"{name:<36} {'(no baseline)':>12}")
+                continue
+            change = stats["bytes_per_item"] / base["bytes_per_item"] - 1
+            print(
+                f"{name:<36} {_format_bytes(base['bytes_per_item']):>12} -> {_format_bytes(stats['bytes_per_item']):>12}"
+                f"  {change:+.1%}"
+            )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
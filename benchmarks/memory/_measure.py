@@ -0,0 +1,122 @@
+"""
+常驻对象的内存占用测量
+"""
+import gc
+import random
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import orjson
+
+from ..micro._fixtures import make_context
+
+# 测量函数返回 (需要保持存活的对象, 对象数量)
+Build = Callable[[], tuple[Any, int]]
+
+@dataclass
+class Measurement:
+    name: str
+    build: Build
+    unit: str
+
+# 名称 -> 测量项
+MEASUREMENTS: dict[str, Measurement] = {}
+
+def measurement(name: str, unit: str) -> Callable[[Build], Build]:
+    """
+    注册测量项
+
+    :param name: 名称
+    :param unit: 计数单位 (用于输出)
+    """
+    def decorator(build: Build) -> Build:
+        MEASUREMENTS[name] = Measurement(name, build, unit)
+        return build
+    return decorator
+
+def measure(item: Measurement) -> dict[str, float]:
+    """
+    测量构建出的对象在存活期间占用的内存
+
+    :param item: 测量项
+    :return: 总字节数、对象数量与单个对象的字节数
+    """
+    # 预先构建一次，排除模块导入与各类缓存的占用
+    item.build()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects, count = item.build()
+        gc.collect()
+        total = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del objects
+    return {
+        "total_bytes": total,
+        "count": count,
+        "bytes_per_item": total / count,
+    }
+
+# region Context
+@measurement("context.cached_1000_messages", "context")
+def _cached_context():
+    """
+    缓存中完全构建为上下文单元的1000条消息的上下文 (含从存储读取的字符串)
+    """
+    from core.Context import ContextObject
+    data = orjson.dumps(make_context(500))
+    contexts = [ContextObject.from_context(orjson.loads(data), lazy = False) for _ in range(10)]
+    return contexts, len(contexts)
+
+@measurement("context.cached_1000_messages.lazy", "context")
+def _cached_context_lazy():
+    """
+    以原始字典保存的1000条消息的上下文
+    """
+    from core.Context import ContextObject
+    data = orjson.dumps(make_context(500))
+    contexts = [ContextObject.from_context(orjson.loads(data)) for _ in range(10)]
+    return contexts, len(contexts)
+
+@measurement("context.content_unit", "unit")
+def _content_units():
+    from core.Context import ContentUnit, ContextRole
+    units = [
+        ContentUnit(role = ContextRole.ASSISTANT, content = "", reasoning_content = "")
+        for _ in range(10000)
+    ]
+    return units, len(units)
+# endregion
+
+# region CallLog
+@measurement("call_log.buffered", "log")
+def _buffered_call_logs():
+    """
+    缓冲区中等待写入的调用日志，每条日志带有300个chunk耗时
+    """
+    from core.CallLog import CallLog
+    rng = random.Random(0)
+    logs = []
+    for i in range(1000):
+        log = CallLog(
+            id = f"chatcmpl-{i:08d}",
+            url = "https://api.example.com/v1",
+            model = "deepseek-chat",
+            user_id = str(1000000 + i),
+            user_name = "user",
+            chunk_times = [rng.randint(1_000_000, 80_000_000) for _ in range(300)],
+        )
+        logs.append(log)
+    return logs, len(logs)
+# endregion
+
+# region CallAPI
+@measurement("call_api.delta", "delta")
+def _deltas():
+    from core.CallAPI._object import Delta, TokensCount
+    deltas = [Delta(id = "chatcmpl-0", content = "字", token_usage = TokensCount()) for _ in range(10000)]
+    return deltas, len(deltas)
+# endregion
@@ -0,0 +1,11 @@
+from ._harness import BENCHMARKS, Benchmark, benchmark, run_benchmark
+from ._compare import compare
+from . import _suite
+
+__all__ = [
+    "BENCHMARKS",
+    "Benchmark",
+    "benchmark",
+    "run_benchmark",
+    "compare",
+]
\ No newline at end of file
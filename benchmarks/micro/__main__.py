@@ -0,0 +1,79 @@
+"""
+运行热路径微基准测试
+
+    python -m benchmarks.micro --save baseline.json
+    python -m benchmarks.micro --baseline baseline.json --fail-on-regression
+"""
+# ==== 标准库 ==== #
+import re
+import sys
+import time
+import argparse
+import platform
+from pathlib import Path
+
+# ==== 第三方库 ==== #
+import orjson
+
+# ==== 自定义库 ==== #
+from ._harness import BENCHMARKS, run_benchmark
+from ._compare import compare
+from . import _suite
+
+def _format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = "热路径微基准测试")
+    parser.add_argument("--filter", default = None, help = "只运行名称匹配该正则的基准测试")
+    parser.add_argument("--list", action = "store_true", help = "列出所有基准测试")
+    parser.add_argument("--repeat", type = int, default = 5)
+    parser.add_argument("--min-time", type = float, default = 0.2, help = "单轮最短耗时 (秒)")
+    parser.add_argument("--save", default = None, help = "将结果保存为JSON (可作为基线)")
+    parser.add_argument("--baseline", default = None, help = "与指定的基线结果比较")
+    parser.add_argument("--threshold", type = float, default = 0.1, help = "判定为回归的相对变化阈值")
+    parser.add_argument("--fail-on-regression", action = "store_true", help = "存在回归时以非零状态退出")
+    args = parser.parse_args()
+
+    pattern = re.compile(args.filter) if args.filter else None
+    selected = [bench for name, bench in BENCHMARKS.items() if pattern is None or pattern.search(name)]
+    if args.list:
+        for bench in selected:
+            print(bench.name)
+        return 0
+
+    results = {}
+    for bench in selected:
+        stats = run_benchmark(bench, repeat = args.repeat, min_time = args.min_time)
+        results[bench.name] = stats
+        print(f"{bench.name:<36} {_format_ns(stats['median_ns']):>12}  (min {_format_ns(stats['min_ns'])}, x{stats['number']})")
+
+    if args.save:
+        Path(args.save).write_bytes(orjson.dumps({
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }, option = orjson.OPT_INDENT_2))
+
+    regressions = 0
+    if args.baseline:
+        baseline = orjson.loads(Path(args.baseline).read_bytes())["results"]
+        print()
+        for row in compare(results, baseline, threshold = args.threshold):
+            if row["status"] == "new":
+                print(f"{row['name']:<36} {'(no baseline)':>12}")
+                continue
+            print(
+                f"{row['name']:<36} {_format_ns(row['baseline_ns']):>12} -> {_format_ns(row['current_ns']):>12}"
+                f"  {row['change']:+.1%}  {row['status']}"
+            )
+            regressions += row["status"] == "regression"
+    return 1 if regressions and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
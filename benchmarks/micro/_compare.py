@@ -0,0 +1,39 @@
+"""
+与基线结果比较
+"""
+from typing import Any
+
+def compare(
+        results: dict[str, dict[str, float]],
+        baseline: dict[str, dict[str, float]],
+        threshold: float = 0.1,
+    ) -> list[dict[str, Any]]:
+    """
+    比较两次运行的中位数耗时
+
+    :param results: 本次结果
+    :param baseline: 基线结果
+    :param threshold: 判定为回归或改进的相对变化阈值
+    :return: 每个基准测试的比较结果
+    """
+    rows = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append({"name": name, "current_ns": stats["median_ns"], "baseline_ns": None, "change": None, "status": "new"})
+            continue
+        change = stats["median_ns"] / base["median_ns"] - 1
+        if change > threshold:
+            status = "regression"
+        elif change < -threshold:
+            status = "improvement"
+        else:
+            status = "unchanged"
+        rows.append({
+            "name": name,
+            "current_ns": stats["median_ns"],
+            "baseline_ns": base["median_ns"],
+            "change": change,
+            "status": status,
+        })
+    return rows
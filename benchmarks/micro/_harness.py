@@ -0,0 +1,92 @@
+"""
+微基准测试框架
+"""
+import gc
+import time
+import asyncio
+import statistics
+from dataclasses import dataclass
+from typing import Any, Callable
+
+# 基准测试的setup函数返回一个无参可调用对象 (同步函数或协程函数)
+Setup = Callable[[], Callable[[], Any]]
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Setup
+    is_async: bool = False
+
+# 名称 -> 基准测试
+BENCHMARKS: dict[str, Benchmark] = {}
+
+def benchmark(name: str, is_async: bool = False) -> Callable[[Setup], Setup]:
+    """
+    注册基准测试
+
+    :param name: 名称，使用 `模块.操作` 的形式
+    :param is_async: 被测函数是否为协程函数
+    """
+    def decorator(setup: Setup) -> Setup:
+        BENCHMARKS[name] = Benchmark(name, setup, is_async)
+        return setup
+    return decorator
+
+def _timer(func: Callable[[], Any], is_async: bool, loop: asyncio.AbstractEventLoop) -> Callable[[int], float]:
+    """返回一个执行 n 次并返回总耗时 (纳秒) 的函数"""
+    if is_async:
+        async def run_async(n: int) -> int:
+            start = time.perf_counter_ns()
+            for _ in range(n):
+                await func()
+            return time.perf_counter_ns() - start
+        return lambda n: loop.run_until_complete(run_async(n))
+
+    def run(n: int) -> int:
+        start = time.perf_counter_ns()
+        for _ in range(n):
+            func()
+        return time.perf_counter_ns() - start
+    return run
+
+def run_benchmark(bench: Benchmark, repeat: int = 5, min_time: float = 0.2) -> dict[str, float]:
+    """
+    执行单个基准测试
+
+    先自动确定每轮的执行次数，使单轮耗时不少于 min_time，再重复 repeat 轮
+
+    :param bench: 基准测试
+    :param repeat: 轮数
+    :param min_time: 单轮最短耗时 (秒)
+    :return: 单次操作耗时统计 (纳秒)
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        func = bench.setup()
+        timer = _timer(func, bench.is_async, loop)
+
+        # 预热并校准执行次数
+        number = 1
+        while True:
+            elapsed = timer(number)
+            if elapsed >= min_time * 1e9 or number >= 1 << 24:
+                break
+            number = max(number * 2, int(number * min_time * 1e9 / max(elapsed, 1) * 1.1))
+
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            samples = [timer(number) / number for _ in range(repeat)]
+        finally:
+            if gc_enabled:
+                gc.enable()
+    finally:
+        loop.close()
+
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_ns": min(samples),
+        "median_ns": statistics.median(samples),
+        "stdev_ns": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
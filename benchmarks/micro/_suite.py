@@ -0,0 +1,246 @@
+"""
+每条消息都会经过的热路径组件的基准测试
+"""
+import atexit
+import shutil
+import asyncio
+import tempfile
+from pathlib import Path
+
+import orjson
+
+from ConfigManager import ConfigLoader
+from ConfigManager._config_object import ConfigObject
+from PathProcessors import sanitize_filename
+from TextProcessors import limit_blank_lines
+from TimeParser import format_deltatime_ns
+
+from ._harness import benchmark
+from ._fixtures import (
+    make_context,
+    make_preset_prompt,
+    make_prompt_vp,
+    make_nickname_mapping,
+)
+
+_temp_dir: Path | None = None
+
+def _get_temp_dir() -> Path:
+    """所有需要写文件的基准测试共用的临时目录"""
+    global _temp_dir
+    if _temp_dir is None:
+        _temp_dir = Path(tempfile.mkdtemp(prefix = "micro_bench_"))
+        atexit.register(shutil.rmtree, _temp_dir, ignore_errors = True)
+    return _temp_dir
+
+# region PromptVP
+@benchmark("prompt_vp.process")
+def _prompt_vp_process():
+    prompt_vp = make_prompt_vp()
+    prompt = make_preset_prompt()
+    return lambda: prompt_vp.process(prompt)
+# endregion
+
+# region Context
+@benchmark("context.from_context")
+def _context_from_context():
+    from core.Context import ContextObject
+    context = make_context()
+    return lambda: ContextObject.from_context(context)
+
+@benchmark("context.from_context.strict")
+def _context_from_context_strict():
+    from core.Context import ContextObject
+    context = make_context()
+    return lambda: ContextObject.from_context(context, lazy = False)
+
+@benchmark("context.full_context")
+def _context_full_context():
+    from core.Context import ContextObject, ContentUnit, ContextRole
+    context = ContextObject.from_context(make_context())
+    context.prompt = ContentUnit(role = ContextRole.SYSTEM, content = make_preset_prompt())
+    return lambda: context.full_context
+
+@benchmark("content_unit.from_content")
+def _content_unit_from_content():
+    from core.Context import ContentUnit
+    message = {
+        "role": "assistant",
+        "content": "好的，我来查询一下。",
+        "reasoning_content": "用户想知道天气，需要调用工具。",
+        "name": "复读机",
+    }
+    return lambda: ContentUnit.from_content(message)
+# endregion
+
+# region 流式响应解码
+def _record_stream() -> list[bytes]:
+    from ._fixtures import make_sse_stream, split_blocks
+    return split_blocks(make_sse_stream())
+
+@benchmark("call_api.decode_stream.sdk")
+def _decode_stream_sdk():
+    """解码SDK已经构建好的响应块 (不含SDK自身的解析开销)"""
+    from openai._models import construct_type
+    from openai.types.chat import ChatCompletionChunk
+    from core.CallAPI import decode_chunk
+    data = b"".join(_record_stream())
+    chunks = [
+        construct_type(type_ = ChatCompletionChunk, value = orjson.loads(line[6:]))
+        for line in data.split(b"\n\n") if line.startswith(b"data: {")
+    ]
+    return lambda: [decode_chunk(chunk) for chunk in chunks]
+
+@benchmark("call_api.parse_stream.sdk")
+def _parse_stream_sdk():
+    """SDK从响应体构建响应块的开销"""
+    from openai._models import construct_type
+    from openai.types.chat import ChatCompletionChunk
+    data = b"".join(_record_stream())
+    return lambda: [
+        construct_type(type_ = ChatCompletionChunk, value = orjson.loads(line[6:]))
+        for line in data.split(b"\n\n") if line.startswith(b"data: {")
+    ]
+
+@benchmark("call_api.decode_stream.raw", is_async = True)
+def _decode_stream_raw():
+    """原始SSE模式：从响应体字节流解析并解码全部响应块"""
+    from core.CallAPI import decode_chunk_dict, iter_sse_json
+    blocks = _record_stream()
+
+    async def stream():
+        for block in blocks:
+            yield block
+
+    async def run():
+        source = stream()
+        try:
+            return [decode_chunk_dict(chunk) async for chunk in iter_sse_json(source)]
+        finally:
+            await source.aclose()
+    return run
+
+@benchmark("call_api.assemble_stream")
+def _assemble_stream():
+    """组装20000个推理与正文片段"""
+    from core.CallAPI import Delta, StreamAssembler
+    deltas = [Delta(reasoning_content = "推理片段") for _ in range(15000)]
+    deltas += [Delta(content = "正文片段") for _ in range(5000)]
+
+    def run():
+        assembler = StreamAssembler()
+        for delta in deltas:
+            assembler.feed(delta)
+        return assembler.snapshot()
+    return run
+# endregion
+
+# region SubManager
+def _make_sub_manager():
+    from core.DataManager.UserDataManager.SubManager import SubManager
+    return SubManager(_get_temp_dir() / "sub_manager" / "1234567890", sub_dir_name = "ParallelData")
+
+@benchmark("sub_manager.save", is_async = True)
+def _sub_manager_save():
+    manager = _make_sub_manager()
+    context = make_context()
+    return lambda: manager.save("default", context)
+
+@benchmark("sub_manager.load", is_async = True)
+def _sub_manager_load():
+    manager = _make_sub_manager()
+    asyncio.run(manager.save("default", make_context()))
+    return lambda: manager.load("default")
+
+def _make_concurrent_save(durability: str):
+    """64个会话同时保存 (模拟负载下各用户的写入)"""
+    manager = _make_sub_manager()
+    manager.durability = durability
+    context = make_context(turns = 20)
+
+    async def run():
+        await asyncio.gather(*(manager.save(f"session_{i}", context) for i in range(64)))
+    return run
+
+@benchmark("sub_manager.save_concurrent.none", is_async = True)
+def _sub_manager_save_concurrent_none():
+    return _make_concurrent_save("none")
+
+@benchmark("sub_manager.save_concurrent.fdatasync", is_async = True)
+def _sub_manager_save_concurrent_fdatasync():
+    return _make_concurrent_save("fdatasync")
+
+@benchmark("sub_manager.save_concurrent.group_commit", is_async = True)
+def _sub_manager_save_concurrent_group_commit():
+    return _make_concurrent_save("group_commit")
+
+@benchmark("sub_manager.fork", is_async = True)
+def _sub_manager_fork():
+    """从5000轮 (10000条消息) 的分支分叉，与读写整个历史记录的 save/load 对比"""
+    manager = _make_sub_manager()
+    asyncio.run(manager.save("long", make_context(turns = 5000)))
+    return lambda: manager.fork("long", "forked")
+# endregion
+
+# region MainManager
+@benchmark("main_manager.get_default_item_id", is_async = True)
+def _main_manager_get_default_item_id():
+    """已知用户的元数据读取 (包含获取子管理器的开销)"""
+    ConfigLoader().add_config("User_Data_Dir", _get_temp_dir() / "main_manager")
+    from core.DataManager.UserDataManager import MainManager
+    manager = MainManager("Benchmark")
+    asyncio.run(manager.set_default_item_id("1234567890", "default"))
+    return lambda: manager.get_default_item_id("1234567890")
+# endregion
+
+# region ConfigObject
+@benchmark("config_object.get_value.int")
+def _config_get_value_int():
+    config = ConfigObject("max_concurrency")
+    config.value = 1000
+    return lambda: config.get_value(int)
+
+@benchmark("config_object.get_value.path")
+def _config_get_value_path():
+    config = ConfigObject("user_data_dir")
+    config.value = "./data/userdata"
+    return lambda: config.get_value(Path)
+
+@benchmark("config_object.get_value.optional")
+def _config_get_value_optional():
+    config = ConfigObject("default_max_tokens")
+    config.value = None
+    return lambda: config.get_value((int, None))
+# endregion
+
+# region 文本与时间
+@benchmark("sanitize_filename.user_id")
+def _sanitize_user_id():
+    return lambda: sanitize_filename("1234567890")
+
+@benchmark("sanitize_filename.unsafe")
+def _sanitize_unsafe():
+    return lambda: sanitize_filename("../群聊:测试*用户?|<名称>.json")
+
+@benchmark("limit_blank_lines")
+def _limit_blank_lines():
+    prompt = make_preset_prompt()
+    return lambda: limit_blank_lines(prompt)
+
+@benchmark("format_deltatime_ns")
+def _format_deltatime_ns():
+    return lambda: format_deltatime_ns(93_784_123_456_789, '%H:%M:%S.%f.%u.%n')
+# endregion
+
+# region 昵称映射
+@benchmark("core.load_nickname_mapping", is_async = True)
+def _load_nickname_mapping():
+    from core import Core
+    mapping = make_nickname_mapping()
+    path = _get_temp_dir() / "user_nickname_mapping.json"
+    path.write_bytes(orjson.dumps(mapping))
+    ConfigLoader().add_config("user_nickname_mapping_file_path", path)
+    user_id = next(key for key in mapping if key.isdigit())
+    # 该方法不访问实例状态，无需构造完整的 Core
+    return lambda: Core.load_nickname_mapping(None, user_id, "未映射的用户名")
+# endregion
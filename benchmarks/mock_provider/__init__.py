@@ -0,0 +1,8 @@
+from ._settings import MockSettings
+from ._app import MockProvider, create_app
+
+__all__ = [
+    "MockSettings",
+    "MockProvider",
+    "create_app",
+]
\ No newline at end of file
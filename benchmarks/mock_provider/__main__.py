@@ -0,0 +1,37 @@
+"""
+启动模拟供应商
+
+    python -m benchmarks.mock_provider --port 9000 --ttft 0.2 --tokens-per-sec 80
+
+在 api_info.json 中将 URL 指向 http://127.0.0.1:9000/v1 即可让服务调用模拟供应商，
+将 FUNCER_URL 设置为 http://127.0.0.1:9000 即可使用模拟的Funcer服务器测试工具循环
+"""
+import argparse
+from dataclasses import fields
+
+import uvicorn
+
+from ._settings import MockSettings
+from ._app import create_app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = "OpenAI兼容的模拟供应商")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 9000)
+    defaults = MockSettings()
+    for field in fields(MockSettings):
+        option = "--" + field.name.replace("_", "-")
+        default = getattr(defaults, field.name)
+        if isinstance(default, bool):
+            parser.add_argument(option, action = argparse.BooleanOptionalAction, default = default)
+        elif field.name == "seed":
+            parser.add_argument(option, type = int, default = default)
+        else:
+            parser.add_argument(option, type = type(default), default = default)
+    args = parser.parse_args()
+
+    settings = MockSettings(**{field.name: getattr(args, field.name) for field in fields(MockSettings)})
+    uvicorn.run(create_app(settings), host = args.host, port = args.port, log_level = "warning")
+
+if __name__ == "__main__":
+    main()
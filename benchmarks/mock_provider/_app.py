@@ -0,0 +1,278 @@
+"""
+OpenAI兼容的模拟供应商
+
+实现 /v1/chat/completions (流式与非流式) 与 /v1/models，按 MockSettings 控制延迟、
+生成速度、推理内容、工具调用、usage与错误注入，不消耗真实token。
+同时实现Funcer服务器的 /funcer/functions 与 /funcer/call/{name}，用于测试工具循环
+"""
+# ==== 标准库 ==== #
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator
+
+# ==== 第三方库 ==== #
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+# ==== 自定义库 ==== #
+from ._settings import MockSettings
+
+_WORDS = (
+    "复读机", "正在", "模拟", "一段", "回复", "the", "quick", "brown", "fox", "jumps",
+    "over", "lazy", "dog", "，", "。", "benchmark", "token", "stream", "latency", "测试",
+)
+
+def _estimate_prompt_tokens(messages: list[dict[str, Any]]) -> int:
+    """粗略估算提示词token数 (约4字符一个token)"""
+    length = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            length += len(content)
+    return max(length // 4, 1)
+
+class MockProvider:
+    def __init__(self, settings: MockSettings | None = None):
+        self.settings = settings or MockSettings()
+        self.random = random.Random(self.settings.seed)
+        self.requests: int = 0
+        self.errors: int = 0
+        self.function_calls: int = 0
+        # 见过的消息前缀的摘要 (模拟上下文缓存)
+        self._prefixes: OrderedDict[bytes, None] = OrderedDict()
+
+    def _cached_prefix(self, messages: list[dict[str, Any]]) -> int:
+        """返回与之前请求相同的最长消息前缀长度，并记录本次请求的所有前缀"""
+        digest = hashlib.blake2b(digest_size = 16)
+        hit = 0
+        for index, message in enumerate(messages):
+            digest.update(orjson.dumps(message, option = orjson.OPT_SORT_KEYS))
+            key = digest.copy().digest()
+            if key in self._prefixes:
+                self._prefixes.move_to_end(key)
+                if hit == index:
+                    hit = index + 1
+            else:
+                self._prefixes[key] = None
+        while len(self._prefixes) > 100000:
+            self._prefixes.popitem(last = False)
+        return hit
+
+    def _usage(self, messages: list[dict[str, Any]]) -> dict[str, int]:
+        settings = self.settings
+        prompt_tokens = _estimate_prompt_tokens(messages)
+        completion_tokens = settings.completion_tokens + settings.reasoning_tokens
+        if settings.prefix_cache:
+            cached = self._cached_prefix(messages)
+            cache_hit = min(_estimate_prompt_tokens(messages[:cached]), prompt_tokens) if cached else 0
+        else:
+            cache_hit = int(prompt_tokens * settings.prompt_cache_hit_ratio)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_cache_hit_tokens": cache_hit,
+            "prompt_cache_miss_tokens": prompt_tokens - cache_hit,
+        }
+
+    def _tool_calls(self, body: dict[str, Any]) -> list[dict[str, Any]]:
+        """
+        生成工具调用
+
+        请求带 tools 时像真实模型一样只调用提供的工具，tool_choice 为 none 或最后一条消息是工具结果时不调用
+        """
+        tools = body.get("tools")
+        if tools:
+            messages = body.get("messages") or [{}]
+            if body.get("tool_choice") == "none" or messages[-1].get("role") == "tool":
+                return []
+            names = [tool["function"]["name"] for tool in tools[:self.settings.tool_calls]]
+        else:
+            names = [f"mock_tool_{i}" for i in range(self.settings.tool_calls)]
+        return [
+            {
+                "index": i,
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": name, "arguments": orjson.dumps({"index": i}).decode()},
+            }
+            for i, name in enumerate(names)
+        ]
+
+    def functions(self) -> list[dict[str, Any]]:
+        """Funcer服务器的函数列表"""
+        return [
+            {
+                "name": f"mock_tool_{i}",
+                "description": f"Mock tool {i}",
+                "parameters": {"index": {"name": "index", "type": "int", "value": None}},
+                "return_type": "str",
+                "timeout": 5,
+            }
+            for i in range(max(self.settings.tool_calls, 1))
+        ]
+
+    async def call_function(self, name: str, body: dict[str, Any]) -> dict[str, Any]:
+        """执行Funcer函数"""
+        self.function_calls += 1
+        await asyncio.sleep(self.settings.tool_latency)
+        index = body.get("parameters", {}).get("index", {}).get("value")
+        return {"name": name, "return_type": "str", "return_value": f"{name} result {index}"}
+
+    def _tokens(self, count: int) -> list[str]:
+        return [self.random.choice(_WORDS) for _ in range(count)]
+
+    def _should_fail(self) -> bool:
+        return self.settings.error_rate > 0 and self.random.random() < self.settings.error_rate
+
+    def error_response(self) -> JSONResponse:
+        self.errors += 1
+        return JSONResponse(
+            status_code = self.settings.error_status,
+            content = {"error": {"message": "Injected error", "type": "mock_error", "code": self.settings.error_status}},
+        )
+
+    async def _pace(self, started: float, emitted: int) -> None:
+        """按生成速度等待到第 emitted 个token的发送时间"""
+        if self.settings.tokens_per_sec <= 0:
+            return
+        target = started + emitted / self.settings.tokens_per_sec
+        delay = target - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def complete(self, body: dict[str, Any]) -> Response:
+        """非流式响应"""
+        self.requests += 1
+        if self._should_fail():
+            return self.error_response()
+        settings = self.settings
+        await asyncio.sleep(settings.ttft)
+        if settings.tokens_per_sec > 0:
+            await asyncio.sleep((settings.completion_tokens + settings.reasoning_tokens) / settings.tokens_per_sec)
+
+        message: dict[str, Any] = {"role": "assistant", "content": "".join(self._tokens(settings.completion_tokens))}
+        if settings.reasoning_tokens:
+            message["reasoning_content"] = "".join(self._tokens(settings.reasoning_tokens))
+        tool_calls = self._tool_calls(body)
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        data = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "system_fingerprint": "fp_mock",
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }],
+            "usage": self._usage(body.get("messages", [])),
+        }
+        return Response(content = orjson.dumps(data), media_type = "application/json")
+
+    async def stream(self, body: dict[str, Any]) -> AsyncIterator[bytes]:
+        """流式响应 (SSE)"""
+        settings = self.settings
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "mock")
+        abort_at = None
+        if settings.stream_abort_rate > 0 and self.random.random() < settings.stream_abort_rate:
+            abort_at = self.random.randint(0, max(settings.completion_tokens - 1, 0))
+
+        def chunk(delta: dict[str, Any], finish_reason: str | None = None, usage: dict | None = None) -> bytes:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "system_fingerprint": "fp_mock",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage is not None:
+                data["usage"] = usage
+            return b"data: " + orjson.dumps(data) + b"\n\n"
+
+        await asyncio.sleep(settings.ttft)
+        started = time.perf_counter()
+        emitted = 0
+        yield chunk({"role": "assistant", "content": ""})
+
+        for token in self._tokens(settings.reasoning_tokens):
+            await self._pace(started, emitted)
+            emitted += 1
+            yield chunk({"reasoning_content": token})
+
+        for i, token in enumerate(self._tokens(settings.completion_tokens)):
+            if abort_at is not None and i >= abort_at:
+                self.errors += 1
+                # 模拟连接中断
+                raise ConnectionResetError("Injected stream abort")
+            await self._pace(started, emitted)
+            emitted += 1
+            yield chunk({"content": token})
+
+        # 与部分供应商一样，所有工具调用放在同一个chunk中
+        tool_calls = self._tool_calls(body)
+        if tool_calls:
+            yield chunk({"tool_calls": tool_calls})
+
+        finish_reason = "tool_calls" if tool_calls else "stop"
+        usage = self._usage(body.get("messages", [])) if settings.include_usage else None
+        yield chunk({}, finish_reason = finish_reason, usage = usage)
+        yield b"data: [DONE]\n\n"
+
+def create_app(settings: MockSettings | None = None) -> FastAPI:
+    """
+    创建模拟供应商应用
+
+    :param settings: 初始设置，可在运行时通过 /mock/settings 修改
+    :return: FastAPI应用
+    """
+    provider = MockProvider(settings)
+    app = FastAPI(title = "Mock OpenAI Provider")
+    app.state.provider = provider
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = orjson.loads(await request.body())
+        if not body.get("stream"):
+            return await provider.complete(body)
+        provider.requests += 1
+        if provider._should_fail():
+            return provider.error_response()
+        return StreamingResponse(provider.stream(body), media_type = "text/event-stream")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/mock/settings")
+    async def get_settings():
+        return provider.settings.as_dict()
+
+    @app.post("/mock/settings")
+    async def set_settings(request: Request):
+        provider.settings.update(orjson.loads(await request.body()))
+        return provider.settings.as_dict()
+
+    @app.get("/mock/stats")
+    async def stats():
+        return {"requests": provider.requests, "errors": provider.errors, "function_calls": provider.function_calls}
+
+    @app.get("/funcer/functions")
+    async def funcer_functions():
+        return provider.functions()
+
+    @app.post("/funcer/call/{name}")
+    async def funcer_call(name: str, request: Request):
+        return await provider.call_function(name, orjson.loads(await request.body()))
+
+    return app
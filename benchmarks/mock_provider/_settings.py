@@ -0,0 +1,48 @@
+from dataclasses import dataclass, fields, asdict
+from typing import Any
+
+@dataclass
+class MockSettings:
+    """
+    模拟供应商的响应行为
+    """
+    # 首个token延迟 (秒)
+    ttft: float = 0.3
+    # 生成速度 (token/秒)，为0时不限速
+    tokens_per_sec: float = 50.0
+    # 每次响应的正文token数
+    completion_tokens: int = 120
+    # 每次响应的推理token数 (reasoning_content)
+    reasoning_tokens: int = 0
+    # 每次响应附带的工具调用数 (请求带 tools 时调用其中的前几个，工具结果之后的响应不再调用)
+    tool_calls: int = 0
+    # 模拟Funcer服务器执行一个函数的耗时 (秒)
+    tool_latency: float = 0.05
+    # 流式响应是否在最后一个chunk中附带usage
+    include_usage: bool = True
+    # 上报为缓存命中的提示词token比例
+    prompt_cache_hit_ratio: float = 0.5
+    # 模拟按前缀匹配的上下文缓存：命中部分为与之前请求相同的最长消息前缀 (启用时忽略 prompt_cache_hit_ratio)
+    prefix_cache: bool = False
+    # 请求直接返回错误的概率
+    error_rate: float = 0.0
+    # 注入错误时的HTTP状态码
+    error_status: int = 500
+    # 流式响应中途断开的概率
+    stream_abort_rate: float = 0.0
+    # 随机数种子，为None时不固定
+    seed: int | None = None
+
+    def update(self, values: dict[str, Any]) -> None:
+        """
+        按字段名更新设置，忽略未知字段
+
+        :param values: 字段名 -> 新值
+        """
+        names = {field.name: field.type for field in fields(self)}
+        for name, value in values.items():
+            if name in names:
+                setattr(self, name, value)
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
@@ -0,0 +1,9 @@
+from .conformance import CHECKS, run_conformance
+from .benchmark import run_benchmark, make_context
+
+__all__ = [
+    "CHECKS",
+    "run_conformance",
+    "run_benchmark",
+    "make_context",
+]
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+运行存储后端一致性检查与基准测试
+
+    python -m benchmarks.storage [--backend sqlite --backend file] [--check-only] [--output result.json]
+"""
+# ==== 标准库 ==== #
+import sys
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+# ==== 第三方库 ==== #
+import orjson
+
+# ==== 自定义库 ==== #
+from ConfigManager import ConfigLoader
+from core.DataManager import get_backend, available_backends
+from core.DataManager.LMDBUserDataManager import LMDBNotInstalledError
+from core.DataManager.SQLiteUserDataManager import close_all_workers
+from .conformance import run_conformance
+from .benchmark import run_benchmark
+
+# 不持久化数据的后端
+_VOLATILE_BACKENDS = {"memory"}
+
+def _configure_paths(root: Path) -> None:
+    """将所有后端的存储位置指向临时目录"""
+    configs = ConfigLoader()
+    configs.add_config("User_Data_Dir", root / "file")
+    configs.add_config("User_Data_SQLite_Path", root / "userdata.sqlite3")
+    configs.add_config("User_Data_LMDB_Path", root / "userdata.lmdb")
+
+async def _run(args: argparse.Namespace) -> int:
+    failed = False
+    report = {}
+    for name in args.backend or available_backends():
+        backend = get_backend(name)
+        factory = lambda base_name: backend(base_name = base_name)
+        try:
+            factory("Probe_UserData")
+        except LMDBNotInstalledError as e:
+            print(f"[{name}] skipped: {e}")
+            continue
+
+        results = await run_conformance(factory, persistent = name not in _VOLATILE_BACKENDS)
+
+        passed = sum(error is None for _, error in results)
+        print(f"[{name}] conformance: {passed}/{len(results)} passed")
+        for check_name, error in results:
+            if error is not None:
+                failed = True
+                print(f"  FAIL {check_name}\n    " + error.replace("\n", "\n    "))
+        report[name] = {"conformance": {check_name: error is None for check_name, error in results}}
+
+        if args.check_only:
+            continue
+        bench = await run_benchmark(
+            factory,
+            users = args.users,
+            rounds = args.rounds,
+            concurrency = args.concurrency,
+            messages = args.messages,
+        )
+        report[name]["benchmark"] = bench
+        for op, stats in bench.items():
+            print(
+                f"  {op:<18} {stats['ops_per_sec']:>10.1f} ops/s"
+                f"  p50 {stats['p50_ms']:>8.3f} ms  p99 {stats['p99_ms']:>8.3f} ms"
+            )
+
+    if args.output:
+        Path(args.output).write_bytes(orjson.dumps(report, option = orjson.OPT_INDENT_2))
+    return 1 if failed else 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = "存储后端一致性检查与基准测试")
+    parser.add_argument("--backend", action = "append", help = "只运行指定后端 (可重复)，默认运行全部已注册后端")
+    parser.add_argument("--check-only", action = "store_true", help = "只运行一致性检查")
+    parser.add_argument("--users", type = int, default = 200)
+    parser.add_argument("--rounds", type = int, default = 5)
+    parser.add_argument("--concurrency", type = int, default = 32)
+    parser.add_argument("--messages", type = int, default = 40, help = "每个上下文的消息数")
+    parser.add_argument("--output", help = "将结果写入JSON文件")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix = "storage_bench_") as root:
+        _configure_paths(Path(root))
+        try:
+            return asyncio.run(_run(args))
+        finally:
+            # 数据库文件位于临时目录中，需在删除目录前关闭
+            close_all_workers()
+
+if __name__ == "__main__":
+    sys.exit(main())
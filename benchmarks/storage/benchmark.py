@@ -0,0 +1,92 @@
+"""
+存储后端基准测试
+"""
+# ==== 标准库 ==== #
+import time
+import asyncio
+import statistics
+from typing import Any, Awaitable, Callable
+
+# ==== 自定义库 ==== #
+from .conformance import ManagerFactory
+
+def make_context(messages: int = 40, length: int = 400) -> list[dict[str, Any]]:
+    """生成接近真实对话的上下文数据"""
+    text = ("这是一段用于测试存储性能的对话内容, with some ASCII mixed in. " * (length // 40 + 1))[:length]
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": text,
+            "reasoning_content": "" if i % 2 == 0 else text[: length // 4],
+            "role_name": "tester",
+            "funcResponse": {},
+        }
+        for i in range(messages)
+    ]
+
+def _summarize(latencies: list[float], elapsed: float) -> dict[str, float]:
+    latencies.sort()
+    def pct(p: float) -> float:
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+    return {
+        "ops": len(latencies),
+        "ops_per_sec": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+    }
+
+async def _measure(op: Callable[[int], Awaitable[Any]], count: int, concurrency: int) -> dict[str, float]:
+    """以指定并发执行 count 次操作并统计延迟"""
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    async def run(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await op(i)
+            latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in range(count)))
+    return _summarize(latencies, time.perf_counter() - start)
+
+async def run_benchmark(
+        factory: ManagerFactory,
+        users: int = 200,
+        rounds: int = 5,
+        concurrency: int = 32,
+        messages: int = 40,
+    ) -> dict[str, dict[str, float]]:
+    """
+    对一个后端执行标准负载
+
+    :param factory: 根据 base_name 创建管理器的函数
+    :param users: 用户数量
+    :param rounds: 每个用户的读写轮数
+    :param concurrency: 并发数
+    :param messages: 每个上下文的消息数
+    :return: 操作名称 -> 统计结果
+    """
+    manager = factory("Benchmark_UserData")
+    context = make_context(messages)
+    count = users * rounds
+
+    results = {}
+    results["save"] = await _measure(lambda i: manager.save(f"user_{i % users}", context), count, concurrency)
+    results["load"] = await _measure(lambda i: manager.load(f"user_{i % users}"), count, concurrency)
+
+    async def load_append_save(i: int) -> None:
+        user_id = f"user_{i % users}"
+        data = await manager.load(user_id, [])
+        data.append(context[i % len(context)])
+        await manager.save(user_id, data)
+    # 同一用户的读改写不能交错，因此按用户数限制并发
+    results["load_append_save"] = await _measure(load_append_save, count, min(concurrency, users))
+
+    async def switch_branch(i: int) -> None:
+        user_id = f"user_{i % users}"
+        await manager.set_default_item_id(user_id, f"branch_{i % 3}")
+        await manager.get_default_item_id(user_id)
+    results["switch_branch"] = await _measure(switch_branch, users, min(concurrency, users))
+
+    results["list_users"] = await _measure(lambda i: manager.get_all_user_id(), rounds, 1)
+    return results
@@ -0,0 +1,165 @@
+"""
+存储后端一致性检查
+
+每个检查都在独立的 base_name 下运行，任何实现了 UserMainManagerInterface 的后端都应全部通过
+"""
+# ==== 标准库 ==== #
+import asyncio
+import traceback
+from typing import Any, Awaitable, Callable
+
+# ==== 自定义库 ==== #
+from core.DataManager import UserMainManagerInterface
+
+ManagerFactory = Callable[[str], UserMainManagerInterface]
+Check = Callable[[ManagerFactory], Awaitable[None]]
+
+# (检查名称, 检查函数, 是否要求持久化)
+CHECKS: list[tuple[str, Check, bool]] = []
+
+def check(persistent: bool = False) -> Callable[[Check], Check]:
+    """注册一个一致性检查"""
+    def decorator(func: Check) -> Check:
+        CHECKS.append((func.__name__, func, persistent))
+        return func
+    return decorator
+
+def expect(actual: Any, expected: Any, what: str) -> None:
+    if actual != expected:
+        raise AssertionError(f"{what}: expected {expected!r}, got {actual!r}")
+
+SAMPLE_DATA = {
+    "history": [
+        {"role": "user", "content": "你好", "reasoning_content": "", "funcResponse": {}},
+        {"role": "assistant", "content": "Hello 👋", "reasoning_content": "...", "funcResponse": {}},
+    ],
+    "nested": {"int": 1, "float": 1.5, "bool": True, "none": None, "list": [1, "a", []]},
+}
+
+@check()
+async def load_missing_returns_default(factory: ManagerFactory) -> None:
+    manager = factory("missing")
+    expect(await manager.load("nobody"), None, "load without default")
+    expect(await manager.load("nobody", []), [], "load with default")
+    expect(await manager.get_default_item_id("nobody"), "default", "default item id")
+
+@check()
+async def save_load_roundtrip(factory: ManagerFactory) -> None:
+    manager = factory("roundtrip")
+    await manager.save("u1", SAMPLE_DATA)
+    expect(await manager.load("u1"), SAMPLE_DATA, "roundtrip")
+    await manager.save("u1", ["overwritten"])
+    expect(await manager.load("u1"), ["overwritten"], "overwrite")
+
+@check()
+async def load_returns_independent_copy(factory: ManagerFactory) -> None:
+    manager = factory("copy")
+    await manager.save("u1", {"list": [1]})
+    loaded = await manager.load("u1")
+    loaded["list"].append(2)
+    expect(await manager.load("u1"), {"list": [1]}, "stored data after mutating a loaded copy")
+
+@check()
+async def branches_are_isolated(factory: ManagerFactory) -> None:
+    manager = factory("branches")
+    await manager.save("u1", "main")
+    await manager.set_default_item_id("u1", "other")
+    expect(await manager.get_default_item_id("u1"), "other", "switched item id")
+    expect(await manager.load("u1", "empty"), "empty", "new branch is empty")
+    await manager.save("u1", "branch")
+    await manager.set_default_item_id("u1", "default")
+    expect(await manager.load("u1"), "main", "original branch")
+    expect(sorted(await manager.get_all_item_id("u1")), ["default", "other"], "item ids")
+
+@check()
+async def delete_removes_current_item(factory: ManagerFactory) -> None:
+    manager = factory("delete")
+    await manager.save("u1", "main")
+    await manager.set_default_item_id("u1", "other")
+    await manager.save("u1", "branch")
+    await manager.delete("u1")
+    expect(await manager.load("u1"), None, "deleted branch")
+    await manager.delete("u1")
+    await manager.set_default_item_id("u1", "default")
+    expect(await manager.load("u1"), "main", "untouched branch")
+
+@check()
+async def batch_item_access(factory: ManagerFactory) -> None:
+    manager = factory("items")
+    await manager.save("u1", "main")
+    await manager.save_items("u1", {"default": SAMPLE_DATA, "other": ["branch"]})
+    expect(await manager.load("u1"), SAMPLE_DATA, "default item overwritten by batch")
+    expect(await manager.load_item("u1", "other"), ["branch"], "batch saved item")
+    expect(await manager.load_item("u1", "missing", "empty"), "empty", "missing item")
+    expect(await manager.get_default_item_id("u1"), "default", "default item id after batch")
+    expect(sorted(await manager.get_all_item_id("u1")), ["default", "other"], "item ids")
+
+@check()
+async def fork_is_copy_on_write(factory: ManagerFactory) -> None:
+    manager = factory("fork")
+    await manager.save("u1", SAMPLE_DATA)
+    await manager.fork_item("u1", "default", "child")
+    expect(await manager.load_item("u1", "child"), SAMPLE_DATA, "forked item")
+    await manager.save("u1", ["parent"])
+    expect(await manager.load_item("u1", "child"), SAMPLE_DATA, "fork after writing the source")
+    await manager.save_items("u1", {"child": ["child"]})
+    expect(await manager.load("u1"), ["parent"], "source after writing the fork")
+    await manager.fork_item("u1", "missing", "child")
+    expect(await manager.load_item("u1", "child"), None, "fork of a missing item")
+    await manager.fork_item("u1", "default", "default")
+    expect(await manager.load("u1"), ["parent"], "fork onto itself")
+
+@check()
+async def list_users(factory: ManagerFactory) -> None:
+    manager = factory("listing")
+    users = {f"user_{i}" for i in range(20)}
+    for user_id in users:
+        await manager.save(user_id, user_id)
+    missing = users - set(await manager.get_all_user_id())
+    expect(missing, set(), "users missing from listing")
+
+@check()
+async def managers_are_isolated(factory: ManagerFactory) -> None:
+    first = factory("isolated_a")
+    second = factory("isolated_b")
+    await first.save("u1", "a")
+    expect(await second.load("u1"), None, "other manager")
+
+@check()
+async def concurrent_saves(factory: ManagerFactory) -> None:
+    manager = factory("concurrent")
+    await asyncio.gather(*(manager.save(f"u{i}", i) for i in range(100)))
+    results = await asyncio.gather(*(manager.load(f"u{i}") for i in range(100)))
+    expect(results, list(range(100)), "concurrently saved values")
+
+@check()
+async def unsafe_user_id(factory: ManagerFactory) -> None:
+    manager = factory("unsafe")
+    await manager.save("../a/b", "value")
+    expect(await manager.load("../a/b"), "value", "sanitized user id roundtrip")
+
+@check(persistent = True)
+async def survives_new_instance(factory: ManagerFactory) -> None:
+    await factory("persist").save("u1", SAMPLE_DATA)
+    manager = factory("persist")
+    expect(await manager.load("u1"), SAMPLE_DATA, "data seen by a new instance")
+
+async def run_conformance(factory: ManagerFactory, persistent: bool = True) -> list[tuple[str, str | None]]:
+    """
+    运行全部一致性检查
+
+    :param factory: 根据 base_name 创建管理器的函数
+    :param persistent: 后端是否持久化，为False时跳过持久化相关检查
+    :return: (检查名称, 错误信息) 列表，通过时错误信息为None
+    """
+    results = []
+    for name, func, needs_persistence in CHECKS:
+        if needs_persistence and not persistent:
+            continue
+        try:
+            await func(factory)
+        except Exception:
+            results.append((name, traceback.format_exc(limit = -1).strip()))
+        else:
+            results.append((name, None))
+    return results
@@ -5,6 +5,20 @@ from ._object import (
     Response,
     Top_Logprob,
     Logprob,
+    ToolCallDelta,
     Delta
 )
+from ._decoder import (
+    decode_chunk,
+    decode_chunk_dict,
+    iter_sse_json
+)
+from ._accumulator import (
+    TextAccumulator,
+    StreamAssembler
+)
+from ._cache import (
+    CompletionCache,
+    CachedCompletion
+)
 from . import _exceptions as Exceptions
\ No newline at end of file
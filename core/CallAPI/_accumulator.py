@@ -0,0 +1,144 @@
+# ==== 自定义库 ==== #
+from ._object import Delta, ToolCallDelta
+from ..Context import (
+    ContentUnit,
+    ContextRole,
+    FunctionResponseUnit,
+    CallingFunctionResponse
+)
+
+class TextAccumulator:
+    """
+    流式文本累加器
+
+    片段先追加到列表中，读取时才拼接，并把拼接结果作为唯一的片段保留，
+    避免逐片段使用 += 拼接字符串带来的重复复制
+    """
+    __slots__ = ("_parts", "_length")
+
+    def __init__(self):
+        self._parts: list[str] = []
+        self._length: int = 0
+
+    def append(self, text: str) -> None:
+        """
+        追加片段
+
+        :param text: 文本片段
+        """
+        self._parts.append(text)
+        self._length += len(text)
+
+    def getvalue(self) -> str:
+        """
+        获取当前的完整文本
+        """
+        parts = self._parts
+        if not parts:
+            return ""
+        if len(parts) > 1:
+            parts[:] = ["".join(parts)]
+        return parts[0]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    def __repr__(self) -> str:
+        return f"<TextAccumulator Parts={len(self._parts)} Length={self._length}>"
+
+class _ToolCallAccumulator:
+    """
+    单个工具调用的累加器 (参数会分散在多个chunk中)
+    """
+    __slots__ = ("id", "type", "name", "arguments")
+
+    def __init__(self):
+        self.id = ""
+        self.type = "function"
+        self.name = ""
+        self.arguments = TextAccumulator()
+
+    def feed(self, tool: ToolCallDelta) -> None:
+        # ID、类型与名称通常只在第一个片段中出现
+        if tool.id:
+            self.id = tool.id
+        if tool.type:
+            self.type = tool.type
+        if tool.name:
+            self.name = tool.name
+        if tool.arguments:
+            self.arguments.append(tool.arguments)
+
+    def build(self) -> FunctionResponseUnit:
+        return FunctionResponseUnit(
+            id = self.id,
+            type = self.type,
+            name = self.name,
+            arguments_str = self.arguments.getvalue(),
+        )
+
+class StreamAssembler:
+    """
+    将流式响应的Delta组装为上下文单元
+
+    在流式处理过程中可以随时调用 snapshot 获取已经收到的部分内容，
+    用于向调用方转发或在流被取消时保存
+    """
+    def __init__(self):
+        self.reasoning_content = TextAccumulator()
+        self.content = TextAccumulator()
+        # 工具调用的序号 -> 累加器 (按首次出现的顺序)
+        self._tool_calls: dict[int, _ToolCallAccumulator] = {}
+        self._last_index: int = -1
+
+    def feed(self, delta: Delta) -> None:
+        """
+        追加一个Delta
+
+        :param delta: 流式响应块
+        """
+        if delta.reasoning_content:
+            self.reasoning_content.append(delta.reasoning_content)
+        if delta.content:
+            self.content.append(delta.content)
+        for tool in delta.tool_calls:
+            index = tool.index
+            if index is None:
+                # 没有序号时，带有ID的片段表示一个新的工具调用，其余片段属于上一个调用
+                index = len(self._tool_calls) if tool.id or not self._tool_calls else self._last_index
+            tool_call = self._tool_calls.get(index)
+            if tool_call is None:
+                tool_call = self._tool_calls[index] = _ToolCallAccumulator()
+            tool_call.feed(tool)
+            self._last_index = index
+
+    @property
+    def has_tool_calls(self) -> bool:
+        return bool(self._tool_calls)
+
+    @property
+    def is_empty(self) -> bool:
+        """
+        是否还没有收到任何内容
+        """
+        return not (self.reasoning_content or self.content or self._tool_calls)
+
+    def snapshot(self) -> ContentUnit:
+        """
+        获取当前已组装的内容
+
+        :return: 助手角色的上下文单元
+        """
+        unit = ContentUnit(
+            role = ContextRole.ASSISTANT,
+            reasoning_content = self.reasoning_content.getvalue(),
+            content = self.content.getvalue(),
+        )
+        if self._tool_calls:
+            unit.funcResponse = CallingFunctionResponse(
+                callingFunctionResponse = [tool_call.build() for tool_call in self._tool_calls.values()]
+            )
+        return unit
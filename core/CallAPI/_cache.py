@@ -0,0 +1,364 @@
+# ==== 标准库 ==== #
+import os
+import time
+import uuid
+import asyncio
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+# ==== 第三方库 ==== #
+import orjson
+from loguru import logger
+
+# ==== 自定义库 ==== #
+from ._object import (
+    Request,
+    Response,
+    Delta,
+    ToolCallDelta,
+    TokensCount
+)
+from ..Context import (
+    ContentUnit,
+    ContextRole,
+    FunctionResponseUnit,
+    CallingFunctionResponse
+)
+from ConfigManager import ConfigLoader
+
+configs = ConfigLoader()
+
+# 参与缓存键计算的请求参数
+_SAMPLING_FIELDS = (
+    "temperature",
+    "top_p",
+    "presence_penalty",
+    "frequency_penalty",
+    "max_tokens",
+    "max_completion_tokens",
+    "stop",
+    "logprobs",
+    "top_logprobs",
+    "tools",
+    "tool_choice",
+)
+
+def _normalize_message(message: dict) -> dict:
+    """去掉值为空的字段，使只差一个空字段的消息得到相同的缓存键"""
+    return {key: value for key, value in message.items() if value not in (None, "", [], {})}
+
+@dataclass(slots=True)
+class CachedCompletion:
+    """
+    缓存的模型响应
+    """
+    id: str = ""
+    model: str = ""
+    created: int = 0
+    finish_reason: str = ""
+    system_fingerprint: str = ""
+    reasoning_content: str = ""
+    content: str = ""
+    # [{"id", "type", "name", "arguments_str"}]
+    tool_calls: list[dict] = field(default_factory=list)
+    # 原始响应的token用量 (仅供查看，重放时不计入用量)
+    token_usage: dict[str, int] = field(default_factory=dict)
+    expires_at: float = 0.0
+
+    @classmethod
+    def from_response(cls, response: Response, ttl: float) -> "CachedCompletion":
+        """
+        从模型响应创建缓存项
+
+        :param response: 模型响应 (最后一条上下文为模型的回复)
+        :param ttl: 有效期 (秒)
+        """
+        unit = response.context.last_content
+        calls = unit.funcResponse.callingFunctionResponse if unit.funcResponse is not None else []
+        return cls(
+            id = response.id,
+            model = response.model,
+            created = response.created,
+            finish_reason = response.finish_reason,
+            system_fingerprint = response.system_fingerprint,
+            reasoning_content = unit.reasoning_content or "",
+            content = unit.content or "",
+            tool_calls = [
+                {"id": call.id, "type": call.type, "name": call.name, "arguments_str": call.arguments_str}
+                for call in calls
+            ],
+            token_usage = response.token_usage.as_dict if response.token_usage is not None else {},
+            expires_at = time.time() + ttl,
+        )
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+    def as_unit(self) -> ContentUnit:
+        """
+        获取缓存的回复
+
+        :return: 助手角色的上下文单元
+        """
+        unit = ContentUnit(
+            role = ContextRole.ASSISTANT,
+            reasoning_content = self.reasoning_content,
+            content = self.content,
+        )
+        if self.tool_calls:
+            unit.funcResponse = CallingFunctionResponse(
+                callingFunctionResponse = [FunctionResponseUnit(**call) for call in self.tool_calls]
+            )
+        return unit
+
+    async def replay(self, chunk_size: int = 16) -> AsyncIterator[Delta]:
+        """
+        将缓存的回复重新切分为流式响应块
+
+        顺序与供应商一致：推理内容、正文、工具调用，最后一个块只带用量 (重放不消耗token，用量为0)
+
+        :param chunk_size: 每个块的字符数
+        """
+        created = int(time.time())
+        base = {"id": self.id, "created": created, "model": self.model}
+        for name in ("reasoning_content", "content"):
+            text: str = getattr(self, name)
+            for start in range(0, len(text), chunk_size):
+                yield Delta(**base, **{name: text[start:start + chunk_size]})
+                # 让出事件循环，与真实的流式响应一样允许其他任务穿插执行
+                await asyncio.sleep(0)
+        for index, call in enumerate(self.tool_calls):
+            yield Delta(**base, tool_calls = [ToolCallDelta(
+                index = index,
+                id = call["id"],
+                type = call["type"],
+                name = call["name"],
+                arguments = call["arguments_str"],
+            )])
+        yield Delta(**base, token_usage = TokensCount())
+
+class CompletionCache:
+    """
+    模型响应缓存
+
+    以 (接口地址, 模型ID, 规范化后的消息, 采样参数) 的哈希为键，
+    最近使用的 max_entries 项保存在内存中，被淘汰的未过期项写入 spill_dir，再次命中时读回内存。
+    是否缓存由调用方按模型设置 Request.cache_ttl 决定
+    """
+    def __init__(
+            self,
+            max_entries: int = 1024,
+            spill_dir: Path | None = None,
+            default_ttl: float = 600.0,
+            sweep_interval: int = 256,
+        ):
+        """
+        :param max_entries: 内存中保留的缓存项数量
+        :param spill_dir: 淘汰项的磁盘目录，为None时直接丢弃
+        :param default_ttl: 模型元数据只启用缓存而没有指定有效期时使用的有效期 (秒)
+        :param sweep_interval: 每写入多少项到磁盘后清理一次过期文件
+        """
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+        self._entries: OrderedDict[str, CachedCompletion] = OrderedDict()
+        self._spilled_since_sweep: int = 0
+        self._counters: dict[str, int] = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "spilled": 0,
+            "expired": 0,
+        }
+
+    @classmethod
+    def from_config(cls) -> "CompletionCache":
+        """
+        根据项目配置创建缓存
+        """
+        spill_dir = configs.get_config("Completion_Cache_Spill_Dir", "./temp/completion_cache").get_value(str)
+        return cls(
+            max_entries = configs.get_config("Completion_Cache_Max_Entries", 1024).get_value(int),
+            spill_dir = Path(spill_dir) if spill_dir else None,
+            default_ttl = configs.get_config("Completion_Cache_Default_TTL", 600.0).get_value(float),
+        )
+
+    def ttl_for(self, metadata: dict[str, Any]) -> float:
+        """
+        根据模型元数据 (api_info.json 中的 Metadata) 获取缓存有效期
+
+        ``"CompletionCache": true`` 使用默认有效期，``"CompletionCache": 秒数`` 使用指定的有效期
+
+        :param metadata: 模型元数据
+        :return: 有效期 (秒)，为0时不缓存
+        """
+        value = metadata.get("CompletionCache", False)
+        if value is True:
+            return self.default_ttl
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+            return float(value)
+        return 0.0
+
+    @staticmethod
+    def make_key(request: Request, messages: list[dict]) -> str:
+        """
+        计算缓存键
+
+        :param request: 请求对象
+        :param messages: 实际发送的消息列表
+        :return: 十六进制的哈希值
+        """
+        payload = {
+            "url": request.url,
+            "model": request.model,
+            "params": {name: getattr(request, name) for name in _SAMPLING_FIELDS},
+            "messages": [_normalize_message(message) for message in messages],
+        }
+        return hashlib.blake2b(orjson.dumps(payload, option = orjson.OPT_SORT_KEYS), digest_size = 20).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.spill_dir / key[:2] / f"{key}.json"
+
+    async def get(self, key: str) -> CachedCompletion | None:
+        """
+        查找缓存项
+
+        :param key: 缓存键
+        :return: 未过期的缓存项，没有时返回None
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expired:
+                del self._entries[key]
+                self._counters["expired"] += 1
+                entry = None
+            else:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry
+        if self.spill_dir is not None:
+            entry = await asyncio.to_thread(self._read_spilled, key)
+            if entry is not None:
+                self._counters["disk_hits"] += 1
+                evicted = self._store(key, entry)
+                if evicted:
+                    await asyncio.to_thread(self._spill, evicted)
+                return entry
+        self._counters["misses"] += 1
+        return None
+
+    async def put(self, key: str, entry: CachedCompletion) -> None:
+        """
+        写入缓存项
+
+        :param key: 缓存键
+        :param entry: 缓存项
+        """
+        self._counters["stores"] += 1
+        evicted = self._store(key, entry)
+        if evicted and self.spill_dir is not None:
+            await asyncio.to_thread(self._spill, evicted)
+
+    def _store(self, key: str, entry: CachedCompletion) -> list[tuple[str, CachedCompletion]]:
+        """写入内存，返回被淘汰的未过期项"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            old_key, old_entry = self._entries.popitem(last = False)
+            if not old_entry.expired:
+                evicted.append((old_key, old_entry))
+        return evicted
+
+    def _read_spilled(self, key: str) -> CachedCompletion | None:
+        path = self._path(key)
+        try:
+            entry = CachedCompletion(**orjson.loads(path.read_bytes()))
+        except FileNotFoundError:
+            return None
+        except (orjson.JSONDecodeError, TypeError, OSError) as e:
+            logger.warning(f"Invalid completion cache file {path}: {e}", user_id = "[System]")
+            entry = None
+        # 读回内存后删除磁盘上的副本，再次被淘汰时会重新写入
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        if entry is None or entry.expired:
+            return None
+        return entry
+
+    def _spill(self, evicted: list[tuple[str, CachedCompletion]]) -> None:
+        for key, entry in evicted:
+            path = self._path(key)
+            path.parent.mkdir(parents = True, exist_ok = True)
+            temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+            try:
+                temp_path.write_bytes(orjson.dumps(asdict(entry)))
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.warning(f"Failed to spill completion cache entry: {e}", user_id = "[System]")
+                try:
+                    os.remove(temp_path)
+                except FileNotFoundError:
+                    pass
+                continue
+            self._counters["spilled"] += 1
+            self._spilled_since_sweep += 1
+        if self._spilled_since_sweep >= self.sweep_interval:
+            self._spilled_since_sweep = 0
+            self._sweep()
+
+    def _sweep(self) -> None:
+        """删除磁盘上已过期的缓存项"""
+        now = time.time()
+        removed = 0
+        for path in self.spill_dir.glob("*/*.json"):
+            try:
+                if orjson.loads(path.read_bytes()).get("expires_at", 0) <= now:
+                    os.remove(path)
+                    removed += 1
+            except (OSError, orjson.JSONDecodeError):
+                continue
+        self._counters["expired"] += removed
+
+    async def clear(self) -> int:
+        """
+        清空内存与磁盘上的全部缓存项
+
+        :return: 清除的缓存项数量
+        """
+        count = len(self._entries)
+        self._entries.clear()
+        if self.spill_dir is not None:
+            count += await asyncio.to_thread(self._clear_spilled)
+        return count
+
+    def _clear_spilled(self) -> int:
+        removed = 0
+        for path in self.spill_dir.glob("*/*.json"):
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    def stats(self) -> dict[str, Any]:
+        """
+        获取缓存统计
+
+        :return: 命中、未命中等计数与当前内存中的缓存项数量
+        """
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "spill_dir": str(self.spill_dir) if self.spill_dir is not None else None,
+        }
@@ -1,15 +1,20 @@
 # ==== 标准库 ==== #
 import asyncio
 import inspect
+from array import array
 from typing import (
     Any,
     Awaitable,
+    AsyncIterator,
+    Callable,
 )
 import time
 from datetime import datetime, timezone
 
 # ==== 第三方库 ==== #
+import httpx
 import openai
+import orjson
 from environs import Env
 from loguru import logger
 
@@ -24,16 +29,22 @@ from ._object import (
 )
 from ..Context import (
     FunctionResponseUnit,
+    CallingFunctionResponse,
     ContextObject,
     ContentUnit,
     ContextRole
 )
 from ..CallLog import CallLog
+from ..Tracing import get_tracer
 from TimeParser import (
     format_deltatime,
     format_deltatime_ns
 )
 from ._exceptions import *
+from ._decoder import decode_chunk, decode_chunk_dict, iter_sse_json
+from ._accumulator import StreamAssembler
+from ._cache import CompletionCache, CachedCompletion
+from ._coalesce import StreamFlight
 
 # ==== 本模块代码 ==== #
 env = Env()
@@ -51,6 +62,20 @@ def remove_keys_from_dicts(dict_list: list[dict], keys_to_remove: list[str] | se
         for d in dict_list
     ]
 
+def request_messages(request: Request) -> list[dict]:
+    """
+    获取实际发送给模型的消息列表 (续写时保留推理内容)
+
+    :param request: 请求对象
+    :return: 消息列表
+    """
+    if request.context.last_content.prefix:
+        return request.context.full_context
+    return remove_keys_from_dicts(request.context.full_context, {"reasoning_content"})
+
+def _passthrough(delta: Delta) -> Delta:
+    return delta
+
 def sum_string_lengths(items, field_name):
     """
     计算列表中所有字典指定字段的字符串长度总和
@@ -62,11 +87,27 @@ def sum_string_lengths(items, field_name):
     return sum(len(item[field_name]) for item in items if field_name in item and isinstance(item[field_name], str))
 
 class Client:
-    def __init__(self, max_concurrency: int | None = None):
+    def __init__(
+            self,
+            max_concurrency: int | None = None,
+            raw_sse: bool | None = None,
+            completion_cache: CompletionCache | None = None,
+            coalesce: bool | None = None
+        ):
         # 协程池
         self.max_concurrency = max_concurrency if max_concurrency is not None else env.int('MAX_CONCURRENCY', 1000) # 最大并发数
         self.semaphore = asyncio.Semaphore(self.max_concurrency)
         self.tasks = set()  # 存储运行中的任务
+        # 流式请求是否直接解析SSE字节流 (跳过SDK对象构建)
+        self.raw_sse = raw_sse if raw_sse is not None else env.bool('API_RAW_SSE', False)
+        self._http_client: httpx.AsyncClient | None = None
+        # 响应缓存，为None时所有请求都发送给模型
+        self.completion_cache = completion_cache
+        # 是否合并同时进行的相同流式请求
+        self.coalesce = coalesce if coalesce is not None else env.bool('API_REQUEST_COALESCING', False)
+        # 请求哈希 -> 正在进行的上游流式请求
+        self._inflight: dict[str, StreamFlight] = {}
+        self._coalesce_counters: dict[str, int] = {"leaders": 0, "followers": 0}
     # region 协程池管理
     async def _submit(self, coro: Awaitable[Any], user_id: str) -> Any:
         """提交任务到协程池，并等待返回结果"""
@@ -84,6 +125,9 @@ class Client:
     async def _shutdown(self):
         """关闭池，等待所有任务完成"""
         await asyncio.gather(*self.tasks)
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
 
     async def set_concurrency(self, new_max: int):
         """动态修改并发限制"""
@@ -94,8 +138,27 @@ class Client:
     # region 提交任务
     async def submit_Request(self, user_id:str, request: Request) -> Response:
         """提交请求到协程池，并等待返回结果"""
+        # 计算请求哈希 (必须在请求前计算，请求完成后上下文中会加入模型的回复)
+        use_cache = self.completion_cache is not None and request.cache_ttl > 0
+        key: str | None = None
+        if (use_cache or (self.coalesce and request.stream)) and request.context:
+            key = CompletionCache.make_key(request, request_messages(request))
+        # 查找响应缓存
+        cached: CachedCompletion | None = None
+        if use_cache and key is not None:
+            cached = await self.completion_cache.get(key)
         try:
-            if request.stream:
+            if cached is not None:
+                # 命中时不占用协程池，流式请求按原来的方式逐块重放
+                logger.info(f"Completion cache hit", user_id = user_id)
+                if request.stream:
+                    response = await self._call_stream_api(user_id, request, deltas = cached.replay())
+                    response.cached = response.calling_log.cached = True
+                else:
+                    response = self._cached_response(user_id, request, cached)
+            elif request.stream and key is not None and self.coalesce:
+                response = await self._call_coalesced_stream_api(user_id, request, key)
+            elif request.stream:
                 response = await self._submit(self._call_stream_api(user_id, request), user_id = user_id)
             else:
                 response = await self._submit(self._call_api(user_id, request), user_id = user_id)
@@ -103,6 +166,12 @@ class Client:
             raise ModelNotFoundError(request.model)
         except openai.APIConnectionError:
             raise APIConnectionError(f"{request.url} Connection Failed")
+
+        # 只缓存完整的非空回复 (合并的请求由发起的一方写入)
+        if use_cache and key is not None and cached is None and not response.interrupted and not response.coalesced:
+            entry = CachedCompletion.from_response(response, request.cache_ttl)
+            if entry.content or entry.reasoning_content or entry.tool_calls:
+                await self.completion_cache.put(key, entry)
         
         await self._print_log(
             user_id = user_id,
@@ -148,7 +217,9 @@ class Client:
             max_completion_tokens=request.max_completion_tokens,
             stop = request.stop,
             stream = False,
-            messages = remove_keys_from_dicts(request.context.full_context, {"reasoning_content"}) if not request.context.last_content.prefix else request.context.full_context,
+            messages = request_messages(request),
+            tools = request.tools or openai.NOT_GIVEN,
+            tool_choice = request.tool_choice or openai.NOT_GIVEN,
         )
         request_end_time = time.time_ns()
 
@@ -188,7 +259,8 @@ class Client:
             if hasattr(choices, "message"):
                 # 处理输出内容
                 if hasattr(choices.message, "content"):
-                    model_response_content_unit.content = choices.message.content
+                    # 只有工具调用时正文为None
+                    model_response_content_unit.content = choices.message.content or ""
                     print(f"\n\n{model_response_content_unit.content}\n\n", end="", flush=True)
                 
                 # 处理推理内容
@@ -219,12 +291,14 @@ class Client:
                                 arguments = ""
                         
                         # 添加调用函数信息
+                        if model_response_content_unit.funcResponse is None:
+                            model_response_content_unit.funcResponse = CallingFunctionResponse()
                         model_response_content_unit.funcResponse.callingFunctionResponse.append(
                             FunctionResponseUnit(
                                 id = id,
                                 type = type,
                                 name = name,
-                                arguments = arguments
+                                arguments_str = arguments
                             )
                         )
         
@@ -279,6 +353,17 @@ class Client:
         model_response.calling_log.cache_hit_count = model_response.token_usage.prompt_cache_hit_tokens
         model_response.calling_log.cache_miss_count = model_response.token_usage.prompt_cache_miss_tokens
 
+        # 补记追踪跨度
+        get_tracer().record_span(
+            "api.request",
+            request_start_time,
+            request_end_time,
+            **{
+                "tokens.prompt": model_response.token_usage.prompt_tokens,
+                "tokens.completion": model_response.token_usage.completion_tokens,
+            }
+        )
+
         # 添加上下文
         model_response.context = request.context
         model_response.context.context_list.append(model_response_content_unit)
@@ -288,17 +373,17 @@ class Client:
     # endregion
 
     # region 流式API
-    async def _call_stream_api(self, user_id:str, request: Request) -> Response:
-        """调用流式API"""
+    async def _call_stream_api(self, user_id:str, request: Request, deltas: AsyncIterator[Delta] | None = None) -> Response:
+        """
+        调用流式API
+
+        :param deltas: 提供时不请求模型，而是处理给定的Delta (缓存重放或合并的请求)
+        """
         # 创建响应对象
         model_response = Response()
         # 创建调用日志
         model_response.calling_log = CallLog()
 
-        # 创建OpenAI Client
-        logger.info(f"Created OpenAI Client", user_id = user_id)
-        client = openai.AsyncOpenAI(base_url=request.url, api_key=request.key)
-
         # 写入调用日志基础信息
         model_response.calling_log.url = request.url
         model_response.calling_log.user_id = user_id
@@ -313,24 +398,18 @@ class Client:
         # 请求流式连接
         logger.info(f"Start Connecting to the API", user_id = user_id)
         request_start_time = time.time_ns()
-        response = await client.chat.completions.create(
-            model = request.model,
-            temperature = request.temperature,
-            top_p = request.top_p,
-            frequency_penalty = request.frequency_penalty,
-            presence_penalty = request.presence_penalty,
-            max_tokens = request.max_tokens,
-            max_completion_tokens=request.max_completion_tokens,
-            stop = request.stop,
-            stream = True,
-            messages = remove_keys_from_dicts(request.context.full_context, {"reasoning_content"}) if not request.context.last_content.prefix else request.context.full_context,
-        )
+        raw_response: httpx.Response | None = None
+        if deltas is not None:
+            response = deltas
+            decode = _passthrough
+        else:
+            response, decode, raw_response = await self._open_stream(user_id, request)
         request_end_time = time.time_ns()
 
-        # 创建响应缓冲区单元
-        model_response_content_unit:ContentUnit = ContentUnit()
-        # 设置角色
-        model_response_content_unit.role = ContextRole.ASSISTANT
+        # 创建响应组装器 (调用方可以预先提供，以便随时获取部分内容)
+        if request.stream_assembler is None:
+            request.stream_assembler = StreamAssembler()
+        assembler = request.stream_assembler
         # chunk计数器
         chunk_count:int = 0
         # 空chunk计数器
@@ -343,73 +422,75 @@ class Client:
         stream_processing_start_time:int = time.time_ns()
         # 记录上次chunk时间
         last_chunk_time:int = 0
+        # 记录首个chunk到达时间
+        first_chunk_time:int = 0
         # chunk耗时列表
-        chunk_times:list[int] = []
-        async for chunk in response:
-            # 翻译chunk
-            delta_data = await self._process_chunk(chunk)
-
-            # 记录会话开启时间
-            if not model_response.created:
-                model_response.created = delta_data.created
+        chunk_times:array = array('q')
+        # 没有返回usage时保持为0
+        model_response.token_usage = TokensCount()
+        try:
+            async for chunk in response:
+                if not first_chunk_time:
+                    first_chunk_time = time.time_ns()
+                # 翻译chunk
+                delta_data = decode(chunk)
+
+                # 记录会话开启时间
+                if not model_response.created:
+                    model_response.created = delta_data.created
             
-            # 记录chunk时间
-            if last_chunk_time == 0:
-                last_chunk_time = delta_data.created * (10**9)
-            else:
-                this_chunk_time = time.time_ns()
-                time_difference = this_chunk_time - last_chunk_time
-                chunk_times.append(time_difference)
-                last_chunk_time = this_chunk_time
+                # 记录chunk时间
+                if last_chunk_time == 0:
+                    last_chunk_time = delta_data.created * (10**9)
+                else:
+                    this_chunk_time = time.time_ns()
+                    time_difference = this_chunk_time - last_chunk_time
+                    chunk_times.append(time_difference)
+                    last_chunk_time = this_chunk_time
             
-            # 记录会话ID
-            if not model_response.id:
-                model_response.id = delta_data.id
+                # 记录会话ID
+                if not model_response.id:
+                    model_response.id = delta_data.id
             
-            # 记录模型名称
-            if not model_response.model:
-                model_response.model = delta_data.model
+                # 记录模型名称
+                if not model_response.model:
+                    model_response.model = delta_data.model
             
-            # 记录token使用情况
-            if delta_data.token_usage:
-                model_response.token_usage = delta_data.token_usage
-
-            # 记录模型推理响应内容
-            if delta_data.reasoning_content:
-                if request.print_chunk:
-                    if not model_response_content_unit.reasoning_content:
+                # 记录token使用情况
+                if delta_data.token_usage:
+                    model_response.token_usage = delta_data.token_usage
+
+                # 打印模型推理响应内容
+                if delta_data.reasoning_content and request.print_chunk:
+                    if not assembler.reasoning_content:
                         print('\n\n', end="", flush=True)
                     print(f"\033[7m{delta_data.reasoning_content}\033[0m", end="", flush=True)
-                model_response_content_unit.reasoning_content += delta_data.reasoning_content
             
-            # 记录模型响应内容
-            if delta_data.content:
-                if request.print_chunk:
-                    if not model_response_content_unit.content:
+                # 打印模型响应内容
+                if delta_data.content and request.print_chunk:
+                    if not assembler.content:
                         print('\n\n', end="", flush=True)
                     print(delta_data.content, end="", flush=True)
-                model_response_content_unit.content += delta_data.content
             
-            # 记录模型工具调用内容
-            if delta_data.function_id:
-                model_response_content_unit.funcResponse.callingFunctionResponse.append(
-                    FunctionResponseUnit(
-                        id = delta_data.function_id,
-                        type = delta_data.function_type,
-                        name = delta_data.function_name,
-                        arguments_str = delta_data.function_arguments,
-                    )
-                )
-
-            # 判断是否为空并增加空chunk计数器
-            if delta_data.is_empty:
-                empty_chunk_count += 1
-            chunk_count += 1
-
-            # 处理回调函数
-            if request.continue_processing_callback_function is not None:
-                if request.continue_processing_callback_function(user_id, delta_data):
-                    break
+                # 记录模型响应内容与工具调用
+                assembler.feed(delta_data)
+
+                # 判断是否为空并增加空chunk计数器
+                if delta_data.is_empty:
+                    empty_chunk_count += 1
+                chunk_count += 1
+
+                # 处理回调函数
+                if request.continue_processing_callback_function is not None:
+                    if request.continue_processing_callback_function(user_id, delta_data):
+                        model_response.interrupted = True
+                        break
+        finally:
+            if raw_response is not None:
+                await raw_response.aclose()
+            if deltas is not None:
+                # 提前中断时立即退出订阅，而不是等到垃圾回收
+                await deltas.aclose()
         # 处理结束
         stream_processing_end_time = time.time_ns()
         print('\n\n', end="", flush=True)
@@ -429,86 +510,221 @@ class Client:
         model_response.calling_log.cache_hit_count = model_response.token_usage.prompt_cache_hit_tokens
         model_response.calling_log.cache_miss_count = model_response.token_usage.prompt_cache_miss_tokens
 
+        # 补记追踪跨度
+        tracer = get_tracer()
+        tracer.record_span("api.connect", request_start_time, request_end_time)
+        tracer.record_span("api.first_token", request_end_time, first_chunk_time)
+        tracer.record_span(
+            "api.stream",
+            stream_processing_start_time,
+            stream_processing_end_time,
+            **{
+                "stream.chunks": chunk_count,
+                "stream.empty_chunks": empty_chunk_count,
+                "tokens.prompt": model_response.token_usage.prompt_tokens,
+                "tokens.completion": model_response.token_usage.completion_tokens,
+            }
+        )
+
         # 添加上下文
         model_response.context = request.context
-        model_response.context.context_list.append(model_response_content_unit)
+        model_response.context.context_list.append(assembler.snapshot())
 
         # 输出响应
         return model_response
     # endregion
 
-    # region 处理单个API响应块
-    async def _process_chunk(
-        self,
-        chunk
-    ) -> Delta:
+    # region 打开流式连接
+    async def _open_stream(self, user_id: str, request: Request) -> tuple[AsyncIterator[Any], Callable[[Any], Delta], httpx.Response | None]:
         """
-        处理单个API响应块
+        向模型发起流式请求
 
-        :param chunk: API响应块
-        :return: Delta_data对象
+        :param user_id: 用户ID
+        :param request: 请求对象
+        :return: (响应块迭代器, 将响应块转换为Delta的函数, 需要由调用方关闭的httpx响应)
         """
-        # 初始化对象
-        tokens_usage = TokensCount()
-        delta_data = Delta()
-        # 转录ID
-        if hasattr(chunk, "id"):
-            delta_data.id = chunk.id
-        # 转录创建时间
-        if hasattr(chunk, "created"):
-            delta_data.created = chunk.created
-        # 转录模型名称
-        if hasattr(chunk, "model"):
-            delta_data.model = chunk.model
-        
-        # 转录内容
-        if hasattr(chunk, "choices") and len(chunk.choices) > 0:
-            choice = chunk.choices[0]
-            if hasattr(choice, "delta"):
-                # 转录推理内容
-                if hasattr(choice.delta, "reasoning_content"):
-                    reasoning_data = choice.delta.reasoning_content
-                    if reasoning_data is not None:
-                        delta_data.reasoning_content = reasoning_data
-
-                # 转录响应内容
-                if hasattr(choice.delta, "content"):
-                    content = choice.delta.content
-                    if content:
-                        delta_data.content = content
-                
-                # 转录工具调用
-                if hasattr(choice.delta, "tool_calls"):
-                    content = choice.delta.tool_calls
-                    if content:
-                        tool = content[0]
-                        if hasattr(tool, "id"):
-                            delta_data.function_id = tool.id
-                        if hasattr(tool, "type"):
-                            delta_data.function_type = tool.type
-                        if hasattr(tool, "function"):
-                            if hasattr(tool.function, "name"):
-                                delta_data.function_name = tool.function.name
-                            if hasattr(tool.function, "arguments"):
-                                delta_data.function_arguments = tool.function.arguments
-
-        # 转录usage数据
-        if hasattr(chunk, 'usage') and chunk.usage is not None:
-            # 只在最后一个chunk中获取usage数据
-            if hasattr(chunk.usage, 'prompt_tokens') and chunk.usage.prompt_tokens is not None:
-                tokens_usage.prompt_tokens = chunk.usage.prompt_tokens
-            if hasattr(chunk.usage, 'completion_tokens') and chunk.usage.completion_tokens is not None:
-                tokens_usage.completion_tokens = chunk.usage.completion_tokens
-            if hasattr(chunk.usage, 'total_tokens') and chunk.usage.total_tokens is not None:
-                tokens_usage.total_tokens = chunk.usage.total_tokens
-            if hasattr(chunk.usage, 'prompt_cache_hit_tokens') and chunk.usage.prompt_cache_hit_tokens is not None:
-                tokens_usage.prompt_cache_hit_tokens = chunk.usage.prompt_cache_hit_tokens
-            if hasattr(chunk.usage, 'prompt_cache_miss_tokens') and chunk.usage.prompt_cache_miss_tokens is not None:
-                tokens_usage.prompt_cache_miss_tokens = chunk.usage.prompt_cache_miss_tokens
-        
-        delta_data.token_usage = tokens_usage
+        messages = request_messages(request)
+        if self.raw_sse:
+            raw_response = await self._open_raw_stream(request, messages)
+            return iter_sse_json(raw_response.aiter_bytes()), decode_chunk_dict, raw_response
+        # 创建OpenAI Client
+        logger.info(f"Created OpenAI Client", user_id = user_id)
+        client = openai.AsyncOpenAI(base_url=request.url, api_key=request.key)
+        response = await client.chat.completions.create(
+            model = request.model,
+            temperature = request.temperature,
+            top_p = request.top_p,
+            frequency_penalty = request.frequency_penalty,
+            presence_penalty = request.presence_penalty,
+            max_tokens = request.max_tokens,
+            max_completion_tokens=request.max_completion_tokens,
+            stop = request.stop,
+            stream = True,
+            messages = messages,
+            tools = request.tools or openai.NOT_GIVEN,
+            tool_choice = request.tool_choice or openai.NOT_GIVEN,
+        )
+        return response, decode_chunk, None
+    # endregion
+
+    # region 合并请求
+    async def _call_coalesced_stream_api(self, user_id: str, request: Request, key: str) -> Response:
+        """
+        调用流式API，与同时进行的相同请求共用一次上游请求
+
+        :param user_id: 用户ID
+        :param request: 请求对象
+        :param key: 请求哈希
+        :return: 响应对象，合并进来的请求用量为0，调用日志标记为 coalesced
+        """
+        flight = self._inflight.get(key)
+        follower = flight is not None
+        if flight is None:
+            # 带有中断回调的请求可能提前结束上游，只能加入已有的请求，不能发起共享的请求
+            if request.continue_processing_callback_function is not None:
+                return await self._submit(self._call_stream_api(user_id, request), user_id = user_id)
+            flight = StreamFlight(key)
+            self._inflight[key] = flight
+            flight.task = asyncio.create_task(self._run_flight(user_id, request, flight))
+            self.tasks.add(flight.task)
+            flight.task.add_done_callback(self.tasks.discard)
+            self._coalesce_counters["leaders"] += 1
+        else:
+            self._coalesce_counters["followers"] += 1
+            logger.info(f"Joined an in-flight request ({flight.subscribers} waiting)", user_id = user_id)
+        response = await self._call_stream_api(user_id, request, deltas = flight.subscribe(follower))
+        response.coalesced = response.calling_log.coalesced = follower
+        return response
+
+    async def _run_flight(self, user_id: str, request: Request, flight: StreamFlight) -> None:
+        """
+        读取上游流式响应并广播
+
+        :param user_id: 发起请求的用户ID
+        :param request: 发起请求的请求对象
+        :param flight: 广播对象
+        """
+        raw_response: httpx.Response | None = None
+        try:
+            async with self.semaphore:
+                response, decode, raw_response = await self._open_stream(user_id, request)
+                async for chunk in response:
+                    flight.publish(decode(chunk))
+        except asyncio.CancelledError:
+            flight.finish(CallApiException("Upstream request cancelled"))
+            raise
+        except Exception as e:
+            flight.finish(e)
+        else:
+            flight.finish()
+        finally:
+            if self._inflight.get(flight.key) is flight:
+                del self._inflight[flight.key]
+            if raw_response is not None:
+                await raw_response.aclose()
+
+    def coalescing_stats(self) -> dict[str, Any]:
+        """
+        获取请求合并统计
+
+        :return: 发起与合并的请求数量以及正在进行的上游请求数量
+        """
+        return {
+            "enabled": self.coalesce,
+            **self._coalesce_counters,
+            "inflight": len(self._inflight),
+        }
+    # endregion
+
+    # region 缓存重放
+    def _cached_response(self, user_id: str, request: Request, cached: CachedCompletion) -> Response:
+        """
+        用缓存的回复构造非流式响应
 
-        return delta_data
+        :param user_id: 用户ID
+        :param request: 请求对象
+        :param cached: 缓存项
+        :return: 响应对象 (用量为0)
+        """
+        if not request.context:
+            raise ValueError("context is required")
+        now = time.time_ns()
+        model_response = Response(
+            id = cached.id,
+            created = now // 10**9,
+            model = cached.model,
+            token_usage = TokensCount(),
+            finish_reason = cached.finish_reason,
+            system_fingerprint = cached.system_fingerprint,
+            cached = True,
+        )
+        model_response.calling_log = CallLog(
+            id = cached.id,
+            url = request.url,
+            model = request.model,
+            user_id = user_id,
+            user_name = request.user_name,
+            stream = False,
+            cached = True,
+            request_start_time = now,
+            request_end_time = now,
+            stream_processing_start_time = now,
+            stream_processing_end_time = now,
+        )
+        model_response.context = request.context
+        model_response.context.context_list.append(cached.as_unit())
+        return model_response
+    # endregion
+
+    # region 原始SSE连接
+    async def _open_raw_stream(self, request: Request, messages: list[dict]) -> httpx.Response:
+        """
+        直接使用httpx发起流式请求，返回尚未读取响应体的响应对象
+
+        :param request: 请求对象
+        :param messages: 消息列表
+        :return: httpx响应对象 (调用方负责关闭)
+        """
+        if self._http_client is None:
+            # 与OpenAI SDK的默认超时保持一致
+            self._http_client = httpx.AsyncClient(timeout = httpx.Timeout(600.0, connect = 5.0))
+        body = {
+            "model": request.model,
+            "temperature": request.temperature,
+            "top_p": request.top_p,
+            "frequency_penalty": request.frequency_penalty,
+            "presence_penalty": request.presence_penalty,
+            "max_tokens": request.max_tokens,
+            "max_completion_tokens": request.max_completion_tokens,
+            "stop": request.stop,
+            "stream": True,
+            "messages": messages,
+            "tools": request.tools or None,
+            "tool_choice": request.tool_choice,
+        }
+        http_request = self._http_client.build_request(
+            "POST",
+            f"{request.url.rstrip('/')}/chat/completions",
+            content = orjson.dumps({key: value for key, value in body.items() if value is not None}),
+            headers = {
+                "Authorization": f"Bearer {request.key}",
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream",
+            },
+        )
+        try:
+            response = await self._http_client.send(http_request, stream = True)
+        except httpx.TransportError:
+            raise APIConnectionError(f"{request.url} Connection Failed")
+        if response.status_code >= 400:
+            try:
+                detail = (await response.aread()).decode(errors = "replace")
+            finally:
+                await response.aclose()
+            if response.status_code == 404:
+                raise ModelNotFoundError(request.model)
+            raise CallApiException(f"HTTP {response.status_code}: {detail}")
+        return response
     # endregion
 
     # region 打印日志
@@ -550,8 +766,8 @@ class Client:
         created_local_str = created_local_dt.strftime("%Y-%m-%d %H:%M:%S")
         logger.info(f"Created Time: {created_local_str}", user_id = user_id)
 
-        if response.calling_log.total_chunk > 0:
-            chunk_nozero_times = [time for time in response.calling_log.chunk_times if time != 0]
+        chunk_nozero_times = [time for time in response.calling_log.chunk_times if time != 0]
+        if response.calling_log.total_chunk > 0 and chunk_nozero_times:
             logger.info(f"Chunk Average Spawn Time: {format_deltatime_ns(sum(chunk_nozero_times) // len(chunk_nozero_times), '%H:%M:%S.%f.%u.%n')}", user_id = user_id)
             logger.info(f"Chunk Max Spawn Time: {format_deltatime_ns(max(chunk_nozero_times), '%H:%M:%S.%f.%u.%n')}", user_id = user_id)
             logger.info(f"Chunk Min Spawn Time: {format_deltatime_ns(min(chunk_nozero_times), '%H:%M:%S.%f.%u.%n')}", user_id = user_id)
@@ -562,7 +778,8 @@ class Client:
         logger.info(f"Completion Output Tokens: {response.token_usage.completion_tokens}", user_id = user_id)
         logger.info(f"Cache Hit Count: {response.token_usage.prompt_cache_hit_tokens}", user_id = user_id)
         logger.info(f"Cache Miss Count: {response.token_usage.prompt_cache_miss_tokens}", user_id = user_id)
-        logger.info(f"Cache Hit Ratio: {response.token_usage.prompt_cache_hit_tokens / response.token_usage.prompt_tokens :.2%}", user_id = user_id)
+        if response.token_usage.prompt_tokens > 0:
+            logger.info(f"Cache Hit Ratio: {response.token_usage.prompt_cache_hit_tokens / response.token_usage.prompt_tokens :.2%}", user_id = user_id)
         if response.stream:
             logger.info(f"Average Generation Rate: {response.token_usage.completion_tokens / ((response.calling_log.stream_processing_end_time - response.calling_log.stream_processing_start_time) / 1e9):.2f} /s", user_id = user_id)
 
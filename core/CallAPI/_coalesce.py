@@ -0,0 +1,78 @@
+# ==== 标准库 ==== #
+import asyncio
+from dataclasses import replace
+from typing import AsyncIterator
+
+# ==== 自定义库 ==== #
+from ._object import Delta, TokensCount
+
+class StreamFlight:
+    """
+    一次正在进行的上游流式请求
+
+    上游响应由独立的任务读取，收到的Delta按顺序保存并通知所有订阅者，
+    晚加入的订阅者会先收到已经到达的全部Delta，因此每个订阅者看到的都是完整的流。
+    所有订阅者都退出而上游还没有结束时取消上游任务
+    """
+    def __init__(self, key: str):
+        """
+        :param key: 请求的哈希
+        """
+        self.key = key
+        self.deltas: list[Delta] = []
+        self.done: bool = False
+        self.error: BaseException | None = None
+        self.subscribers: int = 0
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        # 唤醒当前的等待者，之后的等待者使用新的事件
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def publish(self, delta: Delta) -> None:
+        """
+        广播一个Delta
+
+        :param delta: 流式响应块
+        """
+        self.deltas.append(delta)
+        self._notify()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        """
+        结束广播
+
+        :param error: 上游出错时的异常，会在每个订阅者中重新抛出
+        """
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def subscribe(self, follower: bool) -> AsyncIterator[Delta]:
+        """
+        订阅广播
+
+        :param follower: 是否为合并进来的请求，为True时用量置为0 (用量只计入发起请求的一方)
+        :return: 从头开始的全部Delta
+        """
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(self.deltas):
+                    delta = self.deltas[index]
+                    index += 1
+                    if follower and delta.token_usage is not None:
+                        delta = replace(delta, token_usage = TokensCount())
+                    yield delta
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.task is not None:
+                self.task.cancel()
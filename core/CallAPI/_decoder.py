@@ -0,0 +1,188 @@
+# ==== 标准库 ==== #
+from typing import Any, AsyncIterator
+
+# ==== 第三方库 ==== #
+import orjson
+from openai.types.chat import ChatCompletionChunk
+from openai.types.completion_usage import CompletionUsage
+
+# ==== 自定义库 ==== #
+from ._object import Delta, ToolCallDelta, TokensCount
+from ._exceptions import CallApiException
+
+# region SDK对象
+def _decode_usage(usage: CompletionUsage) -> TokensCount:
+    tokens_usage = TokensCount()
+    if usage.prompt_tokens is not None:
+        tokens_usage.prompt_tokens = usage.prompt_tokens
+    if usage.completion_tokens is not None:
+        tokens_usage.completion_tokens = usage.completion_tokens
+    if usage.total_tokens is not None:
+        tokens_usage.total_tokens = usage.total_tokens
+    # DeepSeek 等供应商的扩展字段
+    extra = usage.model_extra
+    if extra:
+        hit = extra.get("prompt_cache_hit_tokens")
+        if hit is not None:
+            tokens_usage.prompt_cache_hit_tokens = hit
+        miss = extra.get("prompt_cache_miss_tokens")
+        if miss is not None:
+            tokens_usage.prompt_cache_miss_tokens = miss
+    return tokens_usage
+
+def decode_chunk(chunk: ChatCompletionChunk) -> Delta:
+    """
+    将SDK的流式响应块转换为Delta
+
+    直接访问SDK类型上声明的字段，扩展字段 (如 reasoning_content) 从 model_extra 中读取，
+    避免对 pydantic 对象使用 hasattr 带来的异常开销
+
+    :param chunk: 流式响应块
+    :return: Delta对象
+    """
+    delta_data = Delta(
+        id = chunk.id,
+        created = chunk.created,
+        model = chunk.model,
+    )
+
+    choices = chunk.choices
+    if choices:
+        delta = choices[0].delta
+        if delta is not None:
+            extra = delta.model_extra
+            if extra:
+                reasoning_content = extra.get("reasoning_content")
+                if reasoning_content:
+                    delta_data.reasoning_content = reasoning_content
+
+            content = delta.content
+            if content:
+                delta_data.content = content
+
+            tool_calls = delta.tool_calls
+            if tool_calls:
+                # 一个chunk中可能包含多个工具调用的片段
+                for tool in tool_calls:
+                    function = tool.function
+                    delta_data.tool_calls.append(ToolCallDelta(
+                        index = tool.index,
+                        id = tool.id,
+                        type = tool.type,
+                        name = function.name if function is not None else None,
+                        arguments = function.arguments if function is not None else None,
+                    ))
+
+    usage = chunk.usage
+    if usage is not None:
+        delta_data.token_usage = _decode_usage(usage)
+
+    return delta_data
+# endregion
+
+# region 原始字典
+def _decode_usage_dict(usage: dict[str, Any]) -> TokensCount:
+    return TokensCount(
+        prompt_tokens = usage.get("prompt_tokens") or 0,
+        completion_tokens = usage.get("completion_tokens") or 0,
+        total_tokens = usage.get("total_tokens") or 0,
+        prompt_cache_hit_tokens = usage.get("prompt_cache_hit_tokens") or 0,
+        prompt_cache_miss_tokens = usage.get("prompt_cache_miss_tokens") or 0,
+    )
+
+def decode_chunk_dict(chunk: dict[str, Any]) -> Delta:
+    """
+    将orjson解析出的流式响应块转换为Delta，行为与 decode_chunk 一致
+
+    :param chunk: 流式响应块
+    :return: Delta对象
+    """
+    delta_data = Delta(
+        id = chunk.get("id") or "",
+        created = chunk.get("created") or 0,
+        model = chunk.get("model") or "",
+    )
+
+    choices = chunk.get("choices")
+    if choices:
+        delta = choices[0].get("delta")
+        if delta:
+            reasoning_content = delta.get("reasoning_content")
+            if reasoning_content:
+                delta_data.reasoning_content = reasoning_content
+
+            content = delta.get("content")
+            if content:
+                delta_data.content = content
+
+            tool_calls = delta.get("tool_calls")
+            if tool_calls:
+                for tool in tool_calls:
+                    function = tool.get("function") or {}
+                    delta_data.tool_calls.append(ToolCallDelta(
+                        index = tool.get("index"),
+                        id = tool.get("id"),
+                        type = tool.get("type"),
+                        name = function.get("name"),
+                        arguments = function.get("arguments"),
+                    ))
+
+    usage = chunk.get("usage")
+    if usage:
+        delta_data.token_usage = _decode_usage_dict(usage)
+
+    return delta_data
+# endregion
+
+# region SSE
+async def iter_sse_json(stream: AsyncIterator[bytes]) -> AsyncIterator[dict[str, Any]]:
+    """
+    从SSE字节流中逐个解析 data 字段的JSON，遇到 [DONE] 时结束
+
+    只处理单行 data 事件 (OpenAI兼容接口的格式)，注释行与其他字段会被忽略
+
+    :param stream: 响应体字节流 (如 httpx.Response.aiter_bytes())
+    :return: 解析出的响应块
+    :raise CallApiException: 流中包含错误对象
+    """
+    buffer = b""
+    async for block in stream:
+        if buffer:
+            block = buffer + block
+        lines = block.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            chunk = _parse_sse_line(line)
+            if chunk is _DONE:
+                return
+            if chunk is not None:
+                yield chunk
+    # 最后一行可能没有换行符
+    chunk = _parse_sse_line(buffer)
+    if chunk is not None and chunk is not _DONE:
+        yield chunk
+
+# 流结束标记
+_DONE: dict = {}
+
+def _parse_sse_line(line: bytes) -> dict[str, Any] | None:
+    """
+    解析单行SSE
+
+    :param line: 不含换行符的行
+    :return: 响应块；不是 data 行时返回None，遇到 [DONE] 时返回 _DONE
+    :raise CallApiException: 响应块为错误对象
+    """
+    if not line.startswith(b"data:"):
+        return None
+    data = line[5:].strip()
+    if not data:
+        return None
+    if data == b"[DONE]":
+        return _DONE
+    chunk = orjson.loads(data)
+    if "error" in chunk:
+        error = chunk["error"]
+        raise CallApiException(error.get("message", error) if isinstance(error, dict) else error)
+    return chunk
+# endregion
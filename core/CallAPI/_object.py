@@ -1,19 +1,22 @@
 from dataclasses import dataclass, asdict, field
-from typing import Callable, Coroutine
+from typing import Callable, Coroutine, TYPE_CHECKING
 
 from ..Context import ContextObject
 from ..CallLog import CallLog
 
-@dataclass
+if TYPE_CHECKING:
+    from ._accumulator import StreamAssembler
+
+@dataclass(slots=True)
 class TokensCount:
     """
     Dataclass to store the token usage data for a given date.
     """
-    prompt_tokens = 0
-    completion_tokens  = 0
-    total_tokens = 0
-    prompt_cache_hit_tokens = 0
-    prompt_cache_miss_tokens = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    prompt_cache_hit_tokens: int = 0
+    prompt_cache_miss_tokens: int = 0
     
     @property
     def as_dict(self) -> dict[str, int]:
@@ -33,7 +36,19 @@ class Logprob:
     logprob: float = 0.0
     top_logprobs: list[Top_Logprob] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
+class ToolCallDelta:
+    """
+    Dataclass to store one tool call fragment of a delta.
+    """
+    # 工具调用在回复中的序号，同一个调用的片段序号相同 (部分供应商不提供，为None)
+    index: int | None = None
+    id: str | None = None
+    type: str | None = None
+    name: str | None = None
+    arguments: str | None = None
+
+@dataclass(slots=True)
 class Delta:
     """
     Dataclass to store the delta data for a given date.
@@ -41,10 +56,7 @@ class Delta:
     id: str = ""
     reasoning_content: str = ""
     content: str = ""
-    function_id: str | None = None
-    function_type: str | None = None
-    function_name: str | None = None
-    function_arguments: str | None = None
+    tool_calls: list[ToolCallDelta] = field(default_factory=list)
     token_usage: TokensCount | None = None
     created: int = 0
     model: str = ""
@@ -56,7 +68,7 @@ class Delta:
         """
         Check if the delta data is empty.
         """
-        return not (self.reasoning_content or self.content or self.function_name or self.function_arguments or self.token_usage)
+        return not (self.reasoning_content or self.content or self.tool_calls or self.token_usage)
 
 @dataclass
 class Request:
@@ -80,6 +92,12 @@ class Request:
     top_logprobs: int | None = None
     print_chunk: bool = True
     continue_processing_callback_function: Callable[[str, Delta], bool] | None = None
+    stream_assembler: "StreamAssembler | None" = None
+    # 响应缓存的有效期 (秒)，为0时不使用响应缓存
+    cache_ttl: float = 0.0
+    # 提供给模型的工具 (OpenAI兼容的 tools 字段)
+    tools: list[dict] | None = None
+    tool_choice: str | dict | None = None
 
 @dataclass
 class Response:
@@ -100,4 +118,10 @@ class Response:
     system_fingerprint: str = ""
     logprobs: list[Logprob] | None = None
     calling_log: CallLog | None = None
+    # 流式响应是否被回调函数提前中断
+    interrupted: bool = False
+    # 是否为响应缓存的重放
+    cached: bool = False
+    # 是否与同时进行的相同请求共用了上游响应
+    coalesced: bool = False
 
@@ -1,20 +1,26 @@
-from dataclasses import dataclass, field, asdict
+from array import array
+from dataclasses import dataclass, field, fields, asdict
 from typing import Any
 from environs import Env
 
 env = Env()
 
-@dataclass
+@dataclass(slots=True)
 class CallLogObject:
     """
     Class to represent a call log object.
+
+    chunk_times is stored as a signed 64-bit array instead of a list of ints.
     """
     id: str = ""
     url: str = ""
     model: str = ""
     user_id: str = ""
     user_name: str = ""
+    trace_id: str = ""
     stream: bool = env.bool("STREAM", True)
+    cached: bool = False
+    coalesced: bool = False
 
     total_chunk: int = 0
     empty_chunk: int = 0
@@ -27,7 +33,7 @@ class CallLogObject:
     stream_processing_end_time: int = 0
     call_prepare_start_time: int = 0
     call_prepare_end_time: int = 0
-    chunk_times: list = field(default_factory=list)
+    chunk_times: array = field(default_factory=lambda: array('q'))
     created_time: int = 0
 
     total_tokens: int = 0
@@ -40,9 +46,15 @@ class CallLogObject:
     reasoning_content_length: int = 0
     new_content_length: int = 0
 
+    def __post_init__(self):
+        if not isinstance(self.chunk_times, array):
+            self.chunk_times = array('q', self.chunk_times)
+
     @property
     def as_dict(self):
-        return asdict(self)
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data["chunk_times"] = self.chunk_times.tolist()
+        return data
     
     @classmethod
     def from_dict(cls, data: dict[str: Any]):
@@ -51,6 +63,7 @@ class CallLogObject:
     def update(self, data: dict[str: Any]):
         for key, value in data.items():
             setattr(self, key, value)
+        self.__post_init__()
     
 @dataclass
 class CallAPILogObject:
@@ -1,3 +1,4 @@
 from ._CallLogManager import CallLogManager
 from ._CallLogObject import CallLogObject as CallLog
-from ._CallLogObject import CallAPILogObject as CallAPILog
\ No newline at end of file
+from ._CallLogObject import CallAPILogObject as CallAPILog
+from ._cache_stats import PromptCacheTracker
\ No newline at end of file
@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from ._CallLogObject import CallLogObject
+
+@dataclass(slots=True)
+class _UserCacheStats:
+    turns: int = 0
+    prompt_tokens: int = 0
+    hit_tokens: int = 0
+    miss_tokens: int = 0
+    # 最近几轮的 (时间, 提示词token数, 命中token数, 未命中token数)
+    recent: deque = field(default_factory=deque)
+
+def _ratio(hit: int, miss: int) -> float:
+    return hit / (hit + miss) if hit + miss > 0 else 0.0
+
+class PromptCacheTracker:
+    """
+    按用户统计供应商上下文缓存 (如DeepSeek的硬盘缓存) 的命中情况
+
+    每个用户保留累计值与最近 window 轮的明细，用户数超过 max_users 时淘汰最久没有对话的用户
+    """
+    def __init__(self, window: int = 50, max_users: int = 10000):
+        self.window = window
+        self.max_users = max_users
+        self._users: OrderedDict[str, _UserCacheStats] = OrderedDict()
+        self._total = _UserCacheStats()
+
+    def record(self, call_log: CallLogObject) -> None:
+        """
+        记录一次调用的缓存命中情况
+
+        :param call_log: 调用日志
+        """
+        stats = self._users.get(call_log.user_id)
+        if stats is None:
+            stats = _UserCacheStats(recent = deque(maxlen = self.window))
+            self._users[call_log.user_id] = stats
+            while len(self._users) > self.max_users:
+                self._users.popitem(last = False)
+        else:
+            self._users.move_to_end(call_log.user_id)
+        for target in (stats, self._total):
+            target.turns += 1
+            target.prompt_tokens += call_log.prompt_tokens
+            target.hit_tokens += call_log.cache_hit_count
+            target.miss_tokens += call_log.cache_miss_count
+        stats.recent.append((time.time(), call_log.prompt_tokens, call_log.cache_hit_count, call_log.cache_miss_count))
+
+    def user_stats(self, user_id: str) -> dict[str, Any] | None:
+        """
+        获取用户的缓存命中趋势
+
+        :param user_id: 用户ID
+        :return: 累计值、累计与最近几轮的命中率以及每轮明细，没有记录时返回None
+        """
+        stats = self._users.get(user_id)
+        if stats is None:
+            return None
+        recent_hit = sum(sample[2] for sample in stats.recent)
+        recent_miss = sum(sample[3] for sample in stats.recent)
+        return {
+            "user_id": user_id,
+            "turns": stats.turns,
+            "prompt_tokens": stats.prompt_tokens,
+            "hit_tokens": stats.hit_tokens,
+            "miss_tokens": stats.miss_tokens,
+            "hit_ratio": _ratio(stats.hit_tokens, stats.miss_tokens),
+            "recent_hit_ratio": _ratio(recent_hit, recent_miss),
+            "recent": [
+                {
+                    "time": timestamp,
+                    "prompt_tokens": prompt_tokens,
+                    "hit_tokens": hit,
+                    "miss_tokens": miss,
+                    "hit_ratio": _ratio(hit, miss),
+                }
+                for timestamp, prompt_tokens, hit, miss in stats.recent
+            ],
+        }
+
+    def summary(self) -> dict[str, Any]:
+        """
+        获取所有用户的累计命中情况
+
+        :return: 累计值与命中率
+        """
+        return {
+            "users": len(self._users),
+            "turns": self._total.turns,
+            "prompt_tokens": self._total.prompt_tokens,
+            "hit_tokens": self._total.hit_tokens,
+            "miss_tokens": self._total.miss_tokens,
+            "hit_ratio": _ratio(self._total.hit_tokens, self._total.miss_tokens),
+        }
@@ -0,0 +1,5 @@
+from ._compactor import ContextCompactor
+
+__all__ = [
+    "ContextCompactor",
+]
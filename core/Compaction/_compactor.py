@@ -0,0 +1,308 @@
+# ==== 标准库 ==== #
+import time
+import asyncio
+from typing import Any, Awaitable, Callable
+
+# ==== 第三方库 ==== #
+from loguru import logger
+
+# ==== 自定义库 ==== #
+from .. import CallAPI
+from .. import CallLog
+from ..ApiInfo import ApiInfo
+from ..Context import (
+    ContextObject,
+    ContentUnit,
+    ContextRole
+)
+from ..DataManager import UserMainManagerInterface
+from ..Tracing import get_tracer
+from ConfigManager import ConfigLoader
+
+configs = ConfigLoader()
+
+DEFAULT_INSTRUCTION = (
+    "你是对话记录的整理者。请将下面的对话记录压缩为一段简洁的摘要，"
+    "保留人物、事实、约定、未完成的事项以及对之后对话有用的细节，不要添加记录中没有的内容。"
+    "只输出摘要本身。"
+)
+DEFAULT_SUMMARY_PREFIX = "以下是之前对话的摘要：\n"
+
+class ContextCompactor:
+    """
+    历史记录后台压缩器
+
+    对话结束后由 submit 提交超过阈值的用户，后台任务从有界队列中逐个取出：
+    先在不持有会话锁的情况下调用模型总结较早的消息，再获取会话锁并确认这些消息没有变化，
+    然后将它们写入冷存储，并在历史记录中替换为一条摘要。
+    队列已满时直接丢弃 (下一轮对话会重新提交)，不会阻塞对话
+    """
+    def __init__(
+            self,
+            context: UserMainManagerInterface,
+            archive: UserMainManagerInterface,
+            api_client: CallAPI.Client,
+            apiinfo: ApiInfo,
+            lock_getter: Callable[[str], Awaitable[asyncio.Lock]],
+            calllog: CallLog.CallLogManager | None = None,
+            prompt_cache_stats: CallLog.PromptCacheTracker | None = None,
+            threshold: int = 200000,
+            keep_recent: int = 20,
+            model_type: str = "chat",
+            max_tokens: int = 1024,
+            queue_size: int = 64,
+            role: str = "system",
+            instruction: str = DEFAULT_INSTRUCTION,
+            summary_prefix: str = DEFAULT_SUMMARY_PREFIX,
+        ):
+        """
+        :param context: 上下文管理器
+        :param archive: 保存被压缩的原始消息的管理器 (冷存储)
+        :param api_client: 调用模型的客户端
+        :param apiinfo: API信息
+        :param lock_getter: 获取用户会话锁的函数
+        :param calllog: 记录总结请求的调用日志管理器，为None时不记录
+        :param prompt_cache_stats: 记录总结请求缓存命中情况的统计，为None时不记录
+        :param threshold: 触发压缩的历史记录长度 (字符数，计算方式同 ContextObject.total_length)
+        :param keep_recent: 保留原文的最近消息数
+        :param model_type: 用于总结的模型类型
+        :param max_tokens: 摘要的最大token数
+        :param queue_size: 等待压缩的用户数上限
+        :param role: 摘要消息的角色 (system 或 assistant)
+        :param instruction: 总结时使用的系统提示词
+        :param summary_prefix: 摘要消息的前缀
+        """
+        self.context = context
+        self.archive = archive
+        self.api_client = api_client
+        self.apiinfo = apiinfo
+        self._lock_getter = lock_getter
+        self.calllog = calllog
+        self.prompt_cache_stats = prompt_cache_stats
+
+        self.threshold = threshold
+        self.keep_recent = keep_recent
+        self.model_type = model_type
+        self.max_tokens = max_tokens
+        self.role = ContextRole(role)
+        if self.role not in {ContextRole.SYSTEM, ContextRole.ASSISTANT}:
+            raise ValueError(f"Invalid compaction summary role: {role}")
+        self.instruction = instruction
+        self.summary_prefix = summary_prefix
+
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize = queue_size)
+        # 已在队列中的用户，避免重复提交
+        self._pending: set[str] = set()
+        self._worker: asyncio.Task | None = None
+        self._counters: dict[str, int] = {
+            "submitted": 0,
+            "dropped": 0,
+            "compacted": 0,
+            "skipped": 0,
+            "conflicts": 0,
+            "failed": 0,
+            "archived_messages": 0,
+        }
+
+    @classmethod
+    def from_config(cls, **kwargs: Any) -> "ContextCompactor | None":
+        """
+        根据项目配置创建压缩器，未启用时返回None
+
+        :param kwargs: 依赖对象 (见 __init__)
+        """
+        if not configs.get_config("Context_Compaction_Enabled", False).get_value(bool):
+            return None
+        return cls(
+            threshold = configs.get_config("Context_Compaction_Threshold", 200000).get_value(int),
+            keep_recent = configs.get_config("Context_Compaction_Keep_Recent", 20).get_value(int),
+            model_type = configs.get_config("Context_Compaction_Model_Type", "chat").get_value(str),
+            max_tokens = configs.get_config("Context_Compaction_Max_Tokens", 1024).get_value(int),
+            queue_size = configs.get_config("Context_Compaction_Queue_Size", 64).get_value(int),
+            role = configs.get_config("Context_Compaction_Role", "system").get_value(str),
+            instruction = configs.get_config("Context_Compaction_Instruction", DEFAULT_INSTRUCTION).get_value(str),
+            summary_prefix = configs.get_config("Context_Compaction_Summary_Prefix", DEFAULT_SUMMARY_PREFIX).get_value(str),
+            **kwargs
+        )
+
+    def submit(self, user_id: str, context: ContextObject) -> bool:
+        """
+        提交一个用户的压缩任务，需在事件循环中调用
+
+        :param user_id: 用户ID
+        :param context: 本轮对话保存的上下文，历史记录 (不含提示词) 未超过阈值时不提交
+        :return: 是否已加入队列
+        """
+        length = context.total_length - (len(context.prompt) if context.prompt else 0)
+        if length < self.threshold or user_id in self._pending:
+            return False
+        try:
+            self._queue.put_nowait(user_id)
+        except asyncio.QueueFull:
+            self._counters["dropped"] += 1
+            logger.warning("Compaction queue is full, skipped", user_id = user_id)
+            return False
+        self._pending.add(user_id)
+        self._counters["submitted"] += 1
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return True
+
+    async def _run(self) -> None:
+        """逐个处理队列中的用户，队列为空时退出"""
+        while not self._queue.empty():
+            user_id = self._queue.get_nowait()
+            self._pending.discard(user_id)
+            try:
+                with get_tracer().start_trace("context.compaction", **{"user.id": user_id}):
+                    await self.compact(user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._counters["failed"] += 1
+                logger.error(f"Context compaction failed: {e}", user_id = user_id)
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _length(history: list[dict]) -> int:
+        return ContextObject.from_context(history).total_length
+
+    def _split_point(self, history: list[dict]) -> int | None:
+        """
+        计算压缩的分界位置，之前的消息被总结，之后的消息保留原文
+
+        分界处必须是一条用户消息，避免拆开工具调用与其结果
+
+        :return: 分界位置，不需要压缩时返回None
+        """
+        if self._length(history) < self.threshold:
+            return None
+        split = max(len(history) - self.keep_recent, 0)
+        while split < len(history) and history[split].get("role") != ContextRole.USER.value:
+            split += 1
+        # 至少需要两条消息 (只有上一次的摘要时没有必要再总结)
+        if split < 2 or split >= len(history):
+            return None
+        return split
+
+    @staticmethod
+    def _transcript(messages: list[dict]) -> str:
+        """将消息转换为供模型总结的文本"""
+        lines = []
+        for message in messages:
+            content = message.get("content") or ""
+            if not content:
+                continue
+            lines.append(f"{message.get('name') or message.get('role')}: {content}")
+        return "\n".join(lines)
+
+    async def _summarize(self, user_id: str, messages: list[dict]) -> str:
+        """调用模型总结消息"""
+        task_start_time = time.time_ns()
+        api = self.apiinfo.find_type(model_type = self.model_type)[0]
+        request = CallAPI.Request()
+        request.url = api.url
+        request.model = api.model_id
+        request.key = api.api_key
+        request.user_name = user_id
+        request.max_tokens = self.max_tokens
+        request.max_completion_tokens = self.max_tokens
+        request.stream = False
+        request.print_chunk = False
+        request.context = ContextObject(
+            prompt = ContentUnit(role = ContextRole.SYSTEM, content = self.instruction),
+            context_list = [ContentUnit(role = ContextRole.USER, content = self._transcript(messages))]
+        )
+        call_prepare_end_time = time.time_ns()
+        with get_tracer().span("context.compaction.summarize", **{"context.messages": len(messages), "model.id": api.model_id}) as span:
+            response = await self.api_client.submit_Request(user_id = user_id, request = request)
+            if span is not None:
+                span.set_attributes(**{"call_log.id": response.calling_log.id})
+
+        # 与对话一样记录调用日志，使后台总结的开销可见
+        call_log = response.calling_log
+        call_log.task_start_time = task_start_time
+        call_log.call_prepare_start_time = task_start_time
+        call_log.call_prepare_end_time = call_prepare_end_time
+        call_log.created_time = response.created
+        call_log.task_end_time = time.time_ns()
+        if span is not None:
+            call_log.trace_id = span.trace_id
+        if self.calllog is not None:
+            await self.calllog.add_call_log(call_log)
+        if self.prompt_cache_stats is not None and not response.cached:
+            self.prompt_cache_stats.record(call_log)
+        if response.token_usage is not None:
+            logger.info(
+                f"Compaction tokens: {response.token_usage.prompt_tokens} prompt, {response.token_usage.completion_tokens} completion",
+                user_id = user_id
+            )
+        return response.context.last_content.content.strip()
+
+    async def compact(self, user_id: str) -> bool:
+        """
+        压缩一个用户当前分支的历史记录
+
+        :param user_id: 用户ID
+        :return: 是否进行了压缩
+        """
+        branch = await self.context.get_default_item_id(user_id)
+        history = await self.context.load_item(user_id, branch, [])
+        split = self._split_point(history)
+        if split is None:
+            self._counters["skipped"] += 1
+            return False
+        old = history[:split]
+
+        # 调用模型期间不持有会话锁，对话可以照常进行
+        summary = await self._summarize(user_id, old)
+        if not summary:
+            self._counters["skipped"] += 1
+            logger.warning("Empty compaction summary, skipped", user_id = user_id)
+            return False
+        summary_unit = ContentUnit(role = self.role, content = f"{self.summary_prefix}{summary}")
+
+        async with await self._lock_getter(user_id):
+            # 总结期间分支被切换或较早的消息被修改 (如撤回) 时放弃，下一轮对话会重新提交
+            if await self.context.get_default_item_id(user_id) != branch:
+                self._counters["conflicts"] += 1
+                return False
+            current = await self.context.load_item(user_id, branch, [])
+            if current[:split] != old:
+                self._counters["conflicts"] += 1
+                return False
+            # 先写入冷存储，再替换历史记录，中途失败时不会丢失消息
+            await self.archive.save_items(user_id, {f"{branch}.{time.time_ns()}": old})
+            await self.context.save_items(user_id, {branch: summary_unit.as_content + current[split:]})
+
+        self._counters["compacted"] += 1
+        self._counters["archived_messages"] += len(old)
+        logger.info(f"Compacted {len(old)} messages into a summary ({len(summary)} chars)", user_id = user_id)
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        """
+        获取压缩统计
+
+        :return: 各类任务的计数与当前排队数量
+        """
+        return {
+            **self._counters,
+            "queued": self._queue.qsize(),
+            "threshold": self.threshold,
+            "model_type": self.model_type,
+        }
+
+    async def shutdown(self) -> None:
+        """停止后台任务并丢弃未处理的任务"""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        self._pending.clear()
@@ -4,8 +4,11 @@ from ._object import (
     CallingFunction,
     FunctionParameters,
     CallingFunctionRequest,
-    CallingFunctionResponse
+    CallingFunctionResponse,
+    FunctionChoice
 )
+from . import _exceptions as Exceptions
 
 from ._contextLoader import ContextLoader
+from ._snapshot import SessionSnapshot, load_session_snapshot
 from ._load_prompt_variable import LoadPromptVariable
\ No newline at end of file
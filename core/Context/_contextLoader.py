@@ -1,5 +1,6 @@
 # ==== 标准库 ==== #
 import copy
+import shlex
 import aiofiles
 from typing import (
     Any,
@@ -28,11 +29,13 @@ from ._object import (
     ContextRole
 )
 from ._exceptions import *
+from ._snapshot import SessionSnapshot
+from ..Tracing import get_tracer
 from TextProcessors import (
     PromptVP,
     limit_blank_lines,
 )
-from PathProcessors import validate_path, sanitize_filename_async
+from PathProcessors import validate_path, sanitize_filename_cached
 from ConfigManager import ConfigLoader
 
 # ==== 本模块代码 ==== #
@@ -51,8 +54,42 @@ class ContextLoader:
         self.context: ContextManager = context
         self.prompt_vp: PromptVP = prompt_vp
     
-    async def _load_prompt(self, context:ContextObject, user_id: str) -> ContextObject:
-        user_prompt:str = await self.prompt.load(user_id=user_id, default='')
+    async def _load_prompt(self, context:ContextObject, user_id: str, snapshot: SessionSnapshot | None = None) -> ContextObject:
+        with get_tracer().span("context.prompt_load"):
+            prompt = await self._read_prompt(user_id, snapshot)
+        # 展开变量
+        if configs.get_config("Prompt_Prefix_Stable", False).get_value(bool):
+            prompt, volatile_values = await self._expand_stable_prefix(prompt, user_id=user_id)
+            if volatile_values:
+                header = configs.get_config("Prompt_Volatile_Header", "系统提示词中变量的当前值：").get_value(str)
+                context.volatile = ContentUnit(
+                    role = ContextRole.SYSTEM,
+                    content = "\n".join([header, *(f"{{{name}}} = {value}" for name, value in volatile_values.items())])
+                )
+        else:
+            prompt = await self._expand_variables(prompt, variables = self.prompt_vp, user_id=user_id)
+
+        # 创建Content单元
+        prompt = ContentUnit(
+            role = ContextRole.SYSTEM,
+            content = prompt
+        )
+        # 将Content单元加入Context
+        context.prompt = prompt
+        return context
+
+    async def _read_prompt(self, user_id: str, snapshot: SessionSnapshot | None = None) -> str:
+        """
+        读取用户提示词，没有时读取默认提示词文件
+
+        :param user_id: 用户ID
+        :param snapshot: 会话快照，提供时使用其中的提示词与配置
+        :return: 未展开变量的提示词
+        """
+        if snapshot is not None and snapshot.prompt is not None:
+            user_prompt:str = snapshot.prompt
+        else:
+            user_prompt:str = await self.prompt.load(user_id=user_id, default='')
         if user_prompt:
             # 使用用户提示词
             prompt = user_prompt
@@ -62,13 +99,13 @@ class ContextLoader:
             default_prompt_dir = configs.get_config("Default_Prompt_Dir", Path()).get_value(Path)
             if default_prompt_dir.exists():
                 # 如果存在默认提示词文件，则加载默认提示词文件
-                config = await self.config.load(user_id)
+                config = snapshot.context_config if snapshot is not None else await self.config.load(user_id)
                 
                 # 获取默认提示词文件名
                 parset_prompt_name = config.get("parset_prompt_name", configs.get_config("parset_prompt_name", "default").get_value(str))
 
                 # 加载默认提示词文件
-                default_prompt_file = default_prompt_dir / f'{await sanitize_filename_async(parset_prompt_name)}.txt'
+                default_prompt_file = default_prompt_dir / f'{sanitize_filename_cached(parset_prompt_name)}.txt'
                 if not validate_path(default_prompt_dir, default_prompt_file):
                     raise InvalidPromptPathError(f"Invalid Prompt Path: {default_prompt_file}")
                 if default_prompt_file.exists():
@@ -81,17 +118,7 @@ class ContextLoader:
             else:
                 logger.warning(f"Default Prompt Directory Not Found: {default_prompt_dir}", user_id = user_id)
                 prompt = ""
-        # 展开变量
-        prompt = await self._expand_variables(prompt, variables = self.prompt_vp, user_id=user_id)
-
-        # 创建Content单元
-        prompt = ContentUnit(
-            role = ContextRole.SYSTEM,
-            content = prompt
-        )
-        # 将Content单元加入Context
-        context.prompt = prompt
-        return context
+        return prompt
 
     async def _append_context(
             self,
@@ -100,7 +127,8 @@ class ContextLoader:
             new_message: str,
             role: str = 'user',
             role_name: str | None = None,
-            continue_completion: bool = False
+            continue_completion: bool = False,
+            snapshot: SessionSnapshot | None = None
         ) -> ContextObject:
         """
         添加上下文
@@ -111,20 +139,26 @@ class ContextLoader:
         :param role: 角色
         :param roleName: 角色名称
         :param continue_completion: 是否继续完成
+        :param snapshot: 会话快照，提供时使用其中的历史记录
         :return: 上下文对象
         """
-        try:
-            context_list = await self.context.load(user_id=user_id, default=[])
-        except orjson.JSONDecodeError:
-            raise ContextLoadingSyntaxError(f"Context File Syntax Error: {user_id}")
         if not continue_completion:
+            if snapshot is not None and snapshot.context is not None:
+                context_list = snapshot.context
+            else:
+                try:
+                    with get_tracer().span("context.history_load"):
+                        context_list = await self.context.load(user_id=user_id, default=[])
+                except orjson.JSONDecodeError:
+                    raise ContextLoadingSyntaxError(f"Context File Syntax Error: {user_id}")
             # 构建上下文对象
             contextObj = ContextObject()
             content = ContentUnit()
             content.content = await self._expand_variables(new_message, variables = self.prompt_vp, user_id=user_id)
             content.role = ContextRole(role)
             content.role_name = role_name
-            contextObj.update_from_context(context_list)
+            with get_tracer().span("context.parse", **{"context.messages": len(context_list)}):
+                contextObj.update_from_context(context_list)
             logger.info(f"Load Context: {len(contextObj.context_list)}", user_id = user_id)
 
             # 添加上下文
@@ -141,7 +175,8 @@ class ContextLoader:
             role: str = 'user',
             role_name: str | None = None,
             load_prompt: bool = True,
-            continue_completion: bool = False
+            continue_completion: bool = False,
+            snapshot: SessionSnapshot | None = None
         ) -> ContextObject:
         """
         加载上下文
@@ -152,10 +187,11 @@ class ContextLoader:
         :param roleName: 角色名称
         :param load_prompt: 是否加载提示词
         :param continue_completion: 是否继续生成
+        :param snapshot: 会话快照 (见 load_session_snapshot)，提供时不再单独读取提示词、配置与历史记录
         """
         # 如果允许添加提示词，就加载提示词，否则使用空上下文对象
         if load_prompt:
-            context = await self._load_prompt(ContextObject(), user_id=user_id)
+            context = await self._load_prompt(ContextObject(), user_id=user_id, snapshot=snapshot)
         else:
             context = ContextObject()
         
@@ -166,10 +202,44 @@ class ContextLoader:
             new_message = message,
             role = role,
             role_name = role_name,
-            continue_completion = continue_completion
+            continue_completion = continue_completion,
+            snapshot = snapshot
         )
         return context
     
+    async def _expand_stable_prefix(self, prompt: str, user_id: str) -> tuple[str, dict[str, str]]:
+        """
+        展开提示词，易变变量保留为原样的 {变量}，其值另外返回
+
+        供应商的上下文缓存按前缀匹配，提示词中每轮都变化的值 (如精确到秒的时间) 会使整个上下文无法命中缓存；
+        将这些值移到消息末尾后，提示词与历史记录组成的前缀在各轮之间保持不变。
+        同一轮中相同的表达式只求值一次，例如出现两次的 {random 1 100} 取同一个值 (提示词中两处写法相同，无法区分各自的值)
+
+        :param prompt: 提示词
+        :param user_id: 用户ID
+        :return: 展开后的提示词，以及 {变量表达式: 值}
+        """
+        volatile_names = configs.get_config("Prompt_Volatile_Variables", ["time", "random", "randfloat", "randchoice"]).get_value(list)
+        values: dict[str, str] = {}
+
+        def defer(name: str, value: Any):
+            def deferred(*args, **kwargs) -> str:
+                # 参数按shlex规则重新加引号，保持与模板相同的参数划分 (如 {randchoice 'a b' c})
+                expression = shlex.join((name, *args))
+                if expression not in values:
+                    values[expression] = str(value(*args, **kwargs) if callable(value) else value)
+                return f"{{{expression}}}"
+            return deferred
+
+        # 在副本上替换易变变量，不影响共享的变量表
+        variables = copy.copy(self.prompt_vp)
+        variables.variables = {
+            name: defer(name, value) if name in volatile_names else value
+            for name, value in self.prompt_vp.variables.items()
+        }
+        prompt = await self._expand_variables(prompt, variables = variables, user_id=user_id)
+        return prompt, values
+
     async def _expand_variables(self, prompt: str, variables: PromptVP, user_id: str) -> str:
         """
         展开变量
@@ -178,11 +248,12 @@ class ContextLoader:
         :param variables: 变量
         :param user_id: 用户ID
         """
-        variables.reset_counter()
-        prompt = variables.process(prompt)
-        logger.info(f"Prompt Hits Variable: {variables.hit_var()}/{variables.discover_var()}({variables.hit_var() / variables.discover_var() if variables.discover_var() != 0 else 0:.2%})", user_id = user_id)
-        variables.reset_counter()
-        prompt = limit_blank_lines(prompt)
+        with get_tracer().span("context.variable_expansion", **{"text.length": len(prompt)}):
+            variables.reset_counter()
+            prompt = variables.process(prompt)
+            logger.info(f"Prompt Hits Variable: {variables.hit_var()}/{variables.discover_var()}({variables.hit_var() / variables.discover_var() if variables.discover_var() != 0 else 0:.2%})", user_id = user_id)
+            variables.reset_counter()
+            prompt = limit_blank_lines(prompt)
         return prompt
 
     async def save(
@@ -196,4 +267,5 @@ class ContextLoader:
         :param user_id: 用户ID
         :param context: 上下文对象
         """
+        context.validate()
         await self.context.save(user_id, context.context)
\ No newline at end of file
@@ -82,14 +82,16 @@ class CallingFunctionRequest:
                     'name': self.func_choice_name
                 }
             }
+        elif self.func_choice is None:
+            return None
         else:
             return self.func_choice.value
     
     @property
     def tools(self) -> list[dict]:
-        return [f.as_dict() for f in self.functions]
+        return [f.as_dict for f in self.functions]
 
-@dataclass
+@dataclass(slots=True)
 class FunctionResponseUnit:
     """
     FunctionCalling响应对象单元
@@ -122,14 +124,14 @@ class FunctionResponseUnit:
     @property
     def as_dict(self) -> dict:
         """
-        OpenAI兼容的FunctionCalling响应对象单元格式
+        OpenAI兼容的FunctionCalling响应对象单元格式 (arguments 保持为模型输出的原始字符串)
         """
         return {
             'id': self.id,
             'type': self.type,
             'function':{
                 'name': self.name,
-                'arguments': self.arguments
+                'arguments': self.arguments_str
             }
         }
     
@@ -226,7 +228,10 @@ class ContextRole(Enum):
     ASSISTANT = "assistant"
     FUNCTION = "tool"
 
-@dataclass
+# 合法的角色值
+_ROLE_VALUES: frozenset[str] = frozenset(role.value for role in ContextRole)
+
+@dataclass(slots=True)
 class ContentUnit:
     """
     上下文单元
@@ -267,8 +272,9 @@ class ContentUnit:
         OpenAI Message兼容格式列表单元
         """
         content_list = []
-        if self.content:
-            if self.role in {ContextRole.SYSTEM, ContextRole.USER}:
+        has_tool_calls = self.funcResponse is not None and bool(self.funcResponse.callingFunctionResponse)
+        if self.role in {ContextRole.SYSTEM, ContextRole.USER}:
+            if self.content:
                 content = {
                     "role": self.role.value,
                     "content": self.content
@@ -277,7 +283,9 @@ class ContentUnit:
                     content["name"] = self.role_name
                 content_list.append(content)
 
-            elif self.role == ContextRole.ASSISTANT:
+        elif self.role == ContextRole.ASSISTANT:
+            # 只有工具调用的回复正文为空，也需要保留
+            if self.content or has_tool_calls:
                 assistant_content = {
                     "role": self.role.value,
                     "content": self.content,
@@ -288,17 +296,17 @@ class ContentUnit:
                     assistant_content["prefix"] = self.prefix
                 if self.reasoning_content:
                     assistant_content["reasoning_content"] = self.reasoning_content
-                if self.funcResponse:
+                if has_tool_calls:
                     assistant_content["tool_calls"] = self.funcResponse.as_content
                 content_list.append(assistant_content)
-        if self.funcResponse:
-            if self.role == ContextRole.FUNCTION:
-                tool_content = {
-                    "role": self.role.value,
-                    "content": self.content,
-                    "tool_call_id": self.tool_call_id
-                }
-                content_list.append(tool_content)
+
+        elif self.role == ContextRole.FUNCTION:
+            tool_content = {
+                "role": self.role.value,
+                "content": self.content,
+                "tool_call_id": self.tool_call_id
+            }
+            content_list.append(tool_content)
         
         return content_list
     
@@ -317,7 +325,7 @@ class ContentUnit:
             raise ContextNecessaryFieldsMissingError("Not found role field")
         elif not isinstance(context["role"], str):
             raise ContextFieldTypeError("role field is not str")
-        elif context["role"] not in [role.value for role in ContextRole]:
+        elif context["role"] not in _ROLE_VALUES:
             raise ContextInvalidRoleError(f"Invalid role: {context['role']}")
         else:
             try:
@@ -332,6 +340,12 @@ class ContentUnit:
         else:
             content.content = context["content"]
         
+        if "name" in context:
+            if not isinstance(context["name"], str):
+                raise ContextFieldTypeError("name field is not str")
+            else:
+                content.role_name = context["name"]
+        
         if "reasoning_content" in context:
             if not isinstance(context["reasoning_content"], str):
                 raise ContextFieldTypeError("reasoning_content field is not str")
@@ -364,24 +378,41 @@ class ContentUnit:
 class ContextObject:
     """
     上下文对象
+
+    context_list 中的历史消息以读取时的原始字典保存，只有在需要修改时才提升为 ContentUnit，
+    避免每轮对话都重新校验并构建全部历史消息。原始字典都来自 ContentUnit.as_content 的输出，
+    写入时已经是合法的格式，因此读取时不再重复校验
     """
     prompt: ContentUnit | None = None
-    context_list: list[ContentUnit] = field(default_factory=list)
+    context_list: list[ContentUnit | dict] = field(default_factory=list)
+    # 每轮都会变化的信息 (如当前时间)，只在请求时放在消息末尾，不写入历史记录
+    volatile: ContentUnit | None = None
 
     def __len__(self):
         return len(self.context_list)
     
-    def update_from_context(self, context: list[dict]) -> None:
+    def update_from_context(self, context: list[dict], lazy: bool = True) -> None:
         """
         从上下文列表更新上下文
         
         :param context: 上下文列表
+        :param lazy: 是否保留原始字典，延迟到修改时再构建上下文单元
         :return: 构建的对象
         """
-        other = self.from_context(context)
+        other = self.from_context(context, lazy = lazy)
         self.context_list = other.context_list
         self.prompt = other.prompt
 
+    @staticmethod
+    def _raw_length(content: dict) -> int:
+        """
+        原始字典的长度，与 ContentUnit.__len__ 一致
+        """
+        reasoning_content = content.get("reasoning_content")
+        if reasoning_content:
+            return len(reasoning_content)
+        return len(content.get("content") or "")
+
     @property
     def total_length(self) -> int:
         """
@@ -389,7 +420,10 @@ class ContextObject:
         
         :return: 上下文总长度
         """
-        return sum([len(content) for content in self.context_list]) + (len(self.prompt) if self.prompt else 0)
+        return sum(
+            self._raw_length(content) if isinstance(content, dict) else len(content)
+            for content in self.context_list
+        ) + (len(self.prompt) if self.prompt else 0)
 
     @property
     def context(self) -> list[dict]:
@@ -397,8 +431,10 @@ class ContextObject:
         获取上下文
         """
         context_list = []
-        if self.context_list:
-            for content in self.context_list:
+        for content in self.context_list:
+            if isinstance(content, dict):
+                context_list.append(content)
+            else:
                 context_list += content.as_content
         return context_list
     
@@ -406,12 +442,32 @@ class ContextObject:
     def full_context(self) -> list[dict]:
         """
         获取上下文，如果有提示词，则添加到最前面
+
+        易变信息放在最后 (续写的前缀消息之前)，使提示词与历史记录组成的前缀在各轮之间保持不变
         """
         context_list = self.context
         if self.prompt:
             context_list = self.prompt.as_content + context_list
+        if self.volatile:
+            if context_list and context_list[-1].get("prefix"):
+                context_list[-1:-1] = self.volatile.as_content
+            else:
+                context_list += self.volatile.as_content
         return context_list
     
+    def get_unit(self, index: int) -> ContentUnit:
+        """
+        获取指定位置的上下文单元，原始字典会在此时被提升为上下文单元
+
+        :param index: 索引
+        :return: 上下文单元
+        """
+        content = self.context_list[index]
+        if isinstance(content, dict):
+            content = ContentUnit.from_content(content)
+            self.context_list[index] = content
+        return content
+
     @property
     def last_content(self) -> ContentUnit:
         """
@@ -419,7 +475,7 @@ class ContextObject:
         """
         if not self.context_list:
             self.context_list.append(ContentUnit())
-        return self.context_list[-1]
+        return self.get_unit(-1)
     
     def append(self, content: ContentUnit) -> None:
         """
@@ -434,16 +490,40 @@ class ContextObject:
         """
         return not self.prompt and not self.context_list
     
+    def validate(self) -> None:
+        """
+        校验新增或修改过的上下文单元，在写入前调用
+
+        原始字典在上次写入时已经校验过，这里不会重复校验
+
+        :raise ContextSyntaxError: 上下文单元格式错误
+        """
+        for content in self.context_list:
+            if isinstance(content, dict):
+                continue
+            for message in content.as_content:
+                ContentUnit.from_content(message)
+    
     @classmethod
-    def from_context(cls, context: list[dict]) -> "ContextObject":
+    def from_context(cls, context: list[dict], lazy: bool = True) -> "ContextObject":
         """
         从上下文列表构建对象
+
+        延迟模式下只检查每条消息是否为带有合法角色的字典，完整的校验推迟到提升为上下文单元时
         
         :param context: 上下文列表
+        :param lazy: 是否保留原始字典，延迟到修改时再构建上下文单元
         :return: 构建的对象
         """
         contextObj = cls()
-        contextObj.context_list = []
+        if not lazy:
+            contextObj.context_list = [ContentUnit.from_content(content) for content in context]
+            return contextObj
+        
         for content in context:
-            contextObj.context_list.append(ContentUnit().from_content(content))
+            if not isinstance(content, dict):
+                raise ContextFieldTypeError("context item is not dict")
+            if content.get("role") not in _ROLE_VALUES:
+                raise ContextInvalidRoleError(f"Invalid role: {content.get('role')}")
+        contextObj.context_list = list(context)
         return contextObj
\ No newline at end of file
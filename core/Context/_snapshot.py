@@ -0,0 +1,89 @@
+# ==== 标准库 ==== #
+import asyncio
+from typing import Any
+from dataclasses import dataclass, field
+
+# ==== 第三方库 ==== #
+import orjson
+
+# ==== 自定义库 ==== #
+from ..DataManager import (
+    PromptManager,
+    ContextManager
+)
+from ..UserConfigManager import (
+    ConfigManager,
+    Configs
+)
+from ..Tracing import get_tracer
+from ._exceptions import ContextLoadingSyntaxError
+
+@dataclass(slots=True)
+class SessionSnapshot:
+    """
+    一轮对话所需的用户数据
+
+    由 load_session_snapshot 一次性并发读取，整轮对话都使用这一份数据，不再重复读取
+    """
+    user_id: str = ""
+    # 历史记录与提示词所属的用户 (引用其他用户的上下文时与 user_id 不同)
+    context_user_id: str = ""
+    # 当前用户的配置
+    config: Configs = field(default_factory=Configs)
+    # 上下文所属用户的配置 (用于选择默认提示词文件)
+    context_config: Configs = field(default_factory=Configs)
+    # 上下文所属用户的提示词，None表示没有加载
+    prompt: str | None = None
+    # 上下文所属用户的历史记录，None表示没有加载
+    context: list[dict[str, Any]] | None = None
+
+async def _load_context(context: ContextManager, user_id: str) -> list[dict[str, Any]]:
+    """读取历史记录，格式错误时与单独读取时一样抛出 ContextLoadingSyntaxError"""
+    try:
+        return await context.load(user_id = user_id, default = [])
+    except orjson.JSONDecodeError:
+        raise ContextLoadingSyntaxError(f"Context File Syntax Error: {user_id}")
+
+async def load_session_snapshot(
+        config: ConfigManager,
+        prompt: PromptManager,
+        context: ContextManager,
+        user_id: str,
+        context_user_id: str | None = None,
+        load_prompt: bool = True,
+        load_context: bool = True,
+    ) -> SessionSnapshot:
+    """
+    并发读取一轮对话需要的配置、提示词与历史记录
+
+    各管理器可以配置为不同的存储后端，因此按管理器分别读取，而不是合并为一次查询
+
+    :param config: 用户配置管理器
+    :param prompt: 提示词管理器
+    :param context: 上下文管理器
+    :param user_id: 用户ID
+    :param context_user_id: 历史记录与提示词所属的用户ID，默认与 user_id 相同
+    :param load_prompt: 是否读取提示词
+    :param load_context: 是否读取历史记录
+    :return: 会话快照
+    :raise ContextLoadingSyntaxError: 历史记录格式错误
+    """
+    context_user_id = context_user_id or user_id
+    with get_tracer().span("context.snapshot_load", **{"snapshot.prompt": load_prompt, "snapshot.context": load_context}):
+        tasks = [config.load(user_id)]
+        if context_user_id != user_id:
+            tasks.append(config.load(context_user_id))
+        if load_prompt:
+            tasks.append(prompt.load(user_id = context_user_id, default = ''))
+        if load_context:
+            tasks.append(_load_context(context, context_user_id))
+        results = iter(await asyncio.gather(*tasks))
+
+    snapshot = SessionSnapshot(user_id = user_id, context_user_id = context_user_id)
+    snapshot.config = next(results)
+    snapshot.context_config = next(results) if context_user_id != user_id else snapshot.config
+    if load_prompt:
+        snapshot.prompt = next(results)
+    if load_context:
+        snapshot.context = next(results)
+    return snapshot
@@ -0,0 +1,201 @@
+# ==== 标准库 ==== #
+import asyncio
+import threading
+from typing import Any
+from pathlib import Path
+
+# ==== 第三方库 ==== #
+import orjson
+
+# lmdb 为可选依赖，仅在使用该后端时需要
+try:
+    import lmdb
+except ImportError:
+    lmdb = None
+
+# ==== 自定义库 ==== #
+from PathProcessors import sanitize_filename
+from ConfigManager import ConfigLoader
+from .._user_mainmanager_interface import UserMainManagerInterface
+
+configs = ConfigLoader()
+
+# 键空间: 各部分以 \x00 分隔
+_USER_PREFIX = b"u\x00"
+_METADATA_PREFIX = b"m\x00"
+_ITEM_PREFIX = b"i\x00"
+_SEP = b"\x00"
+
+# 同一进程中每个数据库目录只能打开一个环境
+_environments: dict[Path, "lmdb.Environment"] = {}
+_environments_lock = threading.Lock()
+
+class LMDBNotInstalledError(RuntimeError):
+    """使用LMDB后端时未安装 lmdb"""
+    pass
+
+def _open_environment(path: Path, map_size: int) -> "lmdb.Environment":
+    if lmdb is None:
+        raise LMDBNotInstalledError("lmdb is required for the LMDB user data backend")
+    path = path.resolve()
+    with _environments_lock:
+        env = _environments.get(path)
+        if env is None:
+            path.mkdir(parents=True, exist_ok=True)
+            env = lmdb.open(str(path), map_size = map_size, subdir = True, max_dbs = 0)
+            _environments[path] = env
+        return env
+
+class LMDBMainManager(UserMainManagerInterface):
+    """
+    基于LMDB内存映射键值存储的用户数据管理器
+
+    读取直接在内存映射上进行，不经过线程池；写事务由LMDB串行化，在线程中执行
+    """
+    def __init__(self, base_name: str, cache_metadata:bool = False, cache_data:bool = False, sub_dir_name:str = "ParallelData"):
+        self._base_name = sanitize_filename(base_name)
+        self._prefix = self._base_name.encode() + _SEP
+        self._env = _open_environment(
+            configs.get_config("User_Data_LMDB_Path", "./data/userdata.lmdb").get_value(Path),
+            configs.get_config("User_Data_LMDB_Map_Size", 1 << 30).get_value(int),
+        )
+
+        # 读取本身即为内存访问，不需要额外缓存
+        self.cache_metadata = cache_metadata
+        self.cache_data = cache_data
+        self.sub_dir_name = sub_dir_name
+
+    # region > 键
+    def _user_key(self, user_id: str) -> bytes:
+        return _USER_PREFIX + self._prefix + user_id.encode()
+
+    def _metadata_key(self, user_id: str) -> bytes:
+        return _METADATA_PREFIX + self._prefix + user_id.encode()
+
+    def _item_prefix(self, user_id: str) -> bytes:
+        return _ITEM_PREFIX + self._prefix + user_id.encode() + _SEP
+
+    def _item_key(self, user_id: str, item: str) -> bytes:
+        return self._item_prefix(user_id) + item.encode()
+    # endregion
+
+    @staticmethod
+    def _decode(fdata: bytes | None) -> Any:
+        if fdata is None:
+            return None
+        try:
+            return orjson.loads(fdata)
+        except orjson.JSONDecodeError:
+            return None
+
+    def _get_item(self, txn: "lmdb.Transaction", user_id: str) -> str:
+        metadata = self._decode(txn.get(self._metadata_key(user_id)))
+        if isinstance(metadata, dict):
+            item = metadata.get('default_item', 'default')
+        else:
+            item = 'default'
+        return sanitize_filename(item)
+
+    def _scan(self, prefix: bytes) -> list[str]:
+        """列出指定前缀下的所有键 (去掉前缀)"""
+        names = []
+        with self._env.begin() as txn:
+            cursor = txn.cursor()
+            if not cursor.set_range(prefix):
+                return names
+            for key in cursor.iternext(keys = True, values = False):
+                if not key.startswith(prefix):
+                    break
+                names.append(key[len(prefix):].decode())
+        return names
+
+    async def load(self, user_id: str, default: Any = None) -> Any:
+        user_id = sanitize_filename(user_id)
+        with self._env.begin() as txn:
+            fdata = txn.get(self._item_key(user_id, self._get_item(txn, user_id)))
+        if fdata is None:
+            return default
+        try:
+            return orjson.loads(fdata)
+        except orjson.JSONDecodeError:
+            return default
+
+    async def save(self, user_id: str, data: Any) -> None:
+        user_id = sanitize_filename(user_id)
+        fdata = orjson.dumps(data)
+        def _save() -> None:
+            with self._env.begin(write = True) as txn:
+                txn.put(self._user_key(user_id), b"")
+                txn.put(self._item_key(user_id, self._get_item(txn, user_id)), fdata)
+        await asyncio.to_thread(_save)
+
+    async def delete(self, user_id: str) -> None:
+        user_id = sanitize_filename(user_id)
+        def _delete() -> None:
+            with self._env.begin(write = True) as txn:
+                txn.delete(self._item_key(user_id, self._get_item(txn, user_id)))
+        await asyncio.to_thread(_delete)
+
+    async def set_default_item_id(self, user_id: str, item: str) -> None:
+        user_id = sanitize_filename(user_id)
+        def _set() -> None:
+            with self._env.begin(write = True) as txn:
+                metadata = self._decode(txn.get(self._metadata_key(user_id)))
+                if isinstance(metadata, dict):
+                    metadata['default_item'] = item
+                else:
+                    metadata = {'default_item': item}
+                txn.put(self._user_key(user_id), b"")
+                txn.put(self._metadata_key(user_id), orjson.dumps(metadata))
+        await asyncio.to_thread(_set)
+
+    async def get_default_item_id(self, user_id: str) -> str:
+        user_id = sanitize_filename(user_id)
+        with self._env.begin() as txn:
+            metadata = self._decode(txn.get(self._metadata_key(user_id)))
+        if isinstance(metadata, dict):
+            return metadata.get('default_item', 'default')
+        return 'default'
+
+    async def load_item(self, user_id: str, item: str, default: Any = None) -> Any:
+        user_id = sanitize_filename(user_id)
+        with self._env.begin() as txn:
+            fdata = txn.get(self._item_key(user_id, sanitize_filename(item)))
+        if fdata is None:
+            return default
+        try:
+            return orjson.loads(fdata)
+        except orjson.JSONDecodeError:
+            return default
+
+    async def save_items(self, user_id: str, items: dict[str, Any]) -> None:
+        user_id = sanitize_filename(user_id)
+        encoded = [(self._item_key(user_id, sanitize_filename(item)), orjson.dumps(data)) for item, data in items.items()]
+        def _save() -> None:
+            # 所有条目在同一个写事务中提交
+            with self._env.begin(write = True) as txn:
+                txn.put(self._user_key(user_id), b"")
+                for key, fdata in encoded:
+                    txn.put(key, fdata)
+        await asyncio.to_thread(_save)
+
+    async def fork_item(self, user_id: str, source: str, target: str) -> None:
+        user_id = sanitize_filename(user_id)
+        source_key = self._item_key(user_id, sanitize_filename(source))
+        target_key = self._item_key(user_id, sanitize_filename(target))
+        def _fork() -> None:
+            # 在同一个写事务中复制，不经过反序列化
+            with self._env.begin(write = True) as txn:
+                fdata = txn.get(source_key)
+                if fdata is None:
+                    txn.delete(target_key)
+                else:
+                    txn.put(target_key, fdata)
+        await asyncio.to_thread(_fork)
+
+    async def get_all_user_id(self) -> list:
+        return await asyncio.to_thread(self._scan, _USER_PREFIX + self._prefix)
+
+    async def get_all_item_id(self, user_id: str) -> list:
+        user_id = sanitize_filename(user_id)
+        return await asyncio.to_thread(self._scan, self._item_prefix(user_id))
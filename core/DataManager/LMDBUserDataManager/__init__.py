@@ -0,0 +1 @@
+from ._LMDBMainManager import LMDBMainManager, LMDBNotInstalledError
\ No newline at end of file
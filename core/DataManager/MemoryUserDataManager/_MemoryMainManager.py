@@ -0,0 +1,97 @@
+# ==== 标准库 ==== #
+from typing import Any
+
+# ==== 第三方库 ==== #
+import orjson
+
+# ==== 自定义库 ==== #
+from PathProcessors import sanitize_filename
+from .._user_mainmanager_interface import UserMainManagerInterface
+
+class MemoryMainManager(UserMainManagerInterface):
+    """
+    进程内存中的用户数据管理器
+
+    数据以序列化后的形式保存，读取时返回新的对象，与持久化后端的行为一致；
+    进程退出后数据即丢失，用于基准测试与一致性检查
+    """
+    def __init__(self, base_name: str, cache_metadata:bool = False, cache_data:bool = False, sub_dir_name:str = "ParallelData"):
+        self._base_name = sanitize_filename(base_name)
+        # user_id -> 元数据
+        self._metadata: dict[str, bytes] = {}
+        # user_id -> {item_id -> 数据}
+        self._items: dict[str, dict[str, bytes]] = {}
+
+        self.cache_metadata = cache_metadata
+        self.cache_data = cache_data
+        self.sub_dir_name = sub_dir_name
+
+    def _get_metadata(self, user_id: str) -> Any:
+        fdata = self._metadata.get(user_id)
+        return None if fdata is None else orjson.loads(fdata)
+
+    def _get_item(self, user_id: str) -> str:
+        metadata = self._get_metadata(user_id)
+        if isinstance(metadata, dict):
+            item = metadata.get('default_item', 'default')
+        else:
+            item = 'default'
+        return sanitize_filename(item)
+
+    async def load(self, user_id: str, default: Any = None) -> Any:
+        user_id = sanitize_filename(user_id)
+        fdata = self._items.get(user_id, {}).get(self._get_item(user_id))
+        if fdata is None:
+            return default
+        return orjson.loads(fdata)
+
+    async def save(self, user_id: str, data: Any) -> None:
+        user_id = sanitize_filename(user_id)
+        self._items.setdefault(user_id, {})[self._get_item(user_id)] = orjson.dumps(data)
+
+    async def delete(self, user_id: str) -> None:
+        user_id = sanitize_filename(user_id)
+        self._items.get(user_id, {}).pop(self._get_item(user_id), None)
+
+    async def set_default_item_id(self, user_id: str, item: str) -> None:
+        user_id = sanitize_filename(user_id)
+        metadata = self._get_metadata(user_id)
+        if isinstance(metadata, dict):
+            metadata['default_item'] = item
+        else:
+            metadata = {'default_item': item}
+        self._metadata[user_id] = orjson.dumps(metadata)
+        self._items.setdefault(user_id, {})
+
+    async def get_default_item_id(self, user_id: str) -> str:
+        user_id = sanitize_filename(user_id)
+        metadata = self._get_metadata(user_id)
+        if isinstance(metadata, dict):
+            return metadata.get('default_item', 'default')
+        return 'default'
+
+    async def load_item(self, user_id: str, item: str, default: Any = None) -> Any:
+        fdata = self._items.get(sanitize_filename(user_id), {}).get(sanitize_filename(item))
+        if fdata is None:
+            return default
+        return orjson.loads(fdata)
+
+    async def save_items(self, user_id: str, items: dict[str, Any]) -> None:
+        user_items = self._items.setdefault(sanitize_filename(user_id), {})
+        for item, data in items.items():
+            user_items[sanitize_filename(item)] = orjson.dumps(data)
+
+    async def fork_item(self, user_id: str, source: str, target: str) -> None:
+        user_items = self._items.setdefault(sanitize_filename(user_id), {})
+        # 序列化后的数据不可变，直接共享同一个对象
+        fdata = user_items.get(sanitize_filename(source))
+        if fdata is None:
+            user_items.pop(sanitize_filename(target), None)
+        else:
+            user_items[sanitize_filename(target)] = fdata
+
+    async def get_all_user_id(self) -> list:
+        return sorted(self._items)
+
+    async def get_all_item_id(self, user_id: str) -> list:
+        return sorted(self._items.get(sanitize_filename(user_id), {}))
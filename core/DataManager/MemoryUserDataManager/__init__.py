@@ -0,0 +1 @@
+from ._MemoryMainManager import MemoryMainManager
\ No newline at end of file
@@ -0,0 +1,260 @@
+# ==== 标准库 ==== #
+import sqlite3
+from typing import Any
+from pathlib import Path
+
+# ==== 第三方库 ==== #
+import orjson
+
+# ==== 自定义库 ==== #
+from ._connection import SQLiteWorker, get_worker
+from PathProcessors import sanitize_filename
+from ConfigManager import ConfigLoader
+from .._user_mainmanager_interface import UserMainManagerInterface
+from .._pagination import prefix_upper_bound
+
+configs = ConfigLoader()
+
+def _default_item_of(metadata: Any) -> str:
+    """从元数据中取出默认条目名"""
+    if isinstance(metadata, dict):
+        return metadata.get('default_item', 'default')
+    return 'default'
+
+class SQLiteMainManager(UserMainManagerInterface):
+    """
+    基于SQLite的用户数据管理器
+
+    与 MainManager 的语义一致，所有管理器共享同一个数据库文件，以 manager 列区分
+    """
+    def __init__(self, base_name: str, cache_metadata:bool = False, cache_data:bool = False, sub_dir_name:str = "ParallelData"):
+        self._base_name = sanitize_filename(base_name)
+        self._db_path = configs.get_config("User_Data_SQLite_Path", "./data/userdata.sqlite3").get_value(Path)
+        self._worker: SQLiteWorker = get_worker(
+            self._db_path,
+            batch_size = configs.get_config("User_Data_SQLite_Batch_Size", 256).get_value(int),
+            commit_interval = configs.get_config("User_Data_SQLite_Commit_Interval", 0.0).get_value(float),
+        )
+
+        self.cache_metadata = cache_metadata
+        self._metadata_cache: dict[str, Any] = {}
+        self.cache_data = cache_data
+        self._data_cache: dict[tuple[str, str], Any] = {}
+
+        # 数据库中没有子目录，保留该参数仅为兼容接口
+        self.sub_dir_name = sub_dir_name
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    # region > 数据库操作 (在工作线程中执行)
+    def _select_metadata(self, connection: sqlite3.Connection, user_id: str) -> Any:
+        row = connection.execute(
+            "SELECT data FROM metadata WHERE manager = ? AND user_id = ?",
+            (self._base_name, user_id)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return orjson.loads(row[0])
+        except orjson.JSONDecodeError:
+            return None
+
+    def _select_item(self, connection: sqlite3.Connection, user_id: str, item: str) -> tuple[bool, Any]:
+        row = connection.execute(
+            "SELECT data FROM items WHERE manager = ? AND user_id = ? AND item_id = ?",
+            (self._base_name, user_id, item)
+        ).fetchone()
+        if row is None:
+            return False, None
+        try:
+            return True, orjson.loads(row[0])
+        except orjson.JSONDecodeError:
+            return False, None
+
+    def _insert_user(self, connection: sqlite3.Connection, user_id: str) -> None:
+        connection.execute(
+            "INSERT OR IGNORE INTO users (manager, user_id) VALUES (?, ?)",
+            (self._base_name, user_id)
+        )
+    # endregion
+
+    async def _load_metadata(self, user_id: str) -> Any:
+        if self.cache_metadata and user_id in self._metadata_cache:
+            return self._metadata_cache[user_id]
+        metadata = await self._worker.read(lambda c: self._select_metadata(c, user_id))
+        if self.cache_metadata:
+            self._metadata_cache[user_id] = metadata
+        return metadata
+
+    async def load(self, user_id: str, default: Any = None) -> Any:
+        user_id = sanitize_filename(user_id)
+        if self.cache_metadata and user_id in self._metadata_cache:
+            item = sanitize_filename(_default_item_of(self._metadata_cache[user_id]))
+            if self.cache_data and (user_id, item) in self._data_cache:
+                return self._data_cache[(user_id, item)]
+            found, data = await self._worker.read(lambda c: self._select_item(c, user_id, item))
+        else:
+            # 元数据与条目在同一次线程切换中读取
+            def _load(connection: sqlite3.Connection) -> tuple[Any, str, bool, Any]:
+                metadata = self._select_metadata(connection, user_id)
+                item = sanitize_filename(_default_item_of(metadata))
+                return (metadata, item, *self._select_item(connection, user_id, item))
+            metadata, item, found, data = await self._worker.read(_load)
+            if self.cache_metadata:
+                self._metadata_cache[user_id] = metadata
+        if not found:
+            return default
+        if self.cache_data:
+            self._data_cache[(user_id, item)] = data
+        return data
+
+    async def save(self, user_id: str, data: Any) -> None:
+        user_id = sanitize_filename(user_id)
+        fdata = orjson.dumps(data)
+        def _save(connection: sqlite3.Connection) -> str:
+            if self.cache_metadata and user_id in self._metadata_cache:
+                item = sanitize_filename(_default_item_of(self._metadata_cache[user_id]))
+            else:
+                item = sanitize_filename(_default_item_of(self._select_metadata(connection, user_id)))
+            self._insert_user(connection, user_id)
+            connection.execute(
+                "INSERT OR REPLACE INTO items (manager, user_id, item_id, data) VALUES (?, ?, ?, ?)",
+                (self._base_name, user_id, item, fdata)
+            )
+            return item
+        item = await self._worker.write(_save)
+        if self.cache_data:
+            self._data_cache[(user_id, item)] = data
+
+    async def delete(self, user_id: str) -> None:
+        user_id = sanitize_filename(user_id)
+        def _delete(connection: sqlite3.Connection) -> str:
+            item = sanitize_filename(_default_item_of(self._select_metadata(connection, user_id)))
+            connection.execute(
+                "DELETE FROM items WHERE manager = ? AND user_id = ? AND item_id = ?",
+                (self._base_name, user_id, item)
+            )
+            return item
+        item = await self._worker.write(_delete)
+        self._data_cache.pop((user_id, item), None)
+
+    async def set_default_item_id(self, user_id: str, item: str) -> None:
+        user_id = sanitize_filename(user_id)
+        def _set(connection: sqlite3.Connection) -> Any:
+            metadata = self._select_metadata(connection, user_id)
+            if isinstance(metadata, dict):
+                metadata['default_item'] = item
+            else:
+                metadata = {'default_item': item}
+            self._insert_user(connection, user_id)
+            connection.execute(
+                "INSERT OR REPLACE INTO metadata (manager, user_id, data) VALUES (?, ?, ?)",
+                (self._base_name, user_id, orjson.dumps(metadata))
+            )
+            return metadata
+        metadata = await self._worker.write(_set)
+        if self.cache_metadata:
+            self._metadata_cache[user_id] = metadata
+
+    async def get_default_item_id(self, user_id: str) -> str:
+        user_id = sanitize_filename(user_id)
+        return _default_item_of(await self._load_metadata(user_id))
+
+    async def load_item(self, user_id: str, item: str, default: Any = None) -> Any:
+        user_id = sanitize_filename(user_id)
+        item = sanitize_filename(item)
+        if self.cache_data and (user_id, item) in self._data_cache:
+            return self._data_cache[(user_id, item)]
+        found, data = await self._worker.read(lambda c: self._select_item(c, user_id, item))
+        if not found:
+            return default
+        if self.cache_data:
+            self._data_cache[(user_id, item)] = data
+        return data
+
+    async def save_items(self, user_id: str, items: dict[str, Any]) -> None:
+        user_id = sanitize_filename(user_id)
+        rows = [(self._base_name, user_id, sanitize_filename(item), orjson.dumps(data)) for item, data in items.items()]
+        def _save(connection: sqlite3.Connection) -> None:
+            self._insert_user(connection, user_id)
+            connection.executemany(
+                "INSERT OR REPLACE INTO items (manager, user_id, item_id, data) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        await self._worker.write(_save)
+        if self.cache_data:
+            for (_, _, item, _), data in zip(rows, items.values()):
+                self._data_cache[(user_id, item)] = data
+
+    async def fork_item(self, user_id: str, source: str, target: str) -> None:
+        user_id = sanitize_filename(user_id)
+        source = sanitize_filename(source)
+        target = sanitize_filename(target)
+        if source == target:
+            return
+        def _fork(connection: sqlite3.Connection) -> None:
+            # 在数据库内部复制，数据不经过Python
+            connection.execute(
+                "DELETE FROM items WHERE manager = ? AND user_id = ? AND item_id = ?",
+                (self._base_name, user_id, target)
+            )
+            connection.execute(
+                "INSERT INTO items (manager, user_id, item_id, data) "
+                "SELECT manager, user_id, ?, data FROM items WHERE manager = ? AND user_id = ? AND item_id = ?",
+                (target, self._base_name, user_id, source)
+            )
+        await self._worker.write(_fork)
+        self._data_cache.pop((user_id, target), None)
+
+    async def get_all_user_id(self) -> list:
+        return await self._worker.read(
+            lambda c: [row[0] for row in c.execute(
+                "SELECT user_id FROM users WHERE manager = ? ORDER BY user_id",
+                (self._base_name,)
+            )]
+        )
+
+    async def get_all_item_id(self, user_id: str) -> list:
+        user_id = sanitize_filename(user_id)
+        return await self._worker.read(
+            lambda c: [row[0] for row in c.execute(
+                "SELECT item_id FROM items WHERE manager = ? AND user_id = ? ORDER BY item_id",
+                (self._base_name, user_id)
+            )]
+        )
+
+    @staticmethod
+    def _page_clause(column: str, prefix: str, after: str | None, limit: int | None) -> tuple[str, tuple]:
+        """生成分页查询的条件 (利用主键索引做范围扫描)"""
+        clause = ""
+        params: list = []
+        if prefix:
+            clause += f" AND {column} >= ? AND {column} < ?"
+            params += (prefix, prefix_upper_bound(prefix))
+        if after is not None:
+            clause += f" AND {column} > ?"
+            params.append(after)
+        clause += f" ORDER BY {column} LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        return clause, tuple(params)
+
+    async def list_user_ids(self, prefix: str = "", after: str | None = None, limit: int | None = None) -> list[str]:
+        clause, params = self._page_clause("user_id", prefix, after, limit)
+        return await self._worker.read(
+            lambda c: [row[0] for row in c.execute(
+                "SELECT user_id FROM users WHERE manager = ?" + clause,
+                (self._base_name, *params)
+            )]
+        )
+
+    async def list_item_ids(self, user_id: str, prefix: str = "", after: str | None = None, limit: int | None = None) -> list[str]:
+        user_id = sanitize_filename(user_id)
+        clause, params = self._page_clause("item_id", prefix, after, limit)
+        return await self._worker.read(
+            lambda c: [row[0] for row in c.execute(
+                "SELECT item_id FROM items WHERE manager = ? AND user_id = ?" + clause,
+                (self._base_name, user_id, *params)
+            )]
+        )
@@ -0,0 +1,11 @@
+from ._SQLiteMainManager import SQLiteMainManager
+from ._connection import SQLiteWorker, get_worker, close_all_workers
+from ._migrate import migrate_file_layout
+
+__all__ = [
+    "SQLiteMainManager",
+    "SQLiteWorker",
+    "get_worker",
+    "close_all_workers",
+    "migrate_file_layout",
+]
@@ -0,0 +1,246 @@
+# ==== 标准库 ==== #
+import atexit
+import asyncio
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+# ==== 第三方库 ==== #
+from loguru import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    manager TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    PRIMARY KEY (manager, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS metadata (
+    manager TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (manager, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS items (
+    manager TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (manager, user_id, item_id)
+) WITHOUT ROWID;
+"""
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    """
+    打开数据库连接，启用WAL模式并初始化表结构
+
+    :param db_path: 数据库文件路径
+    :return: 数据库连接
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(_SCHEMA)
+    return connection
+
+class SQLiteWorker:
+    """
+    在专用线程中持有数据库连接的执行器
+
+    所有读写都在同一线程上按提交顺序执行，写操作以组提交的方式合并到同一个事务中:
+    队列为空、达到批次大小或超过提交间隔时统一提交，写操作在提交完成后才返回
+    """
+    def __init__(self, db_path: Path, batch_size: int = 256, commit_interval: float = 0.0):
+        """
+        :param db_path: 数据库文件路径
+        :param batch_size: 单个事务最多包含的写操作数量
+        :param commit_interval: 队列为空时等待更多写操作的时间 (秒)，为0时立即提交
+        """
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._connection = connect(self.db_path)
+        self._closed = False
+        self._thread = threading.Thread(
+            target = self._run,
+            name = f"SQLiteWorker-{self.db_path.name}",
+            daemon = True
+        )
+        self._thread.start()
+
+    def __repr__(self) -> str:
+        return f"<SQLiteWorker {self.db_path}>"
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any = None, error: BaseException | None = None) -> None:
+        """在事件循环线程中设置结果"""
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _complete(self, future: asyncio.Future, result: Any = None, error: BaseException | None = None) -> None:
+        """从工作线程回传结果"""
+        loop = future.get_loop()
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self._resolve, future, result, error)
+
+    def _abort(self, pending: list[tuple[asyncio.Future, Any]], error: BaseException) -> None:
+        """回滚当前事务并让批次中的写操作失败"""
+        if self._connection.in_transaction:
+            try:
+                self._connection.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+        for future, _ in pending:
+            self._complete(future, error = error)
+        pending.clear()
+
+    def _commit(self, pending: list[tuple[asyncio.Future, Any]]) -> None:
+        """提交事务并通知等待中的写操作"""
+        try:
+            self._connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            self._abort(pending, e)
+            return
+        for future, result in pending:
+            self._complete(future, result)
+        pending.clear()
+
+    def _read(self, func: Callable[[sqlite3.Connection], Any], future: asyncio.Future) -> None:
+        """执行一个读操作"""
+        try:
+            result = func(self._connection)
+        except BaseException as e:
+            self._complete(future, error = e)
+        else:
+            self._complete(future, result)
+
+    def _write(self, func: Callable[[sqlite3.Connection], Any], future: asyncio.Future, pending: list[tuple[asyncio.Future, Any]]) -> None:
+        """
+        在当前批次的事务中执行一个写操作
+
+        写操作本身的异常只回滚它自己的保存点，事务控制语句的异常 (sqlite3.Error) 向上抛出，由调用方回滚整个批次
+        """
+        connection = self._connection
+        if not pending:
+            connection.execute("BEGIN")
+        # 每个写操作使用独立的保存点，失败时不影响同一批次中的其他写操作
+        connection.execute("SAVEPOINT write_op")
+        try:
+            result = func(connection)
+        except BaseException as e:
+            self._complete(future, error = e)
+            connection.execute("ROLLBACK TO write_op")
+            connection.execute("RELEASE write_op")
+            if not pending:
+                connection.execute("COMMIT")
+            return
+        connection.execute("RELEASE write_op")
+
+        pending.append((future, result))
+        if len(pending) >= self.batch_size:
+            self._commit(pending)
+
+    def _run(self) -> None:
+        """工作线程主循环"""
+        pending: list[tuple[asyncio.Future, Any]] = []
+        while True:
+            if pending:
+                try:
+                    task = self._queue.get(timeout = self.commit_interval) if self.commit_interval > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    self._commit(pending)
+                    continue
+            else:
+                task = self._queue.get()
+
+            if task is None:
+                if pending:
+                    self._commit(pending)
+                self._connection.close()
+                return
+
+            func, future, write = task
+            try:
+                if write:
+                    self._write(func, future, pending)
+                else:
+                    self._read(func, future)
+            except sqlite3.Error as e:
+                # 事务控制语句失败 (如 SQLITE_BUSY、SQLITE_FULL 或IO错误)：
+                # 回滚整个批次并让其中的写操作失败，工作线程继续处理之后的操作
+                logger.error(f"SQLite transaction failed on {self.db_path}: {e}", user_id = "[System]")
+                self._complete(future, error = e)
+                self._abort(pending, e)
+
+    async def _submit(self, func: Callable[[sqlite3.Connection], Any], write: bool) -> Any:
+        if self._closed:
+            raise RuntimeError("SQLiteWorker is closed")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put((func, future, write))
+        return await future
+
+    async def read(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        在工作线程中执行只读操作
+
+        :param func: 接收连接并返回结果的函数
+        :return: 函数返回值
+        """
+        return await self._submit(func, write = False)
+
+    async def write(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        在工作线程中执行写操作，并在所在批次提交后返回
+
+        :param func: 接收连接并返回结果的函数
+        :return: 函数返回值
+        """
+        return await self._submit(func, write = True)
+
+    def close(self) -> None:
+        """提交剩余写操作并关闭连接"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+# 按数据库路径共享的执行器
+_workers: dict[Path, SQLiteWorker] = {}
+_workers_lock = threading.Lock()
+
+def get_worker(db_path: str | Path, batch_size: int = 256, commit_interval: float = 0.0) -> SQLiteWorker:
+    """
+    获取数据库对应的执行器，同一数据库文件只会创建一个
+
+    :param db_path: 数据库文件路径
+    :param batch_size: 单个事务最多包含的写操作数量
+    :param commit_interval: 队列为空时等待更多写操作的时间 (秒)
+    :return: 执行器
+    """
+    db_path = Path(db_path).resolve()
+    with _workers_lock:
+        worker = _workers.get(db_path)
+        if worker is None:
+            worker = SQLiteWorker(db_path, batch_size = batch_size, commit_interval = commit_interval)
+            _workers[db_path] = worker
+            logger.info(f"Opened SQLite database {db_path}", user_id = "[System]")
+        return worker
+
+@atexit.register
+def close_all_workers() -> None:
+    """退出时提交并关闭所有数据库连接"""
+    with _workers_lock:
+        for worker in _workers.values():
+            worker.close()
+        _workers.clear()
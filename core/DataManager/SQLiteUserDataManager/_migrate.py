@@ -0,0 +1,112 @@
+# ==== 标准库 ==== #
+import os
+from pathlib import Path
+from typing import Iterable
+
+# ==== 第三方库 ==== #
+import orjson
+from loguru import logger
+
+# ==== 自定义库 ==== #
+from ._connection import connect
+from ..UserDataManager._layout import iter_user_dirs
+
+def _read_json(path: Path) -> bytes | None:
+    """读取并校验JSON文件，损坏时返回None"""
+    try:
+        with open(path, "rb") as f:
+            fdata = f.read()
+        orjson.loads(fdata)
+        return fdata
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.warning(f"Skipped unreadable file {path}: {e}", user_id = "[System]")
+        return None
+
+def migrate_file_layout(
+        source_dir: str | Path,
+        db_path: str | Path,
+        managers: Iterable[str] | None = None,
+        metadata_filename: str = "metadata.json",
+        sub_dir_name: str = "ParallelData",
+        batch_size: int = 1000,
+    ) -> dict[str, dict[str, int]]:
+    """
+    将文件存储布局的用户数据迁移到SQLite数据库
+
+    源目录结构为 `<source_dir>/<manager>/<user_id>/<metadata_filename>` 与
+    `<source_dir>/<manager>/<user_id>/<sub_dir_name>/<item_id>.json`，
+    用户目录也可以位于分片目录中 (`<source_dir>/<manager>/.shards-2x2/ab/cd/<user_id>`)，
+    已存在的记录会被覆盖，因此可以重复执行
+
+    :param source_dir: 用户数据目录 (即 User_Data_Dir)
+    :param db_path: 目标数据库路径
+    :param managers: 需要迁移的管理器名称，为None时迁移全部
+    :param metadata_filename: 元数据文件名
+    :param sub_dir_name: 条目子目录名
+    :param batch_size: 单个事务写入的记录数
+    :return: 每个管理器迁移的用户数、元数据数与条目数
+    """
+    source_dir = Path(source_dir)
+    connection = connect(Path(db_path))
+    stats: dict[str, dict[str, int]] = {}
+
+    pending: list[tuple[str, tuple]] = []
+    def flush() -> None:
+        if not pending:
+            return
+        connection.execute("BEGIN")
+        for sql, params in pending:
+            connection.execute(sql, params)
+        connection.execute("COMMIT")
+        pending.clear()
+
+    try:
+        manager_names = sorted(managers) if managers is not None else sorted(
+            entry.name for entry in os.scandir(source_dir) if entry.is_dir() and not entry.name.startswith(".")
+        )
+        for manager in manager_names:
+            manager_dir = source_dir / manager
+            if not manager_dir.is_dir():
+                logger.warning(f"Manager directory {manager_dir} does not exist", user_id = "[System]")
+                continue
+            counts = stats.setdefault(manager, {"users": 0, "metadata": 0, "items": 0})
+            for user_id, user_dir in iter_user_dirs(manager_dir):
+                pending.append((
+                    "INSERT OR IGNORE INTO users (manager, user_id) VALUES (?, ?)",
+                    (manager, user_id)
+                ))
+                counts["users"] += 1
+
+                metadata = _read_json(user_dir / metadata_filename) if (user_dir / metadata_filename).is_file() else None
+                if metadata is not None:
+                    pending.append((
+                        "INSERT OR REPLACE INTO metadata (manager, user_id, data) VALUES (?, ?, ?)",
+                        (manager, user_id, metadata)
+                    ))
+                    counts["metadata"] += 1
+
+                item_dir = user_dir / sub_dir_name
+                if item_dir.is_dir():
+                    for item_entry in os.scandir(item_dir):
+                        if not item_entry.is_file() or not item_entry.name.endswith(".json"):
+                            continue
+                        data = _read_json(Path(item_entry.path))
+                        if data is None:
+                            continue
+                        pending.append((
+                            "INSERT OR REPLACE INTO items (manager, user_id, item_id, data) VALUES (?, ?, ?, ?)",
+                            (manager, user_id, item_entry.name[:-len(".json")], data)
+                        ))
+                        counts["items"] += 1
+
+                if len(pending) >= batch_size:
+                    flush()
+            flush()
+            logger.info(
+                f"Migrated {manager}: {counts['users']} users, {counts['metadata']} metadata, {counts['items']} items",
+                user_id = "[System]"
+            )
+    finally:
+        flush()
+        connection.close()
+    return stats
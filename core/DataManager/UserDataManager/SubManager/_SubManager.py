@@ -7,11 +7,21 @@ from pathlib import Path
 
 # ==== 第三方库 ==== #
 import orjson
-import aiofiles
+from loguru import logger
 
 # ==== 项目库 ==== #
-from PathProcessors import validate_path, sanitize_filename, sanitize_filename_async
+from PathProcessors import validate_path, sanitize_filename, sanitize_filename_cached
 from ConfigManager import ConfigLoader
+from ..._offload import get_offload_executor
+from ._atomic import (
+    DURABILITY_MODES,
+    DURABILITY_NONE,
+    DURABILITY_FDATASYNC,
+    DURABILITY_GROUP_COMMIT,
+    atomic_write,
+    atomic_link,
+    get_group_committer
+)
 
 class SubManager:
     _configs = ConfigLoader()
@@ -22,11 +32,19 @@ class SubManager:
         sub_dir_name: str = sanitize_filename(sub_dir_name)
         self.sub_dir_name: str = sub_dir_name
         self._global_lock: asyncio.Lock = asyncio.Lock()
+        self._metadata_lock: asyncio.Lock = asyncio.Lock()
         self._item_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
         if not self.base_path.exists():
             self.base_path.mkdir(parents=True, exist_ok=True)
         
         self._metadata_filename = self._configs.get_config("User_Data_Metadata_Filename", "metadata.json").get_value(str)
+
+        # 写入的持久化级别
+        self.durability: str = self._configs.get_config("User_Data_Durability", "none").get_value(str).lower()
+        if self.durability not in DURABILITY_MODES:
+            raise ValueError(f"Invalid user data durability: {self.durability}")
+        self._group_commit_batch_size: int = self._configs.get_config("User_Data_Group_Commit_Batch_Size", 256).get_value(int)
+        self._group_commit_interval: float = self._configs.get_config("User_Data_Group_Commit_Interval", 0.005).get_value(float)
         
         self.cache_metadata:bool = cache_metadata
         self._metadata_cache: Any | None = None
@@ -34,6 +52,14 @@ class SubManager:
         self.cache_data:bool = cache_data
         self._data_cache: dict[str, Any] = {}
 
+        # 小数据直接在事件循环中序列化，大数据与文件IO交给独立线程池
+        self._executor = get_offload_executor()
+        # 上一次读写时的序列化大小 (用于判断下一次序列化的执行方式)，元数据使用None作为键
+        self._sizes: dict[str | None, int] = {}
+
+        # 条目目录是否已确认存在 (确认后不再检查)
+        self._item_dir_ready: bool = False
+
     @property
     def _default_base_file(self) -> Path:
         """获取默认文件路径"""
@@ -43,13 +69,54 @@ class SubManager:
         """获取元数据文件路径"""
         return self.base_path / self._metadata_filename
     
+    @property
+    def is_idle(self) -> bool:
+        """是否没有正在进行的读写 (条目锁只在使用期间存活)"""
+        return not self._metadata_lock.locked() and len(self._item_locks) == 0
+
     def _get_file_path(self, name: str) -> Path:
         """获取文件路径"""
-        if not self._default_base_file.exists():
+        if not self._item_dir_ready:
             self._default_base_file.mkdir(parents=True, exist_ok=True)
-        name = sanitize_filename(name)
+            self._item_dir_ready = True
+        name = sanitize_filename_cached(name)
         return self._default_base_file / f"{name}.json"
     
+    @staticmethod
+    def _read_bytes(path: Path) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    async def _read_file(self, key: str | None, path: Path) -> Any:
+        """读取并解析文件，记录其大小"""
+        fdata = await self._executor.run(None, self._read_bytes, path)
+        self._sizes[key] = len(fdata)
+        return await self._executor.run(len(fdata), orjson.loads, fdata)
+
+    async def _dump(self, key: str | None, data: Any) -> bytes:
+        """序列化数据，上一次大小未知时按大数据处理"""
+        fdata = await self._executor.run(self._sizes.get(key), orjson.dumps, data)
+        self._sizes[key] = len(fdata)
+        return fdata
+
+    async def _write_file(self, path: Path, data: bytes) -> None:
+        """按持久化级别原子写入文件"""
+        if self.durability == DURABILITY_GROUP_COMMIT:
+            committer = get_group_committer(self._group_commit_batch_size, self._group_commit_interval)
+            await committer.write(path, data)
+        else:
+            await self._executor.run(None, atomic_write, path, data, self.durability == DURABILITY_FDATASYNC)
+
+    @staticmethod
+    def _quarantine(path: Path) -> None:
+        """将无法解析的文件改名保留，避免被下一次写入覆盖"""
+        backup = path.with_name(f"{path.name}.corrupt")
+        try:
+            os.replace(path, backup)
+        except OSError:
+            return
+        logger.error(f"Corrupted data file {path} moved to {backup}", user_id = "[System]")
+
     async def _get_item_lock(self, item_name: str) -> asyncio.Lock:
         """获取 item_name 对应的锁，如果没有则创建"""
         async with self._global_lock:
@@ -69,20 +136,19 @@ class SubManager:
         Returns:
             Any: Metadata
         """
-        async with self._global_lock:
+        async with self._metadata_lock:
             try:
                 if self.cache_metadata and self._metadata_cache is not None:
                     return self._metadata_cache
                 else:
-                    async with aiofiles.open(self._get_metadata_file_path, "rb") as f:
-                        fdata = await f.read()
-                        metadata = await asyncio.to_thread(orjson.loads, fdata)
-                        if self.cache_metadata:
-                            self._metadata_cache = metadata
-                        return metadata
+                    metadata = await self._read_file(None, self._get_metadata_file_path)
+                    if self.cache_metadata:
+                        self._metadata_cache = metadata
+                    return metadata
             except FileNotFoundError:
                 return default
             except orjson.JSONDecodeError:
+                await self._executor.run(None, self._quarantine, self._get_metadata_file_path)
                 return default
     
     async def save_metadata(self, data: Any):
@@ -94,10 +160,9 @@ class SubManager:
         Returns:
             None
         """
-        async with self._global_lock:
-            async with aiofiles.open(self._get_metadata_file_path, "wb") as f:
-                fdata = await asyncio.to_thread(orjson.dumps, data)
-                await f.write(fdata)
+        async with self._metadata_lock:
+            fdata = await self._dump(None, data)
+            await self._write_file(self._get_metadata_file_path, fdata)
             if self.cache_metadata:
                 self._metadata_cache = data
     
@@ -111,20 +176,20 @@ class SubManager:
         Returns:
             Any: Loaded data
         """
-        async with self._global_lock:
+        # 按条目加锁，等待落盘时不阻塞其他条目的读写
+        async with await self._get_item_lock(item):
             try:
                 if self.cache_data and self._data_cache is not None and item in self._data_cache:
                     return self._data_cache[item]
                 else:
-                    async with aiofiles.open(self._get_file_path(item), "rb") as f:
-                        fdata = await f.read()
-                        data = await asyncio.to_thread(orjson.loads, fdata)
-                        if self.cache_data:
-                            self._data_cache[item] = data
-                        return data
+                    data = await self._read_file(item, self._get_file_path(item))
+                    if self.cache_data:
+                        self._data_cache[item] = data
+                    return data
             except FileNotFoundError:
                 return default
             except orjson.JSONDecodeError:
+                await self._executor.run(None, self._quarantine, self._get_file_path(item))
                 return default
     
     async def save(self, item: str, data: Any) -> None:
@@ -138,9 +203,9 @@ class SubManager:
         Returns:
             None
         """
-        async with self._global_lock:
-            async with aiofiles.open(self._get_file_path(item), "wb") as f:
-                await f.write(await asyncio.to_thread(orjson.dumps, data))
+        async with await self._get_item_lock(item):
+            fdata = await self._dump(item, data)
+            await self._write_file(self._get_file_path(item), fdata)
             if self.cache_data:
                 self._data_cache[item] = data
     
@@ -153,8 +218,52 @@ class SubManager:
         Returns:
             None
         """
-        async with self._global_lock:
+        async with await self._get_item_lock(item):
             try:
-                await asyncio.to_thread(os.remove, self._get_file_path(item))
+                await self._executor.run(None, os.remove, self._get_file_path(item))
             except FileNotFoundError:
                 pass
+            self._data_cache.pop(item, None)
+            self._sizes.pop(item, None)
+    
+    async def fork(self, source: str, target: str) -> None:
+        """
+        Fork an item into another item (copy-on-write).
+
+        目标条目以硬链接共享源条目的文件，耗时与数据大小无关；
+        任意一方之后的写入都会替换为新文件，不会影响另一方。
+        源条目不存在时删除目标条目 (分叉出空分支)
+
+        Args:
+            source (str): The item to fork from.
+            target (str): The new item.
+
+        Returns:
+            None
+        """
+        if sanitize_filename_cached(source) == sanitize_filename_cached(target):
+            return
+        # 按固定顺序获取两个条目的锁，避免相向分叉时死锁
+        first, second = sorted((source, target))
+        async with await self._get_item_lock(first), await self._get_item_lock(second):
+            target_path = self._get_file_path(target)
+            try:
+                linked = await self._executor.run(
+                    None, atomic_link,
+                    self._get_file_path(source), target_path,
+                    self.durability != DURABILITY_NONE
+                )
+            except FileNotFoundError:
+                try:
+                    await self._executor.run(None, os.remove, target_path)
+                except FileNotFoundError:
+                    pass
+            else:
+                if not linked:
+                    logger.warning(f"Hard links are not supported, item {target} was copied", user_id = "[System]")
+            # 缓存的对象可能被调用方修改，不在两个条目之间共享
+            self._data_cache.pop(target, None)
+            if source in self._sizes:
+                self._sizes[target] = self._sizes[source]
+            else:
+                self._sizes.pop(target, None)
@@ -0,0 +1,220 @@
+# ==== 标准库 ==== #
+import os
+import uuid
+import asyncio
+import weakref
+from pathlib import Path
+
+# ==== 第三方库 ==== #
+from loguru import logger
+
+# 持久化级别
+DURABILITY_NONE = "none"                    # 只保证原子替换，不等待数据落盘
+DURABILITY_FDATASYNC = "fdatasync"          # 每次写入都在替换前同步到磁盘
+DURABILITY_GROUP_COMMIT = "group_commit"    # 将一段时间内的写入合并为一批后统一同步
+DURABILITY_MODES = (DURABILITY_NONE, DURABILITY_FDATASYNC, DURABILITY_GROUP_COMMIT)
+
+# 临时文件标记
+TEMP_SUFFIX = ".tmp"
+
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+def _temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}{TEMP_SUFFIX}")
+
+def _sync_dir(directory: Path) -> None:
+    """同步目录项，使重命名在断电后仍然有效 (Windows 不支持打开目录，直接跳过)"""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write(path: Path, data: bytes, sync: bool = False) -> None:
+    """
+    先写入同目录下的临时文件再替换目标文件，写入中途崩溃时目标文件保持原样
+
+    :param path: 目标文件路径
+    :param data: 文件内容
+    :param sync: 是否在替换前后同步到磁盘
+    """
+    temp_path = _temp_path(path)
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                _fdatasync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    if sync:
+        _sync_dir(path.parent)
+
+def atomic_link(source: Path, path: Path, sync: bool = False) -> bool:
+    """
+    以硬链接使 path 与 source 共享同一份文件内容，文件系统不支持硬链接时复制
+
+    所有写入都通过替换目录项完成，不会修改已有文件的内容，
+    因此任意一方之后的写入只会替换自己的目录项，另一方仍指向原来的内容 (写时复制)
+
+    :param source: 源文件路径
+    :param path: 目标文件路径
+    :param sync: 是否在替换后同步目录
+    :return: 是否使用了硬链接 (源文件不存在时抛出 FileNotFoundError)
+    """
+    temp_path = _temp_path(path)
+    linked = True
+    try:
+        try:
+            os.link(source, temp_path)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            linked = False
+            with open(source, "rb") as f:
+                data = f.read()
+            with open(temp_path, "wb") as f:
+                f.write(data)
+                if sync:
+                    f.flush()
+                    _fdatasync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    if sync:
+        _sync_dir(path.parent)
+    return linked
+
+def atomic_write_batch(items: dict[Path, bytes]) -> None:
+    """
+    批量原子写入并同步
+
+    先写入全部临时文件，再依次同步、替换，最后对涉及的目录各同步一次，
+    使同一批写入共享文件系统的日志提交
+
+    :param items: 目标文件路径 -> 文件内容
+    """
+    # (目标文件, 临时文件, 文件描述符)，文件关闭后描述符置为None
+    pending: list[list] = []
+    try:
+        for path, data in items.items():
+            temp_path = _temp_path(path)
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+            pending.append([path, temp_path, fd])
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        for entry in pending:
+            _fdatasync(entry[2])
+        for entry in pending:
+            os.close(entry[2])
+            entry[2] = None
+            os.replace(entry[1], entry[0])
+            entry[1] = None
+    except BaseException:
+        for path, temp_path, fd in pending:
+            if fd is not None:
+                os.close(fd)
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except FileNotFoundError:
+                    pass
+        raise
+    for directory in {path.parent for path in items}:
+        _sync_dir(directory)
+
+class GroupCommitter:
+    """
+    组提交写入器
+
+    收到第一个写入后再等待 interval 秒或凑满 batch_size 个写入，然后在线程中一次性写入并同步，
+    所有写入在同步完成后才返回。同一批次中对同一文件的多次写入只保留最后一次
+    """
+    def __init__(self, batch_size: int = 256, interval: float = 0.005):
+        """
+        :param batch_size: 单批最多包含的写入数量
+        :param interval: 收到第一个写入后等待更多写入的时间 (秒)
+        """
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: asyncio.Queue[tuple[Path, bytes, asyncio.Future]] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+
+    async def write(self, path: Path, data: bytes) -> None:
+        """
+        提交写入，并等待所在批次同步完成
+
+        :param path: 目标文件路径
+        :param data: 文件内容
+        """
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((path, data, future))
+        await future
+
+    async def _collect(self) -> list[tuple[Path, bytes, asyncio.Future]]:
+        """收集一个批次"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        """处理队列直到清空，之后的写入会重新启动工作任务，不在空闲时常驻"""
+        while True:
+            batch = await self._collect()
+            items: dict[Path, bytes] = {}
+            for path, data, _ in batch:
+                items[path] = data
+            try:
+                await asyncio.to_thread(atomic_write_batch, items)
+            except Exception as e:
+                logger.error(f"Group commit of {len(items)} files failed: {e}", user_id = "[System]")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+            if self._queue.empty():
+                return
+
+# 每个事件循环各自持有一个组提交写入器
+_committers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, GroupCommitter]" = weakref.WeakKeyDictionary()
+
+def get_group_committer(batch_size: int = 256, interval: float = 0.005) -> GroupCommitter:
+    """
+    获取当前事件循环的组提交写入器
+
+    :param batch_size: 单批最多包含的写入数量 (仅在首次创建时生效)
+    :param interval: 等待更多写入的时间 (仅在首次创建时生效)
+    :return: 组提交写入器
+    """
+    loop = asyncio.get_running_loop()
+    committer = _committers.get(loop)
+    if committer is None:
+        committer = GroupCommitter(batch_size = batch_size, interval = interval)
+        _committers[loop] = committer
+    return committer
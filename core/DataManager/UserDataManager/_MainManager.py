@@ -1,10 +1,26 @@
 # ==== 标准库 ==== #
+import os
+import asyncio
 from typing import Any
+from collections import OrderedDict
 from pathlib import Path
 
+# ==== 第三方库 ==== #
+from loguru import logger
+
 # ==== 自定义库 ==== #
 from .SubManager import SubManager
-from PathProcessors import validate_path, sanitize_filename, sanitize_filename_async
+from ._layout import (
+    UserIndex,
+    shard_path,
+    shard_root_name,
+    iter_flat_user_dirs,
+    iter_shard_roots,
+    iter_sharded_user_dirs,
+    move_user_dir,
+    remove_empty_dirs
+)
+from PathProcessors import validate_path, sanitize_filename, sanitize_filename_cached
 from ConfigManager import ConfigLoader
 from .._user_mainmanager_interface import UserMainManagerInterface
 
@@ -16,28 +32,146 @@ class MainManager(UserMainManagerInterface):
         self._base_name = sanitize_filename(base_name)
         if not validate_path(self._base_path, self._base_name):
             raise ValueError("Invalid path for user data directory")
-        self.sub_managers:dict[str, SubManager] = {}
+        # 最近使用的子管理器 (LRU)，超出容量时释放最久未使用且空闲的子管理器及其缓存
+        self.sub_managers: OrderedDict[str, SubManager] = OrderedDict()
+        self.sub_manager_cache_size: int = configs.get_config("User_Data_Sub_Manager_Cache_Size", 1024).get_value(int)
 
         self.cache_metadata = cache_metadata
         self.cache_data = cache_data
 
         self.sub_dir_name = sub_dir_name
+
+        # 目录分片
+        self.shard_depth: int = configs.get_config("User_Data_Shard_Depth", 0).get_value(int)
+        self.shard_width: int = configs.get_config("User_Data_Shard_Width", 2).get_value(int)
+        self._auto_migrate: bool = configs.get_config("User_Data_Shard_Auto_Migrate", True).get_value(bool)
+        # 其他布局的 (层数, 每层字符数)，None表示尚未扫描
+        self._legacy_layouts: list[tuple[int, int]] | None = None
+        self._layout_lock = asyncio.Lock()
+        self._migration_task: asyncio.Task | None = None
+
+        self._user_index = UserIndex(self.base_path)
     
     @property
     def base_path(self):
         return self._base_path / self._base_name
-    
-    async def load(self, user_id: str, default: Any = None) -> Any:
-        user_id = await sanitize_filename_async(user_id)
-        manager = self.sub_managers.setdefault(
-            user_id,
-            SubManager(
-                self.base_path / user_id,
+
+    def _scan_legacy_layouts(self) -> list[tuple[int, int]]:
+        """找出与当前配置不同、且仍有用户目录的布局"""
+        layouts: list[tuple[int, int]] = []
+        if self.shard_depth > 0 and next(iter_flat_user_dirs(self.base_path), None) is not None:
+            layouts.append((0, 0))
+        for _, depth, width in iter_shard_roots(self.base_path):
+            if (depth, width) != (self.shard_depth, self.shard_width):
+                layouts.append((depth, width))
+        return layouts
+
+    async def _ensure_layout(self) -> list[tuple[int, int]]:
+        """首次访问时扫描旧布局，存在时在后台开始迁移"""
+        if self._legacy_layouts is None:
+            async with self._layout_lock:
+                if self._legacy_layouts is None:
+                    self._legacy_layouts = await asyncio.to_thread(self._scan_legacy_layouts)
+                    if self._legacy_layouts and self._auto_migrate:
+                        self._migration_task = asyncio.create_task(self.migrate_layout())
+        return self._legacy_layouts
+
+    def _migrate_user(self, user_id: str, legacy_layouts: list[tuple[int, int]]) -> Path:
+        """将用户目录从旧布局移动到当前布局"""
+        target = shard_path(self.base_path, user_id, self.shard_depth, self.shard_width)
+        if target.exists():
+            return target
+        for depth, width in legacy_layouts:
+            if move_user_dir(shard_path(self.base_path, user_id, depth, width), target):
+                break
+        return target
+
+    async def _user_path(self, user_id: str) -> Path:
+        """
+        获取用户目录，并登记到用户索引
+
+        用户目录仍在旧布局时会先移动到当前布局 (在线迁移)
+
+        :param user_id: 用户ID (已转义)
+        """
+        legacy_layouts = await self._ensure_layout()
+        await self._user_index.add(user_id)
+        if legacy_layouts:
+            return await asyncio.to_thread(self._migrate_user, user_id, legacy_layouts)
+        return shard_path(self.base_path, user_id, self.shard_depth, self.shard_width)
+
+    async def _get_sub_manager(self, user_id: str) -> SubManager:
+        """
+        获取用户的子管理器，不存在时创建
+
+        已缓存的用户直接返回，不产生任何文件系统调用
+
+        :param user_id: 用户ID (已转义)
+        """
+        manager = self.sub_managers.get(user_id)
+        if manager is not None:
+            self.sub_managers.move_to_end(user_id)
+            return manager
+
+        user_path = await self._user_path(user_id)
+        # 等待期间可能已有其他协程创建
+        manager = self.sub_managers.get(user_id)
+        if manager is None:
+            manager = SubManager(
+                user_path,
                 sub_dir_name = self.sub_dir_name,
                 cache_metadata = self.cache_metadata,
                 cache_data = self.cache_data
             )
-        )
+            self.sub_managers[user_id] = manager
+            self._evict_sub_managers()
+        return manager
+
+    def _evict_sub_managers(self) -> None:
+        """释放超出容量的子管理器，正在读写的子管理器会被跳过 (避免同一用户同时存在两个锁)"""
+        overflow = len(self.sub_managers) - self.sub_manager_cache_size
+        if overflow <= 0:
+            return
+        for user_id in list(self.sub_managers):
+            if overflow <= 0:
+                break
+            if self.sub_managers[user_id].is_idle:
+                del self.sub_managers[user_id]
+                overflow -= 1
+
+    async def migrate_layout(self) -> int:
+        """
+        将旧布局下的全部用户目录移动到当前布局
+
+        迁移期间仍可正常读写：访问尚未迁移的用户时会先单独移动该用户
+
+        :return: 本次移动的用户数量
+        """
+        legacy_layouts = await self._ensure_layout()
+        moved = 0
+        for depth, width in list(legacy_layouts):
+            if depth > 0:
+                user_dirs = iter_sharded_user_dirs(self.base_path / shard_root_name(depth, width), depth)
+            else:
+                user_dirs = iter_flat_user_dirs(self.base_path)
+            users = await asyncio.to_thread(list, user_dirs)
+            for user_id, source in users:
+                target = shard_path(self.base_path, user_id, self.shard_depth, self.shard_width)
+                await self._user_index.add(user_id)
+                if await asyncio.to_thread(move_user_dir, source, target):
+                    moved += 1
+                elif source.exists():
+                    logger.warning(f"User directory {source} conflicts with {target}, skipped", user_id = "[System]")
+            if depth > 0:
+                await asyncio.to_thread(remove_empty_dirs, self.base_path / shard_root_name(depth, width))
+        # 所有旧布局都已迁移完毕，之后的访问不再检查
+        self._legacy_layouts = await asyncio.to_thread(self._scan_legacy_layouts)
+        logger.info(f"Migrated {moved} user directories of {self._base_name} to the current layout", user_id = "[System]")
+        return moved
+    
+    async def load(self, user_id: str, default: Any = None) -> Any:
+        user_id = sanitize_filename_cached(user_id)
+        manager = await self._get_sub_manager(user_id)
         metadata = await manager.load_metadata()
         if isinstance(metadata, dict):
             item = metadata.get('default_item', 'default')
@@ -46,16 +180,8 @@ class MainManager(UserMainManagerInterface):
         return await manager.load(item, default)
     
     async def save(self, user_id: str, data: Any) -> None:
-        user_id = await sanitize_filename_async(user_id)
-        manager = self.sub_managers.setdefault(
-            user_id,
-            SubManager(
-                self.base_path / user_id,
-                sub_dir_name = self.sub_dir_name,
-                cache_metadata = self.cache_metadata,
-                cache_data = self.cache_data
-            )
-        )
+        user_id = sanitize_filename_cached(user_id)
+        manager = await self._get_sub_manager(user_id)
         metadata = await manager.load_metadata()
         if isinstance(metadata, dict):
             item = metadata.get('default_item', 'default')
@@ -64,16 +190,8 @@ class MainManager(UserMainManagerInterface):
         await manager.save(item, data)
     
     async def delete(self, user_id: str) -> None:
-        user_id = await sanitize_filename_async(user_id)
-        manager = self.sub_managers.setdefault(
-            user_id,
-            SubManager(
-                self.base_path / user_id,
-                sub_dir_name = self.sub_dir_name,
-                cache_metadata = self.cache_metadata,
-                cache_data=self.cache_data
-            )
-        )
+        user_id = sanitize_filename_cached(user_id)
+        manager = await self._get_sub_manager(user_id)
         metadata = await manager.load_metadata()
         if isinstance(metadata, dict):
             item = metadata.get('default_item', 'default')
@@ -82,16 +200,8 @@ class MainManager(UserMainManagerInterface):
         await manager.delete(item)
     
     async def set_default_item_id(self, user_id: str, item: str) -> None:
-        user_id = await sanitize_filename_async(user_id)
-        manager = self.sub_managers.setdefault(
-            user_id,
-            SubManager(
-                self.base_path / user_id,
-                sub_dir_name = self.sub_dir_name,
-                cache_metadata = self.cache_metadata,
-                cache_data = self.cache_data
-            )
-        )
+        user_id = sanitize_filename_cached(user_id)
+        manager = await self._get_sub_manager(user_id)
         metadata = await manager.load_metadata()
         if isinstance(metadata, dict):
             metadata['default_item'] = item
@@ -100,24 +210,51 @@ class MainManager(UserMainManagerInterface):
         await manager.save_metadata(metadata)
 
     async def get_default_item_id(self, user_id: str) -> str:
-        user_id = await sanitize_filename_async(user_id)
-        manager = self.sub_managers.setdefault(
-            user_id,
-            SubManager(
-                self.base_path / user_id,
-                sub_dir_name = self.sub_dir_name,
-                cache_metadata = self.cache_metadata,
-                cache_data = self.cache_data
-            )
-        )
+        user_id = sanitize_filename_cached(user_id)
+        manager = await self._get_sub_manager(user_id)
         metadata = await manager.load_metadata()
         if isinstance(metadata, dict):
             return metadata.get('default_item', 'default')
         else:
             return 'default'
 
+    async def load_item(self, user_id: str, item: str, default: Any = None) -> Any:
+        user_id = sanitize_filename_cached(user_id)
+        manager = await self._get_sub_manager(user_id)
+        return await manager.load(item, default)
+
+    async def save_items(self, user_id: str, items: dict[str, Any]) -> None:
+        user_id = sanitize_filename_cached(user_id)
+        manager = await self._get_sub_manager(user_id)
+        # 并发写入，启用组提交时会合并为一次同步
+        await asyncio.gather(*(manager.save(item, data) for item, data in items.items()))
+
+    async def fork_item(self, user_id: str, source: str, target: str) -> None:
+        user_id = sanitize_filename_cached(user_id)
+        manager = await self._get_sub_manager(user_id)
+        # 硬链接共享源条目的文件，耗时与历史记录长度无关
+        await manager.fork(source, target)
+
     async def get_all_user_id(self) -> list:
-        return [f.name for f in (self.base_path).iterdir() if f.is_dir()]
+        return await self._user_index.all_ids()
+
+    async def list_user_ids(self, prefix: str = "", after: str | None = None, limit: int | None = None) -> list[str]:
+        return await self._user_index.page(prefix, after, limit)
+
+    @staticmethod
+    def _scan_items(item_dir: Path) -> list[str]:
+        """列出条目目录下的条目ID (跳过写入中的临时文件与损坏文件)"""
+        try:
+            entries = os.scandir(item_dir)
+        except FileNotFoundError:
+            return []
+        with entries:
+            return sorted(
+                entry.name[:-len(".json")] for entry in entries
+                if entry.name.endswith(".json") and not entry.name.startswith(".") and entry.is_file()
+            )
 
     async def get_all_item_id(self, user_id: str) -> list:
-        return [f.stem for f in (self.base_path / user_id / self.sub_dir_name).iterdir() if f.is_file()]
\ No newline at end of file
+        user_id = sanitize_filename_cached(user_id)
+        user_path = await self._user_path(user_id)
+        return await asyncio.to_thread(self._scan_items, user_path / self.sub_dir_name)
\ No newline at end of file
@@ -0,0 +1,207 @@
+# ==== 标准库 ==== #
+import os
+import asyncio
+import hashlib
+from bisect import insort
+from pathlib import Path
+from typing import Iterator
+
+# ==== 第三方库 ==== #
+from loguru import logger
+
+# ==== 自定义库 ==== #
+from .SubManager._atomic import atomic_write
+from .._pagination import page_ids
+
+# 分片目录前缀与用户索引文件 (以 . 开头，不会与用户ID目录混淆)
+# 分片目录名记录了层数与宽度 (如 .shards-2x2)，修改配置后旧目录仍可被识别并迁移
+SHARD_DIR_PREFIX = ".shards-"
+INDEX_FILENAME = ".user_index"
+
+def shard_root_name(depth: int, width: int) -> str:
+    return f"{SHARD_DIR_PREFIX}{depth}x{width}"
+
+def shard_path(base_path: Path, user_id: str, depth: int, width: int) -> Path:
+    """
+    获取用户目录路径
+
+    depth 为 0 时使用平铺布局 `<base>/<user_id>`，
+    否则取用户ID哈希的前 depth 段 (每段 width 个十六进制字符) 作为子目录：
+    `<base>/.shards-2x2/ab/cd/<user_id>`
+
+    :param base_path: 管理器目录
+    :param user_id: 用户ID (已转义)
+    :param depth: 分片层数
+    :param width: 每层的字符数
+    :return: 用户目录
+    """
+    if depth <= 0:
+        return base_path / user_id
+    digest = hashlib.md5(user_id.encode("utf-8")).hexdigest()
+    path = base_path / shard_root_name(depth, width)
+    for level in range(depth):
+        path /= digest[level * width:(level + 1) * width]
+    return path / user_id
+
+def _scandir_dirs(path: Path) -> Iterator[os.DirEntry]:
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir():
+                yield entry
+
+def iter_flat_user_dirs(base_path: Path) -> Iterator[tuple[str, Path]]:
+    """遍历平铺布局下的用户目录"""
+    for entry in _scandir_dirs(base_path):
+        if not entry.name.startswith("."):
+            yield entry.name, Path(entry.path)
+
+def iter_shard_roots(base_path: Path) -> Iterator[tuple[Path, int, int]]:
+    """
+    遍历管理器目录下的分片目录
+
+    :return: (分片目录, 层数, 每层字符数)
+    """
+    for entry in _scandir_dirs(base_path):
+        if not entry.name.startswith(SHARD_DIR_PREFIX):
+            continue
+        depth, _, width = entry.name[len(SHARD_DIR_PREFIX):].partition("x")
+        if depth.isdigit() and width.isdigit():
+            yield Path(entry.path), int(depth), int(width)
+
+def iter_sharded_user_dirs(shard_root: Path, depth: int) -> Iterator[tuple[str, Path]]:
+    """遍历一个分片目录下的用户目录"""
+    if depth <= 0:
+        for entry in _scandir_dirs(shard_root):
+            yield entry.name, Path(entry.path)
+        return
+    for entry in _scandir_dirs(shard_root):
+        yield from iter_sharded_user_dirs(Path(entry.path), depth - 1)
+
+def iter_user_dirs(base_path: Path) -> Iterator[tuple[str, Path]]:
+    """
+    遍历管理器目录下的全部用户目录，同时兼容平铺与分片布局
+
+    :param base_path: 管理器目录
+    :return: (用户ID, 用户目录)
+    """
+    for shard_root, depth, _ in iter_shard_roots(base_path):
+        yield from iter_sharded_user_dirs(shard_root, depth)
+    yield from iter_flat_user_dirs(base_path)
+
+def move_user_dir(source: Path, target: Path) -> bool:
+    """
+    将用户目录移动到新位置
+
+    目标已存在或源已被移走 (并发迁移) 时不做任何操作
+
+    :return: 是否移动了目录
+    """
+    if target.exists():
+        return False
+    target.parent.mkdir(parents = True, exist_ok = True)
+    try:
+        os.rename(source, target)
+    except FileNotFoundError:
+        return False
+    return True
+
+def remove_empty_dirs(root: Path) -> None:
+    """自底向上删除空目录 (迁移后清理旧的分片目录)"""
+    for dirpath, _, _ in os.walk(root, topdown = False):
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            pass
+
+class UserIndex:
+    """
+    用户ID索引
+
+    索引文件每行一个用户ID，新用户以追加方式写入；
+    文件不存在时扫描目录重建。列出用户时只读取内存中的集合与排序列表，不再遍历目录
+    """
+    def __init__(self, base_path: Path):
+        self.path = base_path / INDEX_FILENAME
+        self._base_path = base_path
+        self._users: set[str] | None = None
+        # 排序后的用户ID (分页时使用)，首次分页时生成，之后随登记插入
+        self._sorted: list[str] | None = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_loaded(self) -> set[str]:
+        if self._users is None:
+            async with self._lock:
+                if self._users is None:
+                    self._users = await asyncio.to_thread(self._load)
+        return self._users
+
+    def _load(self) -> set[str]:
+        try:
+            with open(self.path, "r", encoding = "utf-8") as f:
+                return {line for line in f.read().split("\n") if line}
+        except FileNotFoundError:
+            return self._rebuild()
+
+    def _rebuild(self) -> set[str]:
+        users = {user_id for user_id, _ in iter_user_dirs(self._base_path)}
+        self._base_path.mkdir(parents = True, exist_ok = True)
+        atomic_write(self.path, "".join(f"{user_id}\n" for user_id in sorted(users)).encode("utf-8"))
+        logger.info(f"Rebuilt user index {self.path} with {len(users)} users", user_id = "[System]")
+        return users
+
+    def _append(self, user_id: str) -> None:
+        with open(self.path, "a", encoding = "utf-8") as f:
+            f.write(f"{user_id}\n")
+
+    async def add(self, user_id: str) -> None:
+        """
+        登记用户ID (在创建用户目录之前调用，保证索引不会遗漏用户)
+
+        :param user_id: 用户ID (已转义)
+        """
+        users = await self._ensure_loaded()
+        if user_id in users:
+            return
+        async with self._lock:
+            users = self._users
+            if user_id in users:
+                return
+            await asyncio.to_thread(self._append, user_id)
+            users.add(user_id)
+            if self._sorted is not None:
+                insort(self._sorted, user_id)
+
+    async def all_ids(self) -> list[str]:
+        """获取全部用户ID (按字典序)"""
+        return await self.page()
+
+    async def page(self, prefix: str = "", after: str | None = None, limit: int | None = None) -> list[str]:
+        """
+        分页获取用户ID (按字典序)
+
+        :param prefix: 只返回以该前缀开头的ID
+        :param after: 游标 (上一页最后一个ID)
+        :param limit: 最多返回的数量，None表示不限
+        """
+        await self._ensure_loaded()
+        if self._sorted is None:
+            # 持有锁排序，避免登记新用户时集合在其他线程中被修改
+            async with self._lock:
+                if self._sorted is None:
+                    self._sorted = await asyncio.to_thread(sorted, self._users)
+        return page_ids(self._sorted, prefix, after, limit)
+
+    async def rebuild(self) -> int:
+        """
+        重新扫描目录生成索引
+
+        :return: 用户数量
+        """
+        async with self._lock:
+            self._users = await asyncio.to_thread(self._rebuild)
+            self._sorted = None
+            return len(self._users)
@@ -1,27 +1,81 @@
+from typing import Any
+
 from ConfigManager import ConfigLoader
-from .UserDataManager import MainManager as UserDataManager
+from ._user_mainmanager_interface import UserMainManagerInterface
+from ._backend_registry import get_backend
 
 configs = ConfigLoader()
 
 _sub_dir_name:str = configs.get_config("User_Data_Sub_Dir_Name", "ParallelData").get_value(str)
 _cache_metadata:bool = configs.get_config("User_Data_Cache_Metadata", False).get_value(bool)
 _cache_data:bool = configs.get_config("User_Data_Cache_Data", False).get_value(bool)
+_backend:str = configs.get_config("User_Data_Backend", "file").get_value(str)
+
 
+class _baseManager(UserMainManagerInterface):
+    """
+    用户数据管理器
 
-class _baseManager(UserDataManager):
+    具体存储由 `{base_name}_Backend` 配置选择的后端完成，未配置时使用 User_Data_Backend
+    """
     def __init__(self, base_name: str):
         self.base_name = base_name if base_name else "UserData"
-        super().__init__(
+        self.backend_name = configs.get_config(f"{self.base_name}_Backend", _backend).get_value(str)
+        self.backend: UserMainManagerInterface = get_backend(self.backend_name)(
             base_name = self.base_name,
             cache_metadata = configs.get_config(f"{self.base_name}_Cache_Metadata", _cache_metadata).get_value(bool),
             cache_data = configs.get_config(f"{self.base_name}_Cache_Data", _cache_data).get_value(bool),
             sub_dir_name = _sub_dir_name
         )
 
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} Backend={self.backend_name}>"
+
+    async def load(self, user_id: str, default: Any = None) -> Any:
+        return await self.backend.load(user_id, default)
+
+    async def save(self, user_id: str, data: Any) -> None:
+        await self.backend.save(user_id, data)
+
+    async def delete(self, user_id: str) -> None:
+        await self.backend.delete(user_id)
+
+    async def set_default_item_id(self, user_id: str, item: str) -> None:
+        await self.backend.set_default_item_id(user_id, item)
+
+    async def get_default_item_id(self, user_id: str) -> str:
+        return await self.backend.get_default_item_id(user_id)
+
+    async def get_all_user_id(self) -> list:
+        return await self.backend.get_all_user_id()
+
+    async def get_all_item_id(self, user_id: str) -> list:
+        return await self.backend.get_all_item_id(user_id)
+
+    async def load_item(self, user_id: str, item: str, default: Any = None) -> Any:
+        return await self.backend.load_item(user_id, item, default)
+
+    async def save_items(self, user_id: str, items: dict[str, Any]) -> None:
+        await self.backend.save_items(user_id, items)
+
+    async def fork_item(self, user_id: str, source: str, target: str) -> None:
+        await self.backend.fork_item(user_id, source, target)
+
+    async def list_user_ids(self, prefix: str = "", after: str | None = None, limit: int | None = None) -> list[str]:
+        return await self.backend.list_user_ids(prefix, after, limit)
+
+    async def list_item_ids(self, user_id: str, prefix: str = "", after: str | None = None, limit: int | None = None) -> list[str]:
+        return await self.backend.list_item_ids(user_id, prefix, after, limit)
+
 class ContextManager(_baseManager):
     def __init__(self):
         super().__init__('Context_UserData')
 
+class ContextArchiveManager(_baseManager):
+    """被压缩的历史记录 (冷存储)，条目ID为 {分支ID}.{压缩时间}"""
+    def __init__(self):
+        super().__init__('ContextArchive_UserData')
+
 class PromptManager(_baseManager):
     def __init__(self):
         super().__init__('Prompt_UserData')
@@ -1,11 +1,29 @@
 from ._MainDataManager import (
     ContextManager,
+    ContextArchiveManager,
     PromptManager,
     UserConfigManager,
 )
+from ._user_mainmanager_interface import UserMainManagerInterface
+from ._offload import SizedExecutor, get_offload_executor
+from ._transfer import export_archive, import_archive
+from ._backend_registry import (
+    register_backend,
+    get_backend,
+    available_backends,
+)
 
 __all__ = [
     "ContextManager",
+    "ContextArchiveManager",
     "PromptManager",
     "UserConfigManager",
-]
\ No newline at end of file
+    "UserMainManagerInterface",
+    "register_backend",
+    "get_backend",
+    "available_backends",
+    "SizedExecutor",
+    "get_offload_executor",
+    "export_archive",
+    "import_archive",
+]
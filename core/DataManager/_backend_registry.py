@@ -0,0 +1,43 @@
+from typing import Callable
+
+from ._user_mainmanager_interface import UserMainManagerInterface
+from .UserDataManager import MainManager as FileMainManager
+from .SQLiteUserDataManager import SQLiteMainManager
+from .MemoryUserDataManager import MemoryMainManager
+from .LMDBUserDataManager import LMDBMainManager
+
+BackendFactory = Callable[..., UserMainManagerInterface]
+
+# 后端名称 -> 管理器类
+_backends: dict[str, BackendFactory] = {}
+
+def register_backend(name: str, factory: BackendFactory) -> None:
+    """
+    注册存储后端
+
+    :param name: 后端名称 (不区分大小写)
+    :param factory: 管理器类，构造参数与 UserMainManagerInterface 一致
+    """
+    _backends[name.lower()] = factory
+
+def get_backend(name: str) -> BackendFactory:
+    """
+    获取存储后端
+
+    :param name: 后端名称
+    :return: 管理器类
+    :raise ValueError: 后端未注册
+    """
+    try:
+        return _backends[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown user data backend: {name} (available: {', '.join(_backends)})") from None
+
+def available_backends() -> list[str]:
+    """已注册的后端名称"""
+    return list(_backends)
+
+register_backend("file", FileMainManager)
+register_backend("sqlite", SQLiteMainManager)
+register_backend("memory", MemoryMainManager)
+register_backend("lmdb", LMDBMainManager)
@@ -0,0 +1,124 @@
+# ==== 标准库 ==== #
+import time
+import asyncio
+import threading
+from typing import Any, Callable, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+
+# ==== 项目库 ==== #
+from ConfigManager import ConfigLoader
+
+configs = ConfigLoader()
+
+T = TypeVar("T")
+
+class SizedExecutor:
+    """
+    按数据大小选择执行方式
+
+    小于 inline_threshold 字节的工作直接在事件循环中执行 (切换线程的开销比工作本身更大)，
+    其余的提交到独立且线程数固定的线程池，不占用默认线程池
+    """
+    def __init__(self, inline_threshold: int = 65536, max_workers: int = 4, thread_name_prefix: str = "userdata"):
+        """
+        :param inline_threshold: 直接执行的数据大小上限 (字节)
+        :param max_workers: 线程池的线程数
+        :param thread_name_prefix: 线程名前缀
+        """
+        self.inline_threshold = inline_threshold
+        self.max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix
+        self._executor: ThreadPoolExecutor | None = None
+        self._stats_lock = threading.Lock()
+        self._inline_calls = 0
+        self._offloaded_calls = 0
+        self._queued = 0
+        self._running = 0
+        self._peak_queued = 0
+        self._queue_wait = 0.0
+        self._run_time = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers = self.max_workers,
+                thread_name_prefix = self._thread_name_prefix
+            )
+        return self._executor
+
+    def _call(self, submitted: float, func: Callable[..., T], args: tuple) -> T:
+        """在线程中执行并记录排队与执行时间"""
+        start = time.perf_counter()
+        with self._stats_lock:
+            self._queued -= 1
+            self._running += 1
+            self._queue_wait += start - submitted
+        try:
+            return func(*args)
+        finally:
+            with self._stats_lock:
+                self._running -= 1
+                self._run_time += time.perf_counter() - start
+
+    async def run(self, size: int | None, func: Callable[..., T], *args: Any) -> T:
+        """
+        执行函数
+
+        :param size: 待处理数据的大小 (字节)，未知时传入None (按大数据处理)
+        :param func: 同步函数
+        :param args: 函数参数
+        :return: 函数返回值
+        """
+        if size is not None and size < self.inline_threshold:
+            self._inline_calls += 1
+            return func(*args)
+        with self._stats_lock:
+            self._offloaded_calls += 1
+            self._queued += 1
+            if self._queued > self._peak_queued:
+                self._peak_queued = self._queued
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), self._call, time.perf_counter(), func, args
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """
+        获取执行统计
+
+        :return: 直接执行与提交到线程池的次数、当前排队与执行中的数量、
+                 最大排队数量以及平均排队/执行时间 (秒)
+        """
+        with self._stats_lock:
+            offloaded = self._offloaded_calls
+            completed = offloaded - self._queued - self._running
+            return {
+                "inline_threshold": self.inline_threshold,
+                "max_workers": self.max_workers,
+                "inline_calls": self._inline_calls,
+                "offloaded_calls": offloaded,
+                "queued": self._queued,
+                "running": self._running,
+                "peak_queued": self._peak_queued,
+                "avg_queue_wait": self._queue_wait / (offloaded - self._queued) if offloaded > self._queued else 0.0,
+                "avg_run_time": self._run_time / completed if completed > 0 else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """关闭线程池 (之后的调用会重新创建)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait = True)
+            self._executor = None
+
+_executor: SizedExecutor | None = None
+
+def get_offload_executor() -> SizedExecutor:
+    """
+    获取用户数据读写使用的执行器 (首次调用时按配置创建)
+    """
+    global _executor
+    if _executor is None:
+        _executor = SizedExecutor(
+            inline_threshold = configs.get_config("User_Data_Inline_Threshold", 65536).get_value(int),
+            max_workers = configs.get_config("User_Data_Executor_Workers", 4).get_value(int),
+        )
+    return _executor
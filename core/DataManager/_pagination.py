@@ -0,0 +1,40 @@
+# ==== 标准库 ==== #
+from bisect import bisect_left, bisect_right
+from typing import Sequence
+
+def prefix_upper_bound(prefix: str) -> str | None:
+    """
+    获取以 prefix 开头的字符串的上界 (不包含)
+
+    :param prefix: 前缀
+    :return: 上界，前缀为空时返回None
+    """
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def page_ids(
+        sorted_ids: Sequence[str],
+        prefix: str = "",
+        after: str | None = None,
+        limit: int | None = None
+    ) -> list[str]:
+    """
+    从已排序的ID列表中取出一页
+
+    使用上一页最后一个ID作为游标，插入新ID不会导致翻页时重复或遗漏
+
+    :param sorted_ids: 已排序的ID列表
+    :param prefix: 只返回以该前缀开头的ID
+    :param after: 游标，只返回大于该值的ID
+    :param limit: 最多返回的数量，None表示不限
+    :return: ID列表
+    """
+    start = bisect_left(sorted_ids, prefix) if prefix else 0
+    if after is not None:
+        start = max(start, bisect_right(sorted_ids, after))
+    upper = prefix_upper_bound(prefix)
+    end = bisect_left(sorted_ids, upper, lo = start) if upper is not None else len(sorted_ids)
+    if limit is not None:
+        end = min(end, start + limit)
+    return list(sorted_ids[start:end])
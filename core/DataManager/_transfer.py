@@ -0,0 +1,232 @@
+# ==== 标准库 ==== #
+import time
+import asyncio
+import tarfile
+from typing import Any, AsyncIterator, Mapping
+
+# ==== 第三方库 ==== #
+import orjson
+from loguru import logger
+
+# ==== 自定义库 ==== #
+from ._user_mainmanager_interface import UserMainManagerInterface
+
+# 归档结构:
+#   <manager>/<user_id>/metadata.json        {"default_item": ...}
+#   <manager>/<user_id>/items/<item_id>.json 条目数据
+#   _cursor                                  已完整写出的最后一个用户ID (每个用户之后写出一次)
+CURSOR_ENTRY = "_cursor"
+METADATA_ENTRY = "metadata.json"
+ITEMS_DIR = "items"
+
+_BLOCK_SIZE = tarfile.BLOCKSIZE
+_END_OF_ARCHIVE = b"\0" * (_BLOCK_SIZE * 2)
+
+# region tar
+def _tar_entry(name: str, data: bytes) -> bytes:
+    """生成一个tar条目 (头部 + 数据 + 对齐填充)，名称过长时使用GNU长文件名扩展"""
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    info.mode = 0o644
+    padding = -len(data) % _BLOCK_SIZE
+    return info.tobuf(tarfile.GNU_FORMAT, "utf-8", "surrogateescape") + data + b"\0" * padding
+
+async def iter_tar_entries(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[str, bytes]]:
+    """
+    从字节流中逐个解析tar条目 (只处理普通文件，支持GNU长文件名)
+
+    :param stream: 归档字节流
+    :return: (名称, 数据)
+    """
+    buffer = bytearray()
+    iterator = stream.__aiter__()
+
+    async def read(size: int) -> bytes | None:
+        while len(buffer) < size:
+            try:
+                buffer.extend(await iterator.__anext__())
+            except StopAsyncIteration:
+                return None
+        data = bytes(buffer[:size])
+        del buffer[:size]
+        return data
+
+    long_name: str | None = None
+    while True:
+        header = await read(_BLOCK_SIZE)
+        if header is None or header == b"\0" * _BLOCK_SIZE:
+            return
+        info = tarfile.TarInfo.frombuf(header, "utf-8", "surrogateescape")
+        data = await read(info.size + (-info.size % _BLOCK_SIZE))
+        if data is None:
+            raise ValueError("Unexpected end of archive")
+        data = data[:info.size]
+        if info.type == tarfile.GNUTYPE_LONGNAME:
+            long_name = data.rstrip(b"\0").decode("utf-8", "surrogateescape")
+            continue
+        name = long_name if long_name is not None else info.name
+        long_name = None
+        if info.isreg():
+            yield name, data
+# endregion
+
+class _Throttle:
+    """按字节数限速 (rate 为0时不限速)"""
+    def __init__(self, rate: int):
+        self.rate = rate
+        self._start = time.monotonic()
+        self._sent = 0
+
+    async def consume(self, size: int) -> None:
+        if self.rate <= 0:
+            return
+        self._sent += size
+        delay = self._sent / self.rate - (time.monotonic() - self._start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def _merged_user_page(
+        managers: Mapping[str, UserMainManagerInterface],
+        after: str | None,
+        limit: int
+    ) -> list[tuple[str, list[str]]]:
+    """
+    合并各管理器的用户列表，按字典序取出一页
+
+    :return: [(用户ID, 包含该用户的管理器名称)]
+    """
+    pages = await asyncio.gather(*(manager.list_user_ids(after = after, limit = limit) for manager in managers.values()))
+    # 某个管理器的一页已满时，只能确定不超过其最后一个ID的用户都已列出
+    bound: str | None = None
+    for page in pages:
+        if len(page) >= limit and (bound is None or page[-1] < bound):
+            bound = page[-1]
+    owners: dict[str, list[str]] = {}
+    for name, page in zip(managers, pages):
+        for user_id in page:
+            if bound is None or user_id <= bound:
+                owners.setdefault(user_id, []).append(name)
+    return sorted(owners.items())
+
+async def export_archive(
+        managers: Mapping[str, UserMainManagerInterface],
+        cursor: str | None = None,
+        rate: int = 0,
+        page_size: int = 256,
+    ) -> AsyncIterator[bytes]:
+    """
+    以tar流导出全部用户的全部条目
+
+    数据逐个用户读取并立即写出，不在内存中构建整个归档；
+    每个用户写完后写出一个 _cursor 条目，中断后可以用最后一个游标继续导出
+
+    :param managers: 管理器名称 -> 管理器
+    :param cursor: 从该用户ID之后开始导出
+    :param rate: 限速 (字节/秒)，0表示不限速
+    :param page_size: 每次列出的用户数量
+    :return: 归档字节流
+    """
+    throttle = _Throttle(rate)
+    users = 0
+    while True:
+        page = await _merged_user_page(managers, cursor, page_size)
+        if not page:
+            break
+        for user_id, owners in page:
+            chunks: list[bytes] = []
+            for name in owners:
+                manager = managers[name]
+                base = f"{name}/{user_id}"
+                default_item, item_ids = await asyncio.gather(
+                    manager.get_default_item_id(user_id),
+                    manager.get_all_item_id(user_id)
+                )
+                chunks.append(_tar_entry(f"{base}/{METADATA_ENTRY}", orjson.dumps({"default_item": default_item})))
+                for item_id in item_ids:
+                    data = await manager.load_item(user_id, item_id)
+                    chunks.append(_tar_entry(f"{base}/{ITEMS_DIR}/{item_id}.json", orjson.dumps(data)))
+            chunks.append(_tar_entry(CURSOR_ENTRY, user_id.encode("utf-8")))
+            block = b"".join(chunks)
+            yield block
+            await throttle.consume(len(block))
+            cursor = user_id
+            users += 1
+    yield _END_OF_ARCHIVE
+    logger.info(f"Exported {users} users", user_id = "[System]")
+
+async def import_archive(
+        managers: Mapping[str, UserMainManagerInterface],
+        stream: AsyncIterator[bytes],
+        concurrency: int = 8,
+    ) -> dict[str, Any]:
+    """
+    从 export_archive 生成的tar流导入数据
+
+    同一用户的条目在流中是连续的，读完一个用户后将其全部条目作为一批写入存储后端，
+    最多同时写入 concurrency 个用户；已存在的同名条目会被覆盖，因此可以重复导入
+
+    :param managers: 管理器名称 -> 管理器
+    :param stream: 归档字节流
+    :param concurrency: 同时写入的用户数
+    :return: 导入的用户数、条目数、跳过的条目数与最后一个游标
+    """
+    stats: dict[str, Any] = {"users": 0, "items": 0, "skipped": 0, "cursor": None}
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks: set[asyncio.Task] = set()
+    errors: list[BaseException] = []
+
+    async def write(manager: UserMainManagerInterface, user_id: str, metadata: dict | None, items: dict[str, Any]) -> None:
+        try:
+            if items:
+                await manager.save_items(user_id, items)
+            if isinstance(metadata, dict) and "default_item" in metadata:
+                await manager.set_default_item_id(user_id, metadata["default_item"])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            semaphore.release()
+
+    async def flush(key: tuple[str, str] | None, metadata: dict | None, items: dict[str, Any]) -> None:
+        if key is None:
+            return
+        await semaphore.acquire()
+        task = asyncio.create_task(write(managers[key[0]], key[1], metadata, items))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        stats["items"] += len(items)
+
+    current: tuple[str, str] | None = None
+    metadata: dict | None = None
+    items: dict[str, Any] = {}
+    users: set[str] = set()
+    async for name, data in iter_tar_entries(stream):
+        if errors:
+            break
+        if name == CURSOR_ENTRY:
+            stats["cursor"] = data.decode("utf-8")
+            continue
+        parts = name.split("/")
+        if len(parts) < 3 or parts[0] not in managers:
+            stats["skipped"] += 1
+            continue
+        key = (parts[0], parts[1])
+        if key != current:
+            await flush(current, metadata, items)
+            current, metadata, items = key, None, {}
+            users.add(parts[1])
+        if len(parts) == 3 and parts[2] == METADATA_ENTRY:
+            metadata = orjson.loads(data)
+        elif len(parts) == 4 and parts[2] == ITEMS_DIR and parts[3].endswith(".json"):
+            items[parts[3][:-len(".json")]] = orjson.loads(data)
+        else:
+            stats["skipped"] += 1
+    if not errors:
+        await flush(current, metadata, items)
+    if tasks:
+        await asyncio.gather(*tasks)
+    if errors:
+        raise errors[0]
+    stats["users"] = len(users)
+    logger.info(f"Imported {stats['users']} users, {stats['items']} items", user_id = "[System]")
+    return stats
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import Any
 
+from ._pagination import page_ids
+
 class UserMainManagerInterface(ABC):
     @abstractmethod
     def __init__(self, base_name: str, cache_metadata:bool = False, cache_data:bool = False, sub_dir_name:str = "ParallelData"):
@@ -32,4 +34,42 @@ class UserMainManagerInterface(ABC):
 
     @abstractmethod
     async def get_all_item_id(self, user_id: str) -> list:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def load_item(self, user_id: str, item: str, default: Any = None) -> Any:
+        """读取指定条目 (不改变默认条目)"""
+        pass
+
+    @abstractmethod
+    async def save_items(self, user_id: str, items: dict[str, Any]) -> None:
+        """批量写入同一用户的多个条目 (不改变默认条目)"""
+        pass
+
+    @abstractmethod
+    async def fork_item(self, user_id: str, source: str, target: str) -> None:
+        """将 source 条目复制为 target 条目 (覆盖已有的 target，源条目不存在时 target 也被删除)"""
+        pass
+
+    async def list_user_ids(self, prefix: str = "", after: str | None = None, limit: int | None = None) -> list[str]:
+        """
+        分页列出用户ID (按字典序)
+
+        默认实现基于 get_all_user_id，后端可以覆盖为基于索引的实现
+
+        :param prefix: 只返回以该前缀开头的ID
+        :param after: 游标 (上一页最后一个ID)
+        :param limit: 最多返回的数量，None表示不限
+        """
+        return page_ids(sorted(await self.get_all_user_id()), prefix, after, limit)
+
+    async def list_item_ids(self, user_id: str, prefix: str = "", after: str | None = None, limit: int | None = None) -> list[str]:
+        """
+        分页列出用户的条目ID (按字典序)
+
+        :param user_id: 用户ID
+        :param prefix: 只返回以该前缀开头的ID
+        :param after: 游标 (上一页最后一个ID)
+        :param limit: 最多返回的数量，None表示不限
+        """
+        return page_ids(sorted(await self.get_all_item_id(user_id)), prefix, after, limit)
@@ -5,4 +5,5 @@ from ._object import (
     Function,
     ErrorResponse,
     FunctionResponse
-)
\ No newline at end of file
+)
+from ._toolbox import FuncerToolbox
\ No newline at end of file
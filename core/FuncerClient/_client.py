@@ -12,10 +12,21 @@ import json
 env = Env()
 
 class FuncerClient:
-    def __init__(self, url: str):
-        self._client = httpx.AsyncClient(base_url=url)
+    def __init__(self, url: str, max_connections: int | None = None):
+        """
+        :param url: Funcer服务器地址
+        :param max_connections: 连接池的最大连接数，为None时使用httpx的默认值
+        """
+        limits = httpx.Limits(max_connections = max_connections) if max_connections is not None else httpx.Limits()
+        self._client = httpx.AsyncClient(base_url=url, limits=limits)
         self._functions: set[Function] = set()
 
+    async def aclose(self):
+        """
+        close the connection pool
+        """
+        await self._client.aclose()
+
     async def update_functions(self):
         """
         update functions from the server
@@ -74,6 +85,15 @@ class FuncerClient:
         except json.JSONDecodeError as e:
             raise BadResponse("Bad response from the server", body = response.text, code = response.status_code)
     
+    def get(self, name: str) -> Function | None:
+        """
+        get function by name
+        """
+        for function in self._functions:
+            if function.name == name:
+                return function
+        return None
+
     def __iter__(self):
         functions = self._functions
         for function in functions:
@@ -15,6 +15,7 @@ class FunctionParameter:
 class Function:
     def __init__(self, from_dict: dict | None = None):
         self.name: str = ""
+        self.description: str = ""
         self.parameters: dict[str, FunctionParameter] = {}
         self.return_type: str = ""
         self.timeout: float = 5.0
@@ -43,8 +44,10 @@ class Function:
                         parameter.value = None
                     self.parameters[key] = parameter
             self.return_type = from_dict["return_type"]
-            if "timeout" in value:
-                self.timeout = value["timeout"]
+            if "description" in from_dict and isinstance(from_dict["description"], str):
+                self.description = from_dict["description"]
+            if "timeout" in from_dict:
+                self.timeout = from_dict["timeout"]
         except KeyError as e:
             raise FormattingError(f"Missing key in response: {e}")
     
@@ -116,5 +119,5 @@ class FunctionResponse:
             "name": self.name,
             "return_type": self.return_type,
             "return_value": self.return_value,
-            "server_error": self.server_error.as_dict
+            "server_error": self.server_error.as_dict if self.server_error is not None else None
         }
@@ -0,0 +1,236 @@
+# ==== 标准库 ==== #
+import time
+import asyncio
+from typing import Any
+
+# ==== 第三方库 ==== #
+import httpx
+import orjson
+from loguru import logger
+
+# ==== 自定义库 ==== #
+from ._client import FuncerClient
+from ._object import Function, FunctionParameter, FunctionResponse
+from ._exceptions import FuncerClientException, FunctionNotFoundError, FormattingError
+from ..Context import (
+    ContentUnit,
+    ContextRole,
+    CallingFunction,
+    FunctionParameters,
+    CallingFunctionRequest,
+    FunctionChoice,
+    FunctionResponseUnit,
+    Exceptions as ContextExceptions
+)
+from ConfigManager import ConfigLoader
+
+configs = ConfigLoader()
+
+# Funcer参数类型 -> JSON Schema类型
+_SCHEMA_TYPES = {
+    "int": "integer",
+    "float": "number",
+    "str": "string",
+    "bool": "boolean",
+    "list": "array",
+    "dict": "object",
+}
+
+class FuncerToolbox:
+    """
+    将Funcer服务器上的函数提供给模型作为工具
+
+    函数列表按有效期缓存，模型返回的工具调用通过共用连接池的 FuncerClient 并发执行，
+    每个调用单独超时，失败时把错误信息作为工具结果返回给模型，而不是中断对话
+    """
+    def __init__(
+            self,
+            client: FuncerClient,
+            functions_ttl: float = 300.0,
+            call_timeout: float = 10.0,
+            max_concurrency: int = 8,
+            max_rounds: int = 5,
+            deadline: float = 120.0,
+        ):
+        """
+        :param client: Funcer客户端
+        :param functions_ttl: 函数列表的缓存有效期 (秒)
+        :param call_timeout: 单个工具调用的超时时间 (秒)
+        :param max_concurrency: 同时执行的工具调用数量上限
+        :param max_rounds: 一轮对话中最多执行工具的轮数
+        :param deadline: 一轮对话中执行工具的总时限 (秒)，从第一次请求模型开始计算
+        """
+        self.client = client
+        self.functions_ttl = functions_ttl
+        self.call_timeout = call_timeout
+        self.max_rounds = max_rounds
+        self.deadline = deadline
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._refresh_lock = asyncio.Lock()
+        self._tools: list[dict] = []
+        self._expires_at: float = 0.0
+        self._counters: dict[str, int] = {
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "calls": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "rejected": 0,
+        }
+
+    @classmethod
+    def from_config(cls) -> "FuncerToolbox | None":
+        """
+        根据项目配置创建工具箱，没有配置Funcer服务器地址时返回None
+        """
+        url = configs.get_config("Funcer_URL", "").get_value(str)
+        if not url:
+            return None
+        max_concurrency = configs.get_config("Funcer_Max_Concurrency", 8).get_value(int)
+        return cls(
+            client = FuncerClient(url, max_connections = max_concurrency),
+            functions_ttl = configs.get_config("Funcer_Functions_TTL", 300.0).get_value(float),
+            call_timeout = configs.get_config("Funcer_Call_Timeout", 10.0).get_value(float),
+            max_concurrency = max_concurrency,
+            max_rounds = configs.get_config("Tool_Loop_Max_Rounds", 5).get_value(int),
+            deadline = configs.get_config("Tool_Loop_Deadline", 120.0).get_value(float),
+        )
+
+    @staticmethod
+    def _as_calling_function(function: Function) -> CallingFunction:
+        """将Funcer函数转换为模型的工具定义，没有默认值的参数为必填参数"""
+        return CallingFunction(
+            name = function.name,
+            description = function.description,
+            parameters = [
+                FunctionParameters(
+                    name = key,
+                    type = _SCHEMA_TYPES.get(parameter.type, parameter.type),
+                    required = parameter.value is None,
+                )
+                for key, parameter in function.parameters.items()
+            ]
+        )
+
+    async def tools(self) -> list[dict]:
+        """
+        获取提供给模型的工具列表
+
+        缓存过期时从服务器刷新，刷新失败时继续使用之前的列表
+
+        :return: OpenAI兼容的 tools 字段
+        """
+        if time.monotonic() < self._expires_at:
+            return self._tools
+        async with self._refresh_lock:
+            # 等待锁期间其他请求可能已经刷新
+            if time.monotonic() < self._expires_at:
+                return self._tools
+            try:
+                await self.client.update_functions()
+            except (FuncerClientException, httpx.HTTPError) as e:
+                self._counters["refresh_failures"] += 1
+                logger.warning(f"Failed to update Funcer functions: {e}", user_id = "[System]")
+            else:
+                self._counters["refreshes"] += 1
+                self._tools = CallingFunctionRequest(
+                    functions = [self._as_calling_function(function) for function in self.client],
+                    func_choice = FunctionChoice.AUTO
+                ).tools
+            # 失败时同样等待一个有效期再重试，避免每个请求都访问不可用的服务器
+            self._expires_at = time.monotonic() + self.functions_ttl
+        return self._tools
+
+    def _build_call(self, call: FunctionResponseUnit) -> Function:
+        """根据模型的工具调用构造Funcer的调用请求"""
+        function = self.client.get(call.name)
+        if function is None:
+            raise FunctionNotFoundError(f"Function {call.name} not found")
+        arguments = call.arguments if call.arguments_str.strip() else {}
+        if not isinstance(arguments, dict):
+            raise FormattingError("Function arguments must be a JSON object")
+        request = Function()
+        request.name = function.name
+        request.return_type = function.return_type
+        request.timeout = function.timeout
+        for key, parameter in function.parameters.items():
+            request.parameters[key] = FunctionParameter(
+                name = parameter.name,
+                type = parameter.type,
+                value = arguments.get(key, parameter.value),
+            )
+        return request
+
+    @staticmethod
+    def _format_result(response: FunctionResponse) -> str:
+        if response.server_error is not None:
+            return f"Error: {response.server_error.message}"
+        if isinstance(response.return_value, str):
+            return response.return_value
+        return orjson.dumps(response.return_value, default = str).decode()
+
+    async def _call_inner(self, call: FunctionResponseUnit) -> str:
+        """等待并发名额后执行工具调用 (等待名额的时间同样计入超时)"""
+        async with self._semaphore:
+            return self._format_result(await self.client.call(self._build_call(call)))
+
+    async def _call(self, user_id: str, call: FunctionResponseUnit, deadline: float) -> ContentUnit:
+        """执行一个工具调用，超时或失败时返回错误信息"""
+        self._counters["calls"] += 1
+        timeout = min(self.call_timeout, deadline - time.monotonic())
+        try:
+            if timeout <= 0:
+                raise asyncio.TimeoutError
+            content = await asyncio.wait_for(self._call_inner(call), timeout)
+        except asyncio.TimeoutError:
+            self._counters["timeouts"] += 1
+            logger.warning(f"Tool call {call.name} timed out", user_id = user_id)
+            content = f"Error: function {call.name} timed out"
+        except (FuncerClientException, ContextExceptions.ContextSyntaxError, httpx.HTTPError) as e:
+            self._counters["failures"] += 1
+            logger.warning(f"Tool call {call.name} failed: {e}", user_id = user_id)
+            content = f"Error: {e}"
+        return ContentUnit(role = ContextRole.FUNCTION, content = content, tool_call_id = call.id)
+
+    async def run(self, user_id: str, calls: list[FunctionResponseUnit], deadline: float) -> list[ContentUnit]:
+        """
+        并发执行一轮工具调用
+
+        :param user_id: 用户ID
+        :param calls: 模型返回的工具调用
+        :param deadline: 截止时间 (time.monotonic())
+        :return: 与调用顺序一致的工具结果
+        """
+        logger.info(f"Run {len(calls)} tool calls: {', '.join(call.name for call in calls)}", user_id = user_id)
+        return list(await asyncio.gather(*(self._call(user_id, call, deadline) for call in calls)))
+
+    def reject(self, calls: list[FunctionResponseUnit], reason: str) -> list[ContentUnit]:
+        """
+        不执行工具调用，直接返回错误结果 (每个调用都必须有对应的结果，否则之后的请求会被拒绝)
+
+        :param calls: 模型返回的工具调用
+        :param reason: 原因
+        :return: 工具结果
+        """
+        self._counters["rejected"] += len(calls)
+        return [
+            ContentUnit(role = ContextRole.FUNCTION, content = f"Error: {reason}", tool_call_id = call.id)
+            for call in calls
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        """
+        获取工具调用统计
+
+        :return: 各类调用的计数与当前的工具数量
+        """
+        return {
+            **self._counters,
+            "tools": len(self._tools),
+            "max_rounds": self.max_rounds,
+            "deadline": self.deadline,
+        }
+
+    async def aclose(self) -> None:
+        """关闭连接池"""
+        await self.client.aclose()
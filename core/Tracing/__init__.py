@@ -0,0 +1,15 @@
+from ._span import Span, Trace
+from ._tracer import Tracer, get_tracer
+from ._exporters import SpanExporter, FileSpanExporter, OTLPHttpSpanExporter
+from ._otlp import encode_spans
+
+__all__ = [
+    "Span",
+    "Trace",
+    "Tracer",
+    "get_tracer",
+    "SpanExporter",
+    "FileSpanExporter",
+    "OTLPHttpSpanExporter",
+    "encode_spans",
+]
\ No newline at end of file
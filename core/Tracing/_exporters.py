@@ -0,0 +1,114 @@
+# ==== 标准库 ==== #
+import asyncio
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+# ==== 第三方库 ==== #
+import httpx
+import orjson
+from loguru import logger
+
+# ==== 自定义库 ==== #
+from ._span import Span
+from ._otlp import encode_spans
+
+class SpanExporter(ABC):
+    """
+    跨度导出器基类
+
+    跨度先进入缓冲区，由后台任务按批次大小或时间间隔导出，导出失败只记录日志，不影响请求
+    """
+    def __init__(self, service_name: str, service_version: str = "", batch_size: int = 512, interval: float = 5.0):
+        self.service_name = service_name
+        self.service_version = service_version
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self._buffer: list[Span] = []
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._flush_task: asyncio.Task | None = None
+
+    def submit(self, spans: list[Span]) -> None:
+        """
+        提交一批跨度，需在事件循环中调用
+
+        :param spans: 跨度列表
+        """
+        self._buffer.extend(spans)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _flush_loop(self) -> None:
+        while self._buffer:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout = self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """立即导出缓冲区中的所有跨度"""
+        while self._buffer:
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            payload = orjson.dumps(encode_spans(batch, self.service_name, self.service_version))
+            try:
+                await self._export(payload)
+            except Exception as e:
+                logger.error(f"Failed to export {len(batch)} spans: {e}", user_id = "[System]")
+
+    async def shutdown(self) -> None:
+        """停止后台任务并导出剩余跨度"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    @abstractmethod
+    async def _export(self, payload: bytes) -> None:
+        """导出一个编码后的 ExportTraceServiceRequest"""
+        pass
+
+class FileSpanExporter(SpanExporter):
+    """
+    以 OTLP/JSON Lines 格式追加写入本地文件 (与 OpenTelemetry Collector 的 file exporter 格式一致)
+    """
+    def __init__(self, path: str | Path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+
+    def _write(self, payload: bytes) -> None:
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+        with open(self.path, "ab") as f:
+            f.write(payload + b"\n")
+
+    async def _export(self, payload: bytes) -> None:
+        await asyncio.to_thread(self._write, payload)
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """
+    通过 OTLP/HTTP (JSON) 发送到 Collector
+    """
+    def __init__(self, endpoint: str, timeout: float = 10.0, **kwargs):
+        super().__init__(**kwargs)
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else f"{endpoint}/v1/traces"
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+
+    async def _export(self, payload: bytes) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout = self.timeout)
+        response = await self._client.post(self.url, content = payload, headers = {"Content-Type": "application/json"})
+        response.raise_for_status()
+
+    async def shutdown(self) -> None:
+        await super().shutdown()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
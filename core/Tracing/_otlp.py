@@ -0,0 +1,69 @@
+"""
+OTLP/JSON 编码 (opentelemetry-proto ExportTraceServiceRequest)
+"""
+from typing import Any
+
+from ._span import Span
+
+# SpanKind: INTERNAL
+_SPAN_KIND_INTERNAL = 1
+# StatusCode
+_STATUS_CODES = {"OK": 1, "ERROR": 2}
+
+def _encode_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # int64 在 OTLP/JSON 中以字符串表示
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_encode_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+def _encode_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _encode_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+def _encode_span(span: Span) -> dict[str, Any]:
+    data = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": _SPAN_KIND_INTERNAL,
+        "startTimeUnixNano": str(span.start_time),
+        "endTimeUnixNano": str(span.end_time),
+        "attributes": _encode_attributes(span.attributes),
+        "status": {"code": _STATUS_CODES.get(span.status, 0)},
+    }
+    if span.parent_span_id:
+        data["parentSpanId"] = span.parent_span_id
+    if span.status_message:
+        data["status"]["message"] = span.status_message
+    return data
+
+def encode_spans(spans: list[Span], service_name: str, service_version: str = "") -> dict[str, Any]:
+    """
+    将跨度编码为 OTLP/JSON 的 ExportTraceServiceRequest
+
+    :param spans: 跨度列表
+    :param service_name: 服务名称 (service.name)
+    :param service_version: 服务版本 (service.version)
+    :return: 可直接序列化的字典
+    """
+    resource_attributes = {"service.name": service_name}
+    if service_version:
+        resource_attributes["service.version"] = service_version
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _encode_attributes(resource_attributes)},
+            "scopeSpans": [{
+                "scope": {"name": "repeater.core"},
+                "spans": [_encode_span(span) for span in spans],
+            }],
+        }]
+    }
@@ -0,0 +1,54 @@
+import os
+from dataclasses import dataclass, field
+from typing import Any
+
+def new_trace_id() -> str:
+    """生成128位追踪ID (十六进制)"""
+    return os.urandom(16).hex()
+
+def new_span_id() -> str:
+    """生成64位跨度ID (十六进制)"""
+    return os.urandom(8).hex()
+
+@dataclass
+class Trace:
+    """
+    一次被采样的请求所产生的全部跨度
+    """
+    trace_id: str = field(default_factory=new_trace_id)
+    spans: list["Span"] = field(default_factory=list)
+
+@dataclass
+class Span:
+    """
+    追踪跨度，字段与OpenTelemetry的Span一致
+    """
+    name: str
+    trace: Trace
+    span_id: str = field(default_factory=new_span_id)
+    parent_span_id: str = ""
+    start_time: int = 0
+    end_time: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    # OK / ERROR
+    status: str = "OK"
+    status_message: str = ""
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration(self) -> int:
+        """持续时间 (纳秒)"""
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = "ERROR"
+        self.status_message = f"{type(error).__name__}: {error}"
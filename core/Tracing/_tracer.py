@@ -0,0 +1,157 @@
+# ==== 标准库 ==== #
+import time
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterator
+
+# ==== 自定义库 ==== #
+from ._span import Span, Trace
+from ._exporters import SpanExporter, FileSpanExporter, OTLPHttpSpanExporter
+from ConfigManager import ConfigLoader
+
+configs = ConfigLoader()
+
+# 当前协程所在的跨度 (未采样时为None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default = None)
+
+class Tracer:
+    """
+    轻量的请求追踪器
+
+    由 start_trace 决定是否采样，未采样的请求中 span 与 record_span 均为空操作；
+    根跨度结束时整条追踪交给导出器
+    """
+    def __init__(self, sample_rate: float = 0.0, exporter: SpanExporter | None = None):
+        """
+        :param sample_rate: 采样率 (0~1)
+        :param exporter: 跨度导出器，为None时不导出
+        """
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and self.exporter is not None
+
+    @staticmethod
+    def current_span() -> Span | None:
+        """当前跨度，未采样时返回None"""
+        return _current_span.get()
+
+    @contextmanager
+    def _activate(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        span.start_time = time.time_ns()
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            span.end_time = time.time_ns()
+            _current_span.reset(token)
+            span.trace.spans.append(span)
+
+    @contextmanager
+    def start_trace(self, name: str, **attributes: Any) -> Iterator[Span | None]:
+        """
+        开始一条追踪，按采样率决定是否记录
+
+        :param name: 根跨度名称
+        :param attributes: 根跨度属性
+        :return: 根跨度，未采样时为None
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            token = _current_span.set(None)
+            try:
+                yield None
+            finally:
+                _current_span.reset(token)
+            return
+
+        root = Span(name = name, trace = Trace(), attributes = attributes)
+        try:
+            with self._activate(root):
+                yield root
+        finally:
+            self.exporter.submit(root.trace.spans)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | None]:
+        """
+        在当前追踪中创建子跨度
+
+        :param name: 跨度名称
+        :param attributes: 跨度属性
+        :return: 跨度，未采样时为None
+        """
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        with self._activate(Span(name = name, trace = parent.trace, parent_span_id = parent.span_id, attributes = attributes)) as span:
+            yield span
+
+    def record_span(self, name: str, start_time: int, end_time: int, **attributes: Any) -> None:
+        """
+        按已知的起止时间补记一个子跨度 (用于流式处理等无法包裹的阶段)
+
+        :param name: 跨度名称
+        :param start_time: 开始时间 (纳秒时间戳)
+        :param end_time: 结束时间 (纳秒时间戳)
+        :param attributes: 跨度属性
+        """
+        parent = _current_span.get()
+        if parent is None or not start_time or not end_time:
+            return
+        parent.trace.spans.append(Span(
+            name = name,
+            trace = parent.trace,
+            parent_span_id = parent.span_id,
+            start_time = start_time,
+            end_time = end_time,
+            attributes = attributes,
+        ))
+
+    async def shutdown(self) -> None:
+        """导出剩余跨度"""
+        if self.exporter is not None:
+            await self.exporter.shutdown()
+
+    @classmethod
+    def from_config(cls) -> "Tracer":
+        """根据项目配置创建追踪器"""
+        sample_rate = configs.get_config("Tracing_Sample_Rate", 0.0).get_value(float)
+        exporter_name = configs.get_config("Tracing_Exporter", "file").get_value(str).lower()
+        options = {
+            "service_name": configs.get_config("Tracing_Service_Name", "repeater").get_value(str),
+            "service_version": configs.get_config("VERSION", "").get_value(str),
+            "batch_size": configs.get_config("Tracing_Export_Batch_Size", 512).get_value(int),
+            "interval": configs.get_config("Tracing_Export_Interval", 5.0).get_value(float),
+        }
+        if exporter_name == "file":
+            exporter = FileSpanExporter(
+                configs.get_config("Tracing_File_Path", "./data/traces.jsonl").get_value(Path),
+                **options
+            )
+        elif exporter_name == "otlp":
+            exporter = OTLPHttpSpanExporter(
+                configs.get_config("Tracing_OTLP_Endpoint", "http://127.0.0.1:4318").get_value(str),
+                **options
+            )
+        elif exporter_name == "none":
+            exporter = None
+        else:
+            raise ValueError(f"Unknown tracing exporter: {exporter_name}")
+        return cls(sample_rate = sample_rate, exporter = exporter)
+
+_tracer: Tracer | None = None
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器，首次调用时根据配置创建"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer.from_config()
+    return _tracer
@@ -173,6 +173,13 @@ class ConfigManager:
         await self._user_config_manager.delete(user_id)
         logger.debug("Delete config", user_id = user_id)
     
+    @property
+    def data_manager(self) -> UserConfigManager:
+        """
+        底层的用户数据管理器 (用于导入导出等直接读写存储后端的操作)
+        """
+        return self._user_config_manager
+
     async def clear_cache(self) -> None:
         """
         清除缓存
@@ -203,7 +210,7 @@ class ConfigManager:
         for user_id, configs in cache.items():
             await self._user_config_manager.save(user_id, configs.configs)
         
-        logger.debug(f"Saved {len(cache)} config", user_id = user_id)
+        logger.debug(f"Saved {len(cache)} config", user_id = "[System]")
         cache.clear()
     
     async def get_all(self):
@@ -232,13 +239,37 @@ class ConfigManager:
         """
         return await self._user_config_manager.get_all_user_id()
     
-    async def get_all_item_id(self):
+    async def get_all_item_id(self, user_id: str):
+        """
+        获取用户的所有配置ID
+
+        :param user_id: 用户ID
+        :return: 配置项ID列表
         """
-        获取所有配置ID
+        return await self._user_config_manager.get_all_item_id(user_id)
 
+    async def list_user_ids(self, prefix: str = "", after: str | None = None, limit: int | None = None):
+        """
+        分页获取用户ID
+
+        :param prefix: 只返回以该前缀开头的ID
+        :param after: 游标 (上一页最后一个ID)
+        :param limit: 最多返回的数量，None表示不限
+        :return: 用户ID列表
+        """
+        return await self._user_config_manager.list_user_ids(prefix, after, limit)
+
+    async def list_item_ids(self, user_id: str, prefix: str = "", after: str | None = None, limit: int | None = None):
+        """
+        分页获取用户的配置ID
+
+        :param user_id: 用户ID
+        :param prefix: 只返回以该前缀开头的ID
+        :param after: 游标 (上一页最后一个ID)
+        :param limit: 最多返回的数量，None表示不限
         :return: 配置项ID列表
         """
-        return await self._user_config_manager.get_all_item_id()
+        return await self._user_config_manager.list_item_ids(user_id, prefix, after, limit)
     
     async def __aenter__(self):
         return self 
@@ -24,6 +24,9 @@ from .ApiInfo import (
     ApiGroup
 )
 from . import CallLog
+from .Compaction import ContextCompactor
+from .FuncerClient import FuncerToolbox
+from .Tracing import get_tracer
 from TextProcessors import (
     PromptVP
 )
@@ -61,7 +64,12 @@ class Core:
             version = __version__
         )
         # 初始化Client并设置并发大小
-        self.api_client = CallAPI.Client(configs.get_config('max_concurrency', 10).get_value(int) if max_concurrency is None else max_concurrency)
+        self.api_client = CallAPI.Client(
+            configs.get_config('max_concurrency', 10).get_value(int) if max_concurrency is None else max_concurrency,
+            raw_sse = configs.get_config('api_raw_sse', False).get_value(bool),
+            completion_cache = CallAPI.CompletionCache.from_config(),
+            coalesce = configs.get_config('api_request_coalescing', False).get_value(bool)
+        )
 
         # 初始化API信息管理器
         self.apiinfo = ApiInfo()
@@ -74,6 +82,29 @@ class Core:
         # 初始化调用日志管理器
         self.calllog = CallLog.CallLogManager(configs.get_config('Call_Log_File_Path').get_value(Path))
 
+        # 初始化上下文缓存命中统计
+        self.prompt_cache_stats = CallLog.PromptCacheTracker(
+            window = configs.get_config("Prompt_Cache_Stats_Window", 50).get_value(int),
+            max_users = configs.get_config("Prompt_Cache_Stats_Max_Users", 10000).get_value(int)
+        )
+
+        # 初始化请求追踪器
+        self.tracer = get_tracer()
+
+        # 初始化工具箱 (没有配置Funcer服务器时为None)
+        self.toolbox: FuncerToolbox | None = FuncerToolbox.from_config()
+
+        # 初始化历史记录压缩器 (未启用时为None)
+        self.context_compactor: ContextCompactor | None = ContextCompactor.from_config(
+            context = self.context_manager,
+            archive = DataManager.ContextArchiveManager(),
+            api_client = self.api_client,
+            apiinfo = self.apiinfo,
+            lock_getter = self._get_session_lock,
+            calllog = self.calllog,
+            prompt_cache_stats = self.prompt_cache_stats
+        )
+
         
         # 添加退出函数
         def _exit():
@@ -123,6 +154,11 @@ class Core:
         bot_birthday_day = configs.get_config("birthday_day").get_value(int)
         timezone = configs.get_config("timezone", 8).get_value(int)
         bot_name = configs.get_config("bot_name", "Bot").get_value(str)
+        # 时间变量的粒度 (秒)，取整后同一时段内的提示词保持不变，有利于命中供应商的上下文缓存
+        time_granularity = configs.get_config("Prompt_Time_Granularity", 0).get_value(int)
+        def current_time() -> float:
+            now = time.time()
+            return now - now % time_granularity if time_granularity > 0 else now
         return await self.promptvariable.get_prompt_variable(
             user_id = user_id,
             user_name = user_name,
@@ -135,7 +171,7 @@ class Core:
             botname = bot_name,
             birthday = f'{bot_birthday_year}.{bot_birthday_month}.{bot_birthday_day}',
             zodiac = lambda **kw: date_to_zodiac(bot_birthday_month, bot_birthday_day),
-            time = lambda **kw: format_timestamp(time.time(), config.get("timezone", timezone), '%Y-%m-%d %H:%M:%S %Z'),
+            time = lambda **kw: format_timestamp(current_time(), config.get("timezone", timezone), '%Y-%m-%d %H:%M:%S %Z'),
             age = lambda **kw: calculate_age(bot_birthday_year, bot_birthday_month, bot_birthday_day, offset_timezone = config.get("timezone", timezone)),
             random = lambda min, max: random.randint(int(min), int(max)),
             randfloat = lambda min, max: random.uniform(float(min), float(max)),
@@ -184,6 +220,31 @@ class Core:
     # endregion
 
     # region > get context
+    async def load_session_snapshot(
+            self,
+            user_id: str,
+            reference_context_id: str | None = None,
+            load_prompt: bool = True,
+            continue_completion: bool = False
+        ) -> Context.SessionSnapshot:
+        """
+        并发读取一轮对话需要的用户数据
+        :param user_id: 用户ID
+        :param reference_context_id: 引用上下文ID
+        :param load_prompt: 是否加载提示
+        :param continue_completion: 是否继续完成 (此时不需要历史记录)
+        :return: 会话快照
+        """
+        return await Context.load_session_snapshot(
+            config = self.user_config_manager,
+            prompt = self.prompt_manager,
+            context = self.context_manager,
+            user_id = user_id,
+            context_user_id = reference_context_id,
+            load_prompt = load_prompt,
+            load_context = not continue_completion
+        )
+
     async def get_context_loader(
             self,
             user_id: str,
@@ -222,7 +283,8 @@ class Core:
             role_name: str | None = None,
             load_prompt: bool = True,
             continue_completion: bool = False,
-            reference_context_id: str | None = None
+            reference_context_id: str | None = None,
+            snapshot: Context.SessionSnapshot | None = None
         ) -> Context.ContextObject:
         """
         获取上下文
@@ -235,6 +297,7 @@ class Core:
         :param load_prompt: 是否加载提示
         :param continue_completion: 是否继续完成
         :param reference_context_id: 引用上下文ID
+        :param snapshot: 会话快照
         :return: 上下文对象
         """
         if reference_context_id:
@@ -244,7 +307,8 @@ class Core:
                 role = role,
                 role_name = role_name if role_name else user_name,
                 load_prompt = load_prompt,
-                continue_completion = continue_completion
+                continue_completion = continue_completion,
+                snapshot = snapshot
             )
         else:
             context = await context_loader.load(
@@ -253,7 +317,8 @@ class Core:
                 role = role,
                 role_name = role_name,
                 load_prompt = load_prompt,
-                continue_completion = continue_completion
+                continue_completion = continue_completion,
+                snapshot = snapshot
             )
         return context
     # region > Chat
@@ -287,6 +352,38 @@ class Core:
         :param continue_completion: 是否继续完成
         :return: 返回对话结果
         """
+        with self.tracer.start_trace("chat", **{"user.id": user_id, "chat.stream": print_chunk}):
+            return await self._chat(
+                message = message,
+                user_id = user_id,
+                user_name = user_name,
+                role = role,
+                role_name = role_name,
+                model_type = model_type,
+                load_prompt = load_prompt,
+                print_chunk = print_chunk,
+                save_context = save_context,
+                reference_context_id = reference_context_id,
+                continue_completion = continue_completion,
+            )
+
+    async def _chat(
+            self,
+            message: str,
+            user_id: str,
+            user_name: str,
+            role: str,
+            role_name: str,
+            model_type: str | None,
+            load_prompt: bool,
+            print_chunk: bool,
+            save_context: bool,
+            reference_context_id: str | None,
+            continue_completion: bool,
+        ) -> dict[str, str]:
+        """
+        对话的具体流程，参数同 Chat
+        """
         # 记录开始时间
         task_start_time = time.time_ns()
 
@@ -295,14 +392,22 @@ class Core:
         
         # 加锁执行
         async with lock:
+            self.tracer.record_span("chat.lock_wait", task_start_time, time.time_ns())
             logger.info("====================================", user_id = user_id)
             logger.info("Start Task", user_id = user_id)
 
-            # 进行用户名映射
-            user_name = await self.load_nickname_mapping(user_id, user_name)
-
-            # 获取配置
-            config = await self.get_config(user_id)
+            # 并发进行用户名映射与读取用户数据 (配置、提示词与历史记录)
+            with self.tracer.span("chat.session_load"):
+                user_name, snapshot = await asyncio.gather(
+                    self.load_nickname_mapping(user_id, user_name),
+                    self.load_session_snapshot(
+                        user_id = user_id,
+                        reference_context_id = reference_context_id,
+                        load_prompt = load_prompt,
+                        continue_completion = continue_completion
+                    )
+                )
+            config = snapshot.config
             
             # 获取模型类型
             if not model_type:
@@ -317,17 +422,19 @@ class Core:
             )
 
             # 获取上下文
-            context = await self.get_context(
-                context_loader = context_loader,
-                user_id = user_id,
-                message = message,
-                user_name = user_name,
-                role = role,
-                role_name = role_name,
-                load_prompt = load_prompt,
-                continue_completion = continue_completion,
-                reference_context_id = reference_context_id
-            )
+            with self.tracer.span("chat.context_load"):
+                context = await self.get_context(
+                    context_loader = context_loader,
+                    user_id = user_id,
+                    message = message,
+                    user_name = user_name,
+                    role = role,
+                    role_name = role_name,
+                    load_prompt = load_prompt,
+                    continue_completion = continue_completion,
+                    reference_context_id = reference_context_id,
+                    snapshot = snapshot
+                )
             
             # 创建请求对象
             request = CallAPI.Request()
@@ -345,6 +452,13 @@ class Core:
             request.key = api.api_key
             logger.info(f"API URL: {api.url}", user_id = user_id)
             logger.info(f"API Model: {api.model_name}", user_id = user_id)
+            root_span = self.tracer.current_span()
+            if root_span is not None:
+                root_span.set_attributes(**{
+                    "model.type": model_type,
+                    "model.id": api.model_id,
+                    "context.length": len(context),
+                })
 
             # 打印上下文信息
             if request.context.last_content.content:
@@ -368,6 +482,15 @@ class Core:
             request.frequency_penalty = config.get("frequency_penalty", configs.get_config("default_frequency_penalty", 0.0).get_value(float))
             request.presence_penalty = config.get("presence_penalty", configs.get_config("default_presence_penalty", 0.0).get_value(float))
             request.print_chunk = print_chunk
+            # 模型元数据中启用了响应缓存时设置有效期
+            request.cache_ttl = self.api_client.completion_cache.ttl_for(api.metadata)
+            # 提供Funcer服务器上的函数作为工具
+            if self.toolbox is not None:
+                request.tools = await self.toolbox.tools() or None
+                if request.tools:
+                    request.tool_choice = "auto"
+            # 预先创建流式响应组装器，请求被取消时仍能取得已经收到的内容
+            request.stream_assembler = CallAPI.StreamAssembler()
 
             # 记录预处理结束时间
             call_prepare_end_time = time.time_ns()
@@ -381,45 +504,81 @@ class Core:
                 "model_id": api.model_id,
             }
 
-            # 提交请求
+            # 提交请求 (模型调用工具时会请求多次)
             try:
-                response = await self.api_client.submit_Request(user_id=user_id, request=request)
+                with self.tracer.span("chat.api_call"):
+                    responses = await self._call_with_tools(user_id=user_id, request=request)
             except CallAPI.Exceptions.CallApiException as e:
                 output["content"] = f"Error:{e}"
                 return output
-
-            # 补充调用日志的时间信息
-            response.calling_log.task_start_time = task_start_time
-            response.calling_log.call_prepare_start_time = task_start_time
-            response.calling_log.call_prepare_end_time = call_prepare_end_time
-            response.calling_log.created_time = response.created
-
-            # 获取Prompt_vp以展开模型输出内容
-            prompt_vp = await self.get_prompt_vp(
-                user_id = user_id,
-                user_name = user_name,
-                model_type = model_type,
-                config = config
-            )
-            # 处理模型输出内容
-            response.context.last_content.content = prompt_vp.process(response.context.last_content.content)
-            # 记录Prompt_vp的命中情况
-            logger.info(f"Prompt Hits Variable: {prompt_vp.hit_var()}/{prompt_vp.discover_var()}({prompt_vp.hit_var() / prompt_vp.discover_var() if prompt_vp.discover_var() != 0 else 0:.2%})", user_id = user_id)
+            except asyncio.CancelledError:
+                # 保存已经收到的部分回复
+                if save_context and not request.stream_assembler.is_empty:
+                    logger.warning("Request cancelled, saving partial response", user_id = user_id)
+                    context.append(request.stream_assembler.snapshot())
+                    await context_loader.save(
+                        user_id = user_id,
+                        context = context
+                    )
+                raise
+
+            # 最后一次请求为最终回复
+            response = responses[-1]
+
+            # 补充调用日志的时间信息 (工具循环中的每次请求同属一个任务)
+            for item in responses:
+                item.calling_log.task_start_time = task_start_time
+                item.calling_log.call_prepare_start_time = task_start_time
+                item.calling_log.call_prepare_end_time = call_prepare_end_time
+                item.calling_log.created_time = item.created
+
+            with self.tracer.span("chat.output_processing"):
+                # 获取Prompt_vp以展开模型输出内容
+                prompt_vp = await self.get_prompt_vp(
+                    user_id = user_id,
+                    user_name = user_name,
+                    model_type = model_type,
+                    config = config
+                )
+                # 处理模型输出内容
+                response.context.last_content.content = prompt_vp.process(response.context.last_content.content)
+                # 记录Prompt_vp的命中情况
+                logger.info(f"Prompt Hits Variable: {prompt_vp.hit_var()}/{prompt_vp.discover_var()}({prompt_vp.hit_var() / prompt_vp.discover_var() if prompt_vp.discover_var() != 0 else 0:.2%})", user_id = user_id)
 
             # 保存上下文
             if save_context:
-                await context_loader.save(
-                    user_id = user_id,
-                    context = response.context
-                )
+                with self.tracer.span("chat.context_save"):
+                    await context_loader.save(
+                        user_id = user_id,
+                        context = response.context
+                    )
+                # 历史记录过长时交给后台压缩 (只入队，不等待)
+                if self.context_compactor is not None:
+                    self.context_compactor.submit(user_id, response.context)
             else:
                 logger.warning("Context not saved", user_id = user_id)
 
             # 记录任务结束时间
-            response.calling_log.task_end_time = time.time_ns()
-
-            # 记录调用日志
-            await self.calllog.add_call_log(response.calling_log)
+            task_end_time = time.time_ns()
+            for item in responses:
+                item.calling_log.task_end_time = task_end_time
+
+            # 关联追踪与调用日志
+            if root_span is not None:
+                for item in responses:
+                    item.calling_log.trace_id = root_span.trace_id
+                root_span.set_attributes(**{
+                    "call_log.id": response.calling_log.id,
+                    "api.calls": len(responses),
+                    "tokens.prompt": sum(item.calling_log.prompt_tokens for item in responses),
+                    "tokens.completion": sum(item.calling_log.completion_tokens for item in responses),
+                })
+
+            # 记录调用日志与缓存命中情况 (响应缓存的重放没有请求供应商，不计入上下文缓存统计)
+            for item in responses:
+                await self.calllog.add_call_log(item.calling_log)
+                if not item.cached:
+                    self.prompt_cache_stats.record(item.calling_log)
 
             # 记录API调用成功
             logger.success(f"API call successful", user_id = user_id)
@@ -431,6 +590,48 @@ class Core:
             return output
     # endregion
 
+    # region > 工具循环
+    async def _call_with_tools(self, user_id: str, request: CallAPI.Request) -> list[CallAPI.Response]:
+        """
+        请求模型，模型返回工具调用时并发执行工具，把结果加入上下文后再次请求，直到模型不再调用工具
+
+        超过最大轮数或总时限后不再执行工具：未执行的调用以错误结果回复，并要求模型直接回答 (tool_choice=none)，
+        此时模型仍然返回的工具调用会被丢弃，只保留回复的正文
+
+        :param user_id: 用户ID
+        :param request: 请求对象，模型的回复与工具结果都会追加到 request.context 中
+        :return: 每次请求的响应，最后一个为最终回复
+        """
+        # 总时限从第一次请求模型开始计算
+        started = time.monotonic()
+        responses = [await self.api_client.submit_Request(user_id=user_id, request=request)]
+        if self.toolbox is None or not request.tools:
+            return responses
+        deadline = started + self.toolbox.deadline
+        rounds = 0
+        while True:
+            last_content = request.context.last_content
+            calls = last_content.funcResponse.callingFunctionResponse if last_content.funcResponse is not None else []
+            if not calls:
+                return responses
+            if request.tool_choice == "none":
+                # 要求模型直接回答后仍然返回了工具调用，丢弃这些调用，使最后一条上下文仍是模型的回复
+                logger.warning(f"Dropped {len(calls)} tool calls after tool_choice=none", user_id = user_id)
+                last_content.funcResponse = None
+                return responses
+            # 新的组装器只接收下一次请求的回复 (执行工具期间被取消时不会重复保存上一次的回复)
+            request.stream_assembler = CallAPI.StreamAssembler()
+            if rounds >= self.toolbox.max_rounds or time.monotonic() >= deadline:
+                logger.warning(f"Tool loop stopped after {rounds} rounds", user_id = user_id)
+                request.context.context_list += self.toolbox.reject(calls, "tool call limit reached")
+                request.tool_choice = "none"
+            else:
+                rounds += 1
+                with self.tracer.span("chat.tool_round", **{"tool.round": rounds, "tool.calls": len(calls)}):
+                    request.context.context_list += await self.toolbox.run(user_id, calls, deadline)
+            responses.append(await self.api_client.submit_Request(user_id=user_id, request=request))
+    # endregion
+
     # region > 重新加载API信息
     async def reload_apiinfo(self):
         await self.apiinfo.load_async(configs.get_config("api_info_file_path", "./config/api_info.json").get_value(Path))
@@ -0,0 +1,38 @@
+import os
+import argparse
+from pathlib import Path
+
+from ConfigManager import ConfigLoader
+
+def main():
+    parser = argparse.ArgumentParser(description="将文件存储的用户数据迁移到SQLite数据库")
+    parser.add_argument("--config", default=os.environ.get("CONFIG_FILE_PATH", "./configs/project_config.json"), help="项目配置文件路径")
+    parser.add_argument("--source", default=None, help="用户数据目录，默认使用配置中的 User_Data_Dir")
+    parser.add_argument("--db", default=None, help="目标数据库路径，默认使用配置中的 User_Data_SQLite_Path")
+    parser.add_argument("--manager", action="append", default=None, help="只迁移指定的管理器 (可重复)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="单个事务写入的记录数")
+    args = parser.parse_args()
+
+    # 一定要提前加载，否则其他模块会无法获取配置内容
+    configs = ConfigLoader(
+        config_file_path = args.config if Path(args.config).exists() else None
+    )
+    from core.DataManager.SQLiteUserDataManager import migrate_file_layout
+
+    source = Path(args.source) if args.source else configs.get_config("User_Data_Dir", "./userdata").get_value(Path)
+    db_path = Path(args.db) if args.db else configs.get_config("User_Data_SQLite_Path", "./data/userdata.sqlite3").get_value(Path)
+
+    print(f"迁移 {source} -> {db_path}")
+    stats = migrate_file_layout(
+        source_dir = source,
+        db_path = db_path,
+        managers = args.manager,
+        metadata_filename = configs.get_config("User_Data_Metadata_Filename", "metadata.json").get_value(str),
+        sub_dir_name = configs.get_config("User_Data_Sub_Dir_Name", "ParallelData").get_value(str),
+        batch_size = args.batch_size,
+    )
+    for manager, counts in stats.items():
+        print(f"{manager}: {counts['users']} 个用户, {counts['metadata']} 个元数据, {counts['items']} 个条目")
+
+if __name__ == '__main__':
+    main()
@@ -7,9 +7,11 @@ from uuid import uuid4
 from typing import Any
 from io import BytesIO
 import zipfile
+import tarfile
 import json
 import time
 from pathlib import Path
+from urllib.parse import quote, unquote
 
 # ==== 第三方库 ==== #
 import orjson
@@ -19,7 +21,6 @@ env.read_env()
 from fastapi import (
     FastAPI,
     Request,
-    BackgroundTasks,
     Form,
     Query,
     Header
@@ -47,7 +48,24 @@ from core import (
     Context
 )
 from core.CallLog import CallAPILog
-from Markdown import markdown_to_image, STYLES as MARKDOWN_STYLES
+from core.DataManager import (
+    get_offload_executor,
+    export_archive,
+    import_archive
+)
+from core.Tracing import get_tracer
+from Markdown import (
+    render_markdown_image,
+    render_markdown_pages,
+    normalize_format as normalize_image_format,
+    media_type_of,
+    pillow_available,
+    PillowNotInstalledError,
+    RenderCache,
+    RenderArtifactManager,
+    STYLES as MARKDOWN_STYLES,
+    __renderer_version__ as MARKDOWN_RENDERER_VERSION
+)
 from admin_apikey_manager import AdminKeyManager
 # endregion
 
@@ -57,6 +75,41 @@ chat = Core()
 
 # 生成或读取API Key
 admin_api_key = AdminKeyManager()
+
+# 渲染结果缓存
+render_cache = RenderCache(
+    cache_dir = configs.get_config("render_cache_dir", "./temp/render_cache").get_value(Path),
+    max_size = configs.get_config("render_cache_max_size", 256 * 1024 * 1024).get_value(int)
+)
+
+# 渲染产物过期管理器
+render_artifacts = RenderArtifactManager(
+    directory = configs.get_config("rendered_image_dir", "./temp/render").get_value(Path),
+    batch_size = configs.get_config("render_artifact_sweep_batch_size", 64).get_value(int),
+    flush_interval = configs.get_config("render_artifact_index_flush_interval", 5.0).get_value(float)
+)
+# endregion
+
+# region Lifecycle
+@app.on_event("startup")
+async def startup():
+    """
+    启动时恢复渲染产物索引并启动清理协程
+    """
+    await render_artifacts.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    关闭时停止清理协程与历史记录压缩、写回索引、导出剩余追踪数据并关闭用户数据线程池
+    """
+    await render_artifacts.stop()
+    if chat.context_compactor is not None:
+        await chat.context_compactor.shutdown()
+    if chat.toolbox is not None:
+        await chat.toolbox.aclose()
+    await get_tracer().shutdown()
+    get_offload_executor().shutdown()
 # endregion
 
 # region Tool: validate_path
@@ -75,6 +128,35 @@ def validate_path(base_path: str | Path, user_path: str | Path) -> bool:
     return requested_path.is_relative_to(base_path)
 # endregion
 
+# region Tool: paginated_ids
+userdata_list_max_page_size = configs.get_config("userdata_list_max_page_size", 1000).get_value(int)
+
+async def paginated_ids(fetch, prefix: str, cursor: str | None, limit: int | None) -> JSONResponse:
+    """
+    以JSON数组返回一页ID，还有下一页时在 X-Next-Cursor 响应头中给出游标
+
+    未指定 limit 时返回全部结果，与分页前的接口保持一致。
+    响应头只能包含Latin-1字符，游标经过百分号编码，原样作为下一次请求的 cursor 参数即可
+
+    :param fetch: 分页查询函数 (prefix, after, limit) -> list[str]
+    :param prefix: 只返回以该前缀开头的ID
+    :param cursor: 上一页响应中的 X-Next-Cursor
+    :param limit: 每页数量
+    """
+    if cursor is not None:
+        cursor = unquote(cursor)
+    if limit is None:
+        return JSONResponse(await fetch(prefix, cursor, None))
+    limit = min(limit, userdata_list_max_page_size)
+    # 多取一个用于判断是否还有下一页
+    ids = await fetch(prefix, cursor, limit + 1)
+    headers = {}
+    if len(ids) > limit:
+        ids = ids[:limit]
+        headers["X-Next-Cursor"] = quote(ids[-1], safe = "")
+    return JSONResponse(ids, headers = headers)
+# endregion
+
 # region Readme
 @app.get("/readme.md")
 async def readme():
@@ -143,42 +225,18 @@ async def chat_endpoint(
 # endregion
 
 # region Render
-@app.post("/render/{user_id}")
-async def render(
-    request: Request,
-    background_tasks: BackgroundTasks,
+async def _resolve_render_options(
     user_id: str,
-    text: str = Form(...),
-    style: str | None = Form(None),
-    timeout: int | None = Form(None),
-):
-    """
-    Endpoint for rendering markdown text to image
+    style: str | None,
+    image_format: str | None,
+    quality: int | None,
+) -> tuple[str, str, int | None]:
     """
-    # 生成图片ID
-    fuuid = uuid4()
-    filename = f"{fuuid}.png"
-    rendered_image_dir = configs.get_config("rendered_image_dir", "./temp/render").get_value(Path)
+    解析渲染风格与输出格式参数
 
-    # 延迟删除函数
-    async def _wait_delete(sleep_time: int, filename: str):
-        """
-        等待一段时间后删除图片
-        """
-        async def _delete(filename: str):
-            """
-            删除图片
-            """
-            await asyncio.to_thread(os.remove, rendered_image_dir / filename)
-            logger.info(f'Deleted image {filename}', user_id = user_id)
-        
-        try:
-            await asyncio.sleep(sleep_time)
-            await _delete(filename)
-        except asyncio.CancelledError:
-            logger.info("Image delete task cancelled", user_id = user_id)
-            await _delete(filename)
-        
+    :return: (渲染风格, 输出格式, 质量)
+    """
+    config = None
     if style:
         if style not in MARKDOWN_STYLES:
             raise HTTPException(status_code=400, detail="Invalid style")
@@ -189,41 +247,202 @@ async def render(
         default_style = configs.get_config("markdown_to_image_style", "light").get_value(str)
         # 获取图片渲染风格
         style = config.get('render_style', default_style)
+
+    if not image_format:
+        if config is None:
+            config = await chat.user_config_manager.load(user_id)
+        default_format = configs.get_config("render_output_format", "png").get_value(str)
+        image_format = config.get('render_format', default_format)
+    try:
+        image_format = normalize_image_format(image_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if quality is not None and not 1 <= quality <= 100:
+        raise HTTPException(status_code=400, detail="Quality must be between 1 and 100")
+
+    return style, image_format, quality
+
+@app.post("/render/{user_id}")
+async def render(
+    request: Request,
+    user_id: str,
+    text: str = Form(...),
+    style: str | None = Form(None),
+    timeout: int | None = Form(None),
+    image_format: str | None = Form(None, alias="format"),
+    quality: int | None = Form(None),
+    max_bytes: int | None = Form(None),
+):
+    """
+    Endpoint for rendering markdown text to image
+    """
+    rendered_image_dir = configs.get_config("rendered_image_dir", "./temp/render").get_value(Path)
+
+    style, image_format, quality = await _resolve_render_options(user_id, style, image_format, quality)
     
     if not timeout:
         timeout = configs.get_config("rendered_default_image_timeout", 60.0).get_value(float)
+    if not max_bytes:
+        max_bytes = configs.get_config("render_max_bytes", None).get_value((int, None))
     
-    # 日志打印文件名和渲染风格
-    logger.info(f'Rendering image {filename} for "{style}" style', user_id=user_id)
+    # 渲染参数
+    width = configs.get_config("render_width", 800).get_value(int)
+    dpi = configs.get_config("default_output_dpi", 150).get_value(int)
+
+    def _render(output_base: Path) -> Path:
+        return render_markdown_image(
+            markdown_text = text,
+            output_base = output_base,
+            width = width,
+            style = style,
+            output_format = image_format,
+            quality = quality,
+            max_bytes = max_bytes
+        )
+
+    try:
+        if render_cache.enabled:
+            # 以渲染参数的哈希值作为图片ID
+            fuuid = render_cache.make_key(
+                text = text,
+                style = style,
+                width = width,
+                dpi = dpi,
+                format = image_format,
+                quality = quality,
+                max_bytes = max_bytes,
+                renderer_version = MARKDOWN_RENDERER_VERSION
+            )
+
+            # 查询缓存，未命中时渲染并写入缓存
+            output_path, cached = await render_cache.get_or_create(fuuid, _render)
+            if cached:
+                logger.info(f'Render cache hit {output_path.name} for "{style}" style', user_id=user_id)
+            else:
+                logger.info(f'Rendered and cached image {output_path.name} for "{style}" style', user_id=user_id)
+        else:
+            # 生成图片ID
+            fuuid = uuid4()
+            cached = False
+
+            # 日志打印图片ID和渲染风格
+            logger.info(f'Rendering image {fuuid} for "{style}" style', user_id=user_id)
+
+            # 生成图片
+            output_path = await asyncio.to_thread(_render, rendered_image_dir / str(fuuid))
+            logger.info(f'Created image {output_path.name}', user_id = user_id)
+
+            # 登记图片，时间到后由清理协程删除
+            render_artifacts.register(output_path.name, timeout)
+    except PillowNotInstalledError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # 调用markdown_to_image函数生成图片
-    await asyncio.to_thread(
-        markdown_to_image,
-        markdown_text = text,
-        output_path = rendered_image_dir / filename,
-        style = style
-    )
     create_ms = time.time_ns() // 10**6
     create = create_ms // 1000
-    logger.info(f'Created image {filename}', user_id = user_id)
-
-    # 添加一个后台任务，时间到后删除图片
-    background_tasks.add_task(_wait_delete, timeout, filename)
 
     # 生成图片的URL
-    fileurl = request.url_for("render_file", file_uuid=fuuid)
+    fileurl = request.url_for("render_file", file_uuid=fuuid, suffix=output_path.suffix.lstrip("."))
 
     return JSONResponse(
         {
             "image_url": str(fileurl),
             "file_uuid": str(fuuid),
             "style": style,
+            "format": output_path.suffix.lstrip("."),
+            "size": output_path.stat().st_size,
             "timeout": timeout,
+            "cached": cached,
             "text": text,
             "create": create,
             "create_ms": create_ms
         }
     )
+
+@app.post("/render/pages/{user_id}")
+async def render_pages(
+    request: Request,
+    user_id: str,
+    text: str = Form(...),
+    style: str | None = Form(None),
+    timeout: int | None = Form(None),
+    image_format: str | None = Form(None, alias="format"),
+    quality: int | None = Form(None),
+    max_bytes: int | None = Form(None),
+    page_height: int | None = Form(None),
+):
+    """
+    Endpoint for rendering markdown text to paged images
+
+    Each page is streamed back as a JSON line once it has been encoded.
+    """
+    if not pillow_available():
+        raise HTTPException(status_code=400, detail="Pillow is required for paged rendering")
+
+    rendered_image_dir = configs.get_config("rendered_image_dir", "./temp/render").get_value(Path)
+
+    style, image_format, quality = await _resolve_render_options(user_id, style, image_format, quality)
+
+    if not timeout:
+        timeout = configs.get_config("rendered_default_image_timeout", 60.0).get_value(float)
+    if not max_bytes:
+        max_bytes = configs.get_config("render_max_bytes", None).get_value((int, None))
+    if not page_height:
+        page_height = configs.get_config("render_page_height", 4000).get_value(int)
+    width = configs.get_config("render_width", 800).get_value(int)
+
+    # 生成图片组ID
+    fuuid = uuid4()
+    logger.info(f'Rendering paged image {fuuid} for "{style}" style', user_id=user_id)
+
+    pages = render_markdown_pages(
+        markdown_text = text,
+        output_dir = rendered_image_dir,
+        name_prefix = str(fuuid),
+        page_height = page_height,
+        width = width,
+        style = style,
+        output_format = image_format,
+        quality = quality,
+        max_bytes = max_bytes
+    )
+
+    async def generate_pages():
+        """
+        逐页生成并输出JSONL
+        """
+        index = 0
+        while True:
+            # 在线程中渲染并编码下一页
+            output_path = await asyncio.to_thread(next, pages, None)
+            if output_path is None:
+                break
+
+            # 登记图片，时间到后由清理协程删除
+            render_artifacts.register(output_path.name, timeout)
+            fileurl = request.url_for("render_file", file_uuid=output_path.stem, suffix=output_path.suffix.lstrip("."))
+            yield orjson.dumps(
+                {
+                    "page": index,
+                    "image_url": str(fileurl),
+                    "file_uuid": output_path.stem,
+                    "format": output_path.suffix.lstrip("."),
+                    "size": output_path.stat().st_size,
+                    "timeout": timeout,
+                },
+                option=orjson.OPT_APPEND_NEWLINE
+            )
+            index += 1
+        logger.info(f'Created {index} pages for image {fuuid}', user_id = user_id)
+
+    return StreamingResponse(
+        generate_pages(),
+        media_type="application/x-ndjson",
+        headers={
+            "X-Content-Type-Options": "nosniff",
+            "Cache-Control": "no-cache"
+        }
+    )
 # endregion
 
 # region PromptVariableExpansion
@@ -282,15 +501,12 @@ async def get_context(user_id: str):
     )
 
 @app.get("/userdata/context/userlist")
-async def get_context_userlist():
+async def get_context_userlist(prefix: str = "", cursor: str | None = None, limit: int | None = Query(None, ge = 1)):
     """
     Endpoint for getting context
     """
-    # 从chat.context_manager中获取所有用户ID
-    userid_list = await chat.context_manager.get_all_user_id()
-
-    # 返回JSONResponse，包含所有用户ID
-    return JSONResponse(userid_list)
+    # 从chat.context_manager中分页获取用户ID
+    return await paginated_ids(chat.context_manager.list_user_ids, prefix, cursor, limit)
 
 @app.post("/userdata/context/withdraw/{user_id}")
 async def withdraw_context(user_id: str, index: int = Form(...)):
@@ -335,15 +551,15 @@ async def rewrite_context(user_id: str, index: int = Form(...), content: str = F
     return JSONResponse(context)
 
 @app.get("/userdata/context/branch/{user_id}")
-async def get_context_branch_id(user_id: str):
+async def get_context_branch_id(user_id: str, prefix: str = "", cursor: str | None = None, limit: int | None = Query(None, ge = 1)):
     """
     Endpoint for getting context branch id list
     """
-    # 获取用户ID为user_id的上下文分支ID
-    branchs = await chat.context_manager.get_all_item_id(user_id)
-
-    # 返回上下文分支ID
-    return JSONResponse(branchs)
+    # 分页获取用户ID为user_id的上下文分支ID
+    return await paginated_ids(
+        lambda prefix, after, limit: chat.context_manager.list_item_ids(user_id, prefix, after, limit),
+        prefix, cursor, limit
+    )
 
 @app.get("/userdata/context/now_branch/{user_id}")
 async def get_context_now_branch_id(user_id: str):
@@ -368,6 +584,26 @@ async def change_context(user_id: str, new_branch_id: str):
     # 返回成功文本
     return PlainTextResponse("Context changed successfully")
 
+@app.post("/userdata/context/fork/{user_id}")
+async def fork_context(user_id: str, new_branch_id: str, source_branch_id: str | None = None):
+    """
+    Endpoint for forking context into a new branch
+    """
+    # 未指定源分支时从当前分支分叉
+    if source_branch_id is None:
+        source_branch_id = await chat.context_manager.get_default_item_id(user_id)
+
+    # 不覆盖已有的分支 (按字典序，与前缀完全相同的ID排在最前，只需列出一个ID，不读取分支内容)
+    if new_branch_id in await chat.context_manager.list_item_ids(user_id, prefix = new_branch_id, limit = 1):
+        raise HTTPException(409, "Branch already exists")
+
+    # 新分支与源分支共享数据 (写时复制)，并切换到新分支
+    await chat.context_manager.fork_item(user_id, source_branch_id, new_branch_id)
+    await chat.context_manager.set_default_item_id(user_id, item = new_branch_id)
+
+    # 返回成功文本
+    return PlainTextResponse("Context forked successfully")
+
 @app.delete("/userdata/context/delete/{user_id}")
 async def delete_context(user_id: str):
     """
@@ -404,26 +640,23 @@ async def set_prompt(user_id: str, prompt: str = Form(...)):
     return PlainTextResponse("Prompt set successfully")
 
 @app.get("/userdata/prompt/userlist")
-async def get_prompt_userlist():
+async def get_prompt_userlist(prefix: str = "", cursor: str | None = None, limit: int | None = Query(None, ge = 1)):
     """
     Endpoint for getting prompt user list
     """
-    # 获取所有用户ID
-    userid_list = await chat.prompt_manager.get_all_user_id()
-
-    # 返回用户ID列表
-    return JSONResponse(userid_list)
+    # 分页获取用户ID
+    return await paginated_ids(chat.prompt_manager.list_user_ids, prefix, cursor, limit)
 
 @app.get("/userdata/prompt/branch/{user_id}")
-async def get_prompt_branch_id(user_id: str):
+async def get_prompt_branch_id(user_id: str, prefix: str = "", cursor: str | None = None, limit: int | None = Query(None, ge = 1)):
     """
     Endpoint for getting prompt branch ID
     """
-    # 获取用户ID为user_id的提示词分支ID
-    branchs = await chat.prompt_manager.get_all_item_id(user_id)
-
-    # 返回分支ID
-    return JSONResponse(branchs)
+    # 分页获取用户ID为user_id的提示词分支ID
+    return await paginated_ids(
+        lambda prefix, after, limit: chat.prompt_manager.list_item_ids(user_id, prefix, after, limit),
+        prefix, cursor, limit
+    )
 
 @app.get("/userdata/prompt/now_branch/{user_id}")
 async def get_prompt_now_branch_id(user_id: str):
@@ -530,28 +763,25 @@ async def delkey_config(user_id: str, key: str = Form(...)):
     return JSONResponse(config)
 
 @app.get("/userdata/config/userlist")
-async def get_config_userlist():
+async def get_config_userlist(prefix: str = "", cursor: str | None = None, limit: int | None = Query(None, ge = 1)):
     """
     Endpoint for getting config userlist
     """
 
-    # 获取所有用户ID
-    userid_list = await chat.user_config_manager.get_all_user_id()
-
-    # 返回用户ID列表
-    return JSONResponse(userid_list)
+    # 分页获取用户ID
+    return await paginated_ids(chat.user_config_manager.list_user_ids, prefix, cursor, limit)
 
 @app.get("/userdata/config/branch/{user_id}")
-async def get_config_branch_id(user_id: str):
+async def get_config_branch_id(user_id: str, prefix: str = "", cursor: str | None = None, limit: int | None = Query(None, ge = 1)):
     """
     Endpoint for get config branch id
     """
 
-    # 设置平行配置路由
-    branchs = await chat.user_config_manager.get_all_item_id(user_id)
-
-    # 返回分支ID
-    return JSONResponse(branchs)
+    # 分页获取平行配置ID
+    return await paginated_ids(
+        lambda prefix, after, limit: chat.user_config_manager.list_item_ids(user_id, prefix, after, limit),
+        prefix, cursor, limit
+    )
 
 @app.get("/userdata/config/now_branch/{user_id}")
 async def get_config_now_branch_id(user_id: str):
@@ -626,6 +856,23 @@ async def get_calllog():
     # 返回JSON响应
     return JSONResponse(calllog_list)
 
+@app.get("/calllog/cache")
+async def get_prompt_cache_summary():
+    """
+    Endpoint for getting prompt cache hit summary of all users
+    """
+    return JSONResponse(chat.prompt_cache_stats.summary())
+
+@app.get("/calllog/cache/{user_id}")
+async def get_prompt_cache_stats(user_id: str):
+    """
+    Endpoint for getting prompt cache hit trend of a user
+    """
+    stats = chat.prompt_cache_stats.user_stats(user_id)
+    if stats is None:
+        raise HTTPException(detail="No call record for this user", status_code=404)
+    return JSONResponse(stats)
+
 @app.get("/calllog/stream")
 async def stream_call_logs():
     async def generate_jsonl():
@@ -659,18 +906,29 @@ async def stream_call_logs():
 # endregion
 
 # region get files
-@app.get("/file/render/{file_uuid}.png", name = "render_file")
-async def render_file(file_uuid: str):
+@app.get("/file/render/{file_uuid}.{suffix}", name = "render_file")
+async def render_file(file_uuid: str, suffix: str):
     """
     Endpoint for rendering file
     """
     rendered_image_dir = configs.get_config("rendered_image_dir", "./temp/render").get_value(Path)
+    filename = f"{file_uuid}.{suffix}"
+    media_type = media_type_of(f".{suffix}")
+    if media_type is None or not validate_path(rendered_image_dir, filename):
+        raise HTTPException(detail="Invalid file name", status_code=400)
+
+    # 优先查找渲染缓存
+    if render_cache.enabled:
+        cached_path = render_cache.get(file_uuid)
+        if cached_path is not None and cached_path.name == filename:
+            return FileResponse(cached_path, media_type = media_type)
+
     # 检查文件是否存在
-    if not (rendered_image_dir / f"{file_uuid}.png").exists():
+    if not (rendered_image_dir / filename).exists():
         raise HTTPException(detail="File not found", status_code=404)
     
     # 返回文件
-    return FileResponse(rendered_image_dir / f"{file_uuid}.png")
+    return FileResponse(rendered_image_dir / filename, media_type = media_type)
 # endregion
 
 # region Admin API
@@ -686,6 +944,134 @@ async def reload_apiinfo(api_key: str = Header(..., alias="X-Admin-API-Key")):
     return JSONResponse({"detail": "Apiinfo reloaded"})
 
 
+@app.get("/admin/metrics/executor")
+async def get_executor_metrics(api_key: str = Header(..., alias="X-Admin-API-Key")):
+    """
+    Endpoint for getting user data executor metrics
+    """
+    if not admin_api_key.validate_key(api_key):
+        raise HTTPException(detail="Invalid API key", status_code=401)
+    return JSONResponse(get_offload_executor().stats())
+
+
+def userdata_managers() -> dict[str, Any]:
+    """
+    导入导出使用的管理器 (归档中的顶层目录名 -> 管理器)
+
+    启用历史记录压缩时同时导出被压缩的原始消息 (冷存储)
+    """
+    managers = {
+        "context": chat.context_manager,
+        "prompt": chat.prompt_manager,
+        "config": chat.user_config_manager.data_manager,
+    }
+    if chat.context_compactor is not None:
+        managers["context_archive"] = chat.context_compactor.archive
+    return managers
+
+
+@app.get("/admin/userdata/export")
+async def export_userdata(
+    cursor: str | None = None,
+    api_key: str = Header(..., alias="X-Admin-API-Key")
+):
+    """
+    Endpoint for exporting all user data as a tar stream
+    """
+    if not admin_api_key.validate_key(api_key):
+        raise HTTPException(detail="Invalid API key", status_code=401)
+    logger.info(f"Exporting user data after {cursor!r}", user_id="[Admin API]")
+    # 先写入缓存中尚未保存的配置
+    await chat.user_config_manager.save_all()
+    return StreamingResponse(
+        export_archive(
+            userdata_managers(),
+            cursor = cursor,
+            rate = configs.get_config("userdata_export_rate_limit", 0).get_value(int),
+            page_size = configs.get_config("userdata_export_page_size", 256).get_value(int),
+        ),
+        media_type = "application/x-tar",
+        headers = {"Content-Disposition": 'attachment; filename="userdata.tar"'}
+    )
+
+
+@app.post("/admin/userdata/import")
+async def import_userdata(request: Request, api_key: str = Header(..., alias="X-Admin-API-Key")):
+    """
+    Endpoint for importing user data from a tar stream
+    """
+    if not admin_api_key.validate_key(api_key):
+        raise HTTPException(detail="Invalid API key", status_code=401)
+    logger.info("Importing user data", user_id="[Admin API]")
+    try:
+        stats = await import_archive(
+            userdata_managers(),
+            request.stream(),
+            concurrency = configs.get_config("userdata_import_concurrency", 8).get_value(int),
+        )
+    except (ValueError, tarfile.TarError) as e:
+        raise HTTPException(detail=f"Invalid archive: {e}", status_code=400)
+    finally:
+        # 丢弃导入前缓存的配置
+        await chat.user_config_manager.clear_cache()
+    return JSONResponse(stats)
+
+
+@app.get("/admin/metrics/compaction")
+async def get_compaction_metrics(api_key: str = Header(..., alias="X-Admin-API-Key")):
+    """
+    Endpoint for getting context compaction metrics
+    """
+    if not admin_api_key.validate_key(api_key):
+        raise HTTPException(detail="Invalid API key", status_code=401)
+    if chat.context_compactor is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse({"enabled": True, **chat.context_compactor.stats()})
+
+
+@app.get("/admin/metrics/completion_cache")
+async def get_completion_cache_metrics(api_key: str = Header(..., alias="X-Admin-API-Key")):
+    """
+    Endpoint for getting completion cache metrics
+    """
+    if not admin_api_key.validate_key(api_key):
+        raise HTTPException(detail="Invalid API key", status_code=401)
+    return JSONResponse(chat.api_client.completion_cache.stats())
+
+
+@app.delete("/admin/completion_cache")
+async def clear_completion_cache(api_key: str = Header(..., alias="X-Admin-API-Key")):
+    """
+    Endpoint for clearing the completion cache
+    """
+    if not admin_api_key.validate_key(api_key):
+        raise HTTPException(detail="Invalid API key", status_code=401)
+    cleared = await chat.api_client.completion_cache.clear()
+    return JSONResponse({"cleared": cleared})
+
+
+@app.get("/admin/metrics/coalescing")
+async def get_coalescing_metrics(api_key: str = Header(..., alias="X-Admin-API-Key")):
+    """
+    Endpoint for getting request coalescing metrics
+    """
+    if not admin_api_key.validate_key(api_key):
+        raise HTTPException(detail="Invalid API key", status_code=401)
+    return JSONResponse(chat.api_client.coalescing_stats())
+
+
+@app.get("/admin/metrics/tools")
+async def get_tool_metrics(api_key: str = Header(..., alias="X-Admin-API-Key")):
+    """
+    Endpoint for getting tool call metrics
+    """
+    if not admin_api_key.validate_key(api_key):
+        raise HTTPException(detail="Invalid API key", status_code=401)
+    if chat.toolbox is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse({"enabled": True, **chat.toolbox.stats()})
+
+
 @app.post("/admin/regenerate/admin_key")
 async def regenerate_admin_key(api_key: str = Header(..., alias="X-Admin-API-Key")):
     """